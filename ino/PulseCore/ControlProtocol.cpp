@@ -0,0 +1,241 @@
+// ControlProtocol.cpp - Runtime tuning of the transmitter (see ControlProtocol.h)
+
+#include "ControlProtocol.h"
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+const ControlParam CONTROL_PARAMS[CONTROL_PARAM_COUNT] = {
+    {"trigger_level",       0,     1023},
+    {"rearm_level",         0,     1023},
+    {"debounce_us",         0,     1000000},
+    {"stop_timeout_us",     50000, 5000000},
+    {"magnets",             1,     16},
+    {"batch_interval_us",   0,     1000000},
+    {"max_batch_delay_us",  1000,  1000000},
+    {"active_heartbeat_us", 10000, 10000000},
+    {"idle_heartbeat_us",   10000, 10000000},
+    {"state_repeat_us",     1000,  1000000},
+    {"state_repeats",       0,     10},
+};
+
+static const char *const OP_NAMES[] = {"", "GET", "SET", "SAVE", "DEFAULTS"};
+static const char *const STATUS_NAMES[] = {"ok", "bad_param", "bad_value", "bad_op", "bad_request", "busy"};
+
+int controlParamIndex(const char *name) {
+    for (uint8_t i = 0; i < CONTROL_PARAM_COUNT; i++) {
+        if (strcmp(name, CONTROL_PARAMS[i].name) == 0) {
+            return i;
+        }
+    }
+    return -1;
+}
+
+bool controlGet(const BikeSettings &s, uint8_t param, int32_t &value) {
+    switch (param) {
+        case 0: value = s.core.triggerLevel; break;
+        case 1: value = s.core.rearmLevel; break;
+        case 2: value = (int32_t)s.core.debounceUs; break;
+        case 3: value = (int32_t)s.core.stopTimeoutUs; break;
+        case 4: value = s.core.magnets; break;
+        case 5: value = (int32_t)s.transmit.batchIntervalUs; break;
+        case 6: value = (int32_t)s.transmit.maxBatchDelayUs; break;
+        case 7: value = (int32_t)s.transmit.activeHeartbeatUs; break;
+        case 8: value = (int32_t)s.transmit.idleHeartbeatUs; break;
+        case 9: value = (int32_t)s.transmit.stateRepeatUs; break;
+        case 10: value = s.transmit.stateRepeats; break;
+        default: return false;
+    }
+    return true;
+}
+
+uint8_t controlSet(BikeSettings &s, uint8_t param, int32_t value) {
+    if (param >= CONTROL_PARAM_COUNT) {
+        return CONTROL_BAD_PARAM;
+    }
+    if (value < CONTROL_PARAMS[param].minValue || value > CONTROL_PARAMS[param].maxValue) {
+        return CONTROL_BAD_VALUE;
+    }
+    // The re-arm level must stay at or below the trigger level (the Schmitt trigger hysteresis)
+    if ((param == 0 && value < s.core.rearmLevel) || (param == 1 && value > s.core.triggerLevel)) {
+        return CONTROL_BAD_VALUE;
+    }
+    switch (param) {
+        case 0: s.core.triggerLevel = (int)value; break;
+        case 1: s.core.rearmLevel = (int)value; break;
+        case 2: s.core.debounceUs = (uint32_t)value; break;
+        case 3: s.core.stopTimeoutUs = (uint32_t)value; break;
+        case 4: s.core.magnets = (uint8_t)value; break;
+        case 5: s.transmit.batchIntervalUs = (uint32_t)value; break;
+        case 6: s.transmit.maxBatchDelayUs = (uint32_t)value; break;
+        case 7: s.transmit.activeHeartbeatUs = (uint32_t)value; break;
+        case 8: s.transmit.idleHeartbeatUs = (uint32_t)value; break;
+        case 9: s.transmit.stateRepeatUs = (uint32_t)value; break;
+        case 10: s.transmit.stateRepeats = (uint8_t)value; break;
+    }
+    return CONTROL_OK;
+}
+
+// --- EEPROM IMAGE ---
+
+static uint16_t fletcher16(const uint8_t *data, size_t length) {
+    uint16_t a = 0, b = 0;
+    for (size_t i = 0; i < length; i++) {
+        a = (a + data[i]) % 255;
+        b = (b + a) % 255;
+    }
+    return (uint16_t)((b << 8) | a);
+}
+
+void packSettings(const BikeSettings &settings, StoredSettings &stored) {
+    memset(&stored, 0, sizeof(stored));   // Padding bytes are part of the checksum
+    stored.magic = SETTINGS_MAGIC;
+    stored.version = SETTINGS_VERSION;
+    stored.settings = settings;
+    stored.checksum = fletcher16((const uint8_t *)&stored, offsetof(StoredSettings, checksum));
+}
+
+bool unpackSettings(const StoredSettings &stored, BikeSettings &settings) {
+    if (stored.magic != SETTINGS_MAGIC || stored.version != SETTINGS_VERSION ||
+        stored.checksum != fletcher16((const uint8_t *)&stored, offsetof(StoredSettings, checksum))) {
+        return false;
+    }
+    // Never trust the EEPROM blindly: every value must still pass the range checks
+    int32_t value;
+    for (uint8_t i = 0; i < CONTROL_PARAM_COUNT; i++) {
+        controlGet(stored.settings, i, value);
+        if (value < CONTROL_PARAMS[i].minValue || value > CONTROL_PARAMS[i].maxValue) {
+            return false;
+        }
+    }
+    if (stored.settings.core.rearmLevel > stored.settings.core.triggerLevel) {
+        return false;
+    }
+    settings = stored.settings;
+    return true;
+}
+
+// --- RECEIVER: TEXT <-> MESSAGE ---
+
+uint8_t parseControlLine(const char *line, ControlMessage &request) {
+    memset(&request, 0, sizeof(request));
+    request.flags = PAYLOAD_FLAG_CONTROL;
+    if (line[0] != 'C' || line[1] != ',') {
+        return CONTROL_BAD_REQUEST;
+    }
+
+    // Split a copy of the line (after 'C,') into at most 4 fields: id, op, name, value
+    char buffer[64];
+    strncpy(buffer, line + 2, sizeof(buffer) - 1);
+    buffer[sizeof(buffer) - 1] = '\0';
+    char *fields[4] = {0, 0, 0, 0};
+    uint8_t count = 0;
+    char *p = buffer;
+    while (p && count < 4) {
+        fields[count++] = p;
+        p = strchr(p, ',');
+        if (p) {
+            *p++ = '\0';
+        }
+    }
+    if (count < 2) {
+        return CONTROL_BAD_REQUEST;
+    }
+
+    char *end;
+    long id = strtol(fields[0], &end, 10);
+    if (*end != '\0' || id < 1 || id > 255) {
+        return CONTROL_BAD_REQUEST;
+    }
+    request.id = (uint8_t)id;
+
+    for (uint8_t op = CONTROL_OP_GET; op <= CONTROL_OP_DEFAULTS; op++) {
+        if (strcmp(fields[1], OP_NAMES[op]) == 0) {
+            request.op = op;
+        }
+    }
+    if (request.op == 0) {
+        return CONTROL_BAD_OP;
+    }
+    if (request.op == CONTROL_OP_GET || request.op == CONTROL_OP_SET) {
+        int param = (count > 2) ? controlParamIndex(fields[2]) : -1;
+        if (param < 0) {
+            return CONTROL_BAD_PARAM;
+        }
+        request.param = (uint8_t)param;
+    }
+    if (request.op == CONTROL_OP_SET) {
+        if (count < 4) {
+            return CONTROL_BAD_VALUE;
+        }
+        long value = strtol(fields[3], &end, 10);
+        if (*end != '\0' || end == fields[3]) {
+            return CONTROL_BAD_VALUE;
+        }
+        request.value = (int32_t)value;
+    }
+    return CONTROL_OK;
+}
+
+void formatControlReply(const ControlMessage &reply, char *out, size_t size) {
+    if (reply.status != CONTROL_OK) {
+        uint8_t status = reply.status <= CONTROL_BUSY ? reply.status : CONTROL_BAD_REQUEST;
+        snprintf(out, size, "A,%u,ERR,%s", (unsigned)reply.id, STATUS_NAMES[status]);
+    } else if ((reply.op == CONTROL_OP_GET || reply.op == CONTROL_OP_SET) && reply.param < CONTROL_PARAM_COUNT) {
+        snprintf(out, size, "A,%u,OK,%s,%ld", (unsigned)reply.id, CONTROL_PARAMS[reply.param].name,
+                 (long)reply.value);
+    } else {
+        snprintf(out, size, "A,%u,OK", (unsigned)reply.id);
+    }
+}
+
+// --- TRANSMITTER: REQUEST HANDLER ---
+
+ControlHandler::ControlHandler(const BikeSettings &defaultSettings)
+    : defaults(defaultSettings),
+      live(defaultSettings),
+      haveLast(false) {
+}
+
+uint8_t ControlHandler::handle(const ControlMessage &request, ControlMessage &reply) {
+    // A retry of the last request (its reply was lost): answer again, apply nothing
+    if (haveLast && request.id == lastRequest.id && request.op == lastRequest.op &&
+        request.param == lastRequest.param && request.value == lastRequest.value) {
+        reply = lastReply;
+        return 0;
+    }
+
+    uint8_t result = 0;
+    reply = request;
+    reply.flags = PAYLOAD_FLAG_CONTROL;
+    reply.status = CONTROL_OK;
+    switch (request.op) {
+        case CONTROL_OP_GET:
+            if (!controlGet(live, request.param, reply.value)) {
+                reply.status = CONTROL_BAD_PARAM;
+            }
+            break;
+        case CONTROL_OP_SET:
+            reply.status = controlSet(live, request.param, request.value);
+            if (reply.status == CONTROL_OK) {
+                result = CONTROL_CHANGED;
+            }
+            controlGet(live, request.param, reply.value);
+            break;
+        case CONTROL_OP_SAVE:
+            result = CONTROL_SAVE;
+            break;
+        case CONTROL_OP_DEFAULTS:
+            live = defaults;
+            result = CONTROL_CHANGED;
+            break;
+        default:
+            reply.status = CONTROL_BAD_OP;
+    }
+
+    haveLast = true;
+    lastRequest = request;
+    lastReply = reply;
+    return result;
+}
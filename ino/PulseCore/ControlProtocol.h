@@ -0,0 +1,123 @@
+// ControlProtocol.h - Runtime tuning of the transmitter without reflashing
+// The PC sends text commands to the Receiver, the Receiver relays them to the transmitter
+// in the ACK payload of the transmitter's next packet (NRF24L01 ACK payloads), and the
+// transmitter answers with a ControlMessage packet, which the Receiver prints:
+//
+//   PC -> Receiver:   C,<id>,GET,<name>            C,<id>,SET,<name>,<value>
+//                     C,<id>,SAVE                  C,<id>,DEFAULTS
+//   Receiver -> PC:   A,<id>,OK,<name>,<value>     A,<id>,OK        A,<id>,ERR,<reason>
+//
+// <id> (1..255) is chosen by the PC and echoed back, so several requests can be in flight.
+// A request that is repeated with the same id (a retry after a lost reply) is answered
+// again without being applied twice. SAVE stores the settings in EEPROM, DEFAULTS goes
+// back to the values compiled into the sketch. Names and ranges: CONTROL_PARAMS below,
+// and PARAMS in python/bikeControl.py (MUST MATCH).
+//
+// Like PulseCore it has no Arduino dependencies (the sketch does the EEPROM access) and
+// is tested on the PC (hostTest/).
+
+#ifndef CONTROL_PROTOCOL_H
+#define CONTROL_PROTOCOL_H
+
+#include <stddef.h>
+#include <stdint.h>
+
+#include "PulseCore.h"
+#include "TransmitPolicy.h"
+
+// Set in the first byte of a ControlMessage (the same byte as PulsePayload.flags)
+const uint8_t PAYLOAD_FLAG_CONTROL = 2;
+
+// --- OPERATIONS ---
+const uint8_t CONTROL_OP_GET = 1;
+const uint8_t CONTROL_OP_SET = 2;
+const uint8_t CONTROL_OP_SAVE = 3;
+const uint8_t CONTROL_OP_DEFAULTS = 4;
+
+// --- REPLY STATUS ---
+const uint8_t CONTROL_OK = 0;
+const uint8_t CONTROL_BAD_PARAM = 1;
+const uint8_t CONTROL_BAD_VALUE = 2;
+const uint8_t CONTROL_BAD_OP = 3;
+const uint8_t CONTROL_BAD_REQUEST = 4;   // Receiver: line could not be parsed
+const uint8_t CONTROL_BUSY = 5;          // Receiver: command queue full
+
+// --- handle() RESULT BITS ---
+const uint8_t CONTROL_CHANGED = 1;       // Settings changed: apply them to PulseCore / TransmitPolicy
+const uint8_t CONTROL_SAVE = 2;          // Write the settings to EEPROM
+
+struct ControlMessage {
+    uint8_t flags;       // PAYLOAD_FLAG_CONTROL
+    uint8_t id;          // Request id from the PC, echoed in the reply
+    uint8_t op;          // CONTROL_OP_*
+    uint8_t param;       // Index into CONTROL_PARAMS (GET / SET)
+    int32_t value;       // SET: new value; reply: current value
+    uint8_t status;      // Reply: CONTROL_OK or an error
+};
+
+// Everything that can be tuned at runtime
+struct BikeSettings {
+    PulseCoreConfig core;
+    TransmitPolicyConfig transmit;
+};
+
+// EEPROM image of BikeSettings
+const uint16_t SETTINGS_MAGIC = 0xB1CE;
+const uint8_t SETTINGS_VERSION = 1;
+
+struct StoredSettings {
+    uint16_t magic;
+    uint8_t version;
+    BikeSettings settings;
+    uint16_t checksum;   // Fletcher-16 of everything before it
+};
+
+struct ControlParam {
+    const char *name;
+    int32_t minValue;
+    int32_t maxValue;
+};
+
+const uint8_t CONTROL_PARAM_COUNT = 11;
+extern const ControlParam CONTROL_PARAMS[CONTROL_PARAM_COUNT];
+
+// Parameter index by name, or -1.
+int controlParamIndex(const char *name);
+
+// Reads / writes one parameter. controlSet() checks the range and that the settings stay
+// consistent (rearm level not above the trigger level) and returns a CONTROL_* status.
+bool controlGet(const BikeSettings &settings, uint8_t param, int32_t &value);
+uint8_t controlSet(BikeSettings &settings, uint8_t param, int32_t value);
+
+// EEPROM image with magic, version and checksum; unpackSettings() is false for a blank,
+// old or corrupted EEPROM (keep the defaults then).
+void packSettings(const BikeSettings &settings, StoredSettings &stored);
+bool unpackSettings(const StoredSettings &stored, BikeSettings &settings);
+
+// Receiver side: text line <-> ControlMessage.
+// parseControlLine() returns CONTROL_OK or an error status (request.id is set when readable).
+uint8_t parseControlLine(const char *line, ControlMessage &request);
+void formatControlReply(const ControlMessage &reply, char *out, size_t size);
+
+// Transmitter side: answers requests and remembers the last reply for retries.
+class ControlHandler {
+public:
+    explicit ControlHandler(const BikeSettings &defaults);
+
+    // Replaces the live settings (e.g. with the ones loaded from EEPROM at power-up).
+    void setSettings(const BikeSettings &settings) { live = settings; }
+
+    // Handles a request, fills the reply. Returns CONTROL_CHANGED / CONTROL_SAVE bits.
+    uint8_t handle(const ControlMessage &request, ControlMessage &reply);
+
+    const BikeSettings &settings() const { return live; }
+
+private:
+    BikeSettings defaults;
+    BikeSettings live;
+    bool haveLast;
+    ControlMessage lastRequest;
+    ControlMessage lastReply;
+};
+
+#endif
@@ -0,0 +1,75 @@
+// PulseCore.cpp - Portable Hall Sensor Pulse Detection (see PulseCore.h)
+
+#include "PulseCore.h"
+
+PulseCore::PulseCore(const PulseCoreConfig &config)
+    : cfg(config),
+      magnetDetected(false),
+      isSpinning(false),
+      havePulse(false),
+      lastPulseTime(0),
+      pulseInterval(0),
+      pulses(0),
+      currentRPM(0.0f) {
+    if (cfg.magnets == 0) {
+        cfg.magnets = 1;
+    }
+    if (cfg.rearmLevel > cfg.triggerLevel) {
+        cfg.rearmLevel = cfg.triggerLevel;
+    }
+}
+
+void PulseCore::setLevels(int trigger, int rearm) {
+    cfg.triggerLevel = trigger;
+    cfg.rearmLevel = (rearm > trigger) ? trigger : rearm;
+}
+
+void PulseCore::setConfig(const PulseCoreConfig &config) {
+    cfg = config;
+    if (cfg.magnets == 0) {
+        cfg.magnets = 1;
+    }
+    setLevels(cfg.triggerLevel, cfg.rearmLevel);
+}
+
+uint8_t PulseCore::update(int reading, uint32_t nowUs) {
+    uint8_t events = PULSE_EVENT_NONE;
+
+    // Schmitt trigger: rising edge above triggerLevel, re-arm below rearmLevel
+    if (!magnetDetected) {
+        if (reading > cfg.triggerLevel) {
+            magnetDetected = true;
+
+            uint32_t sinceLast = nowUs - lastPulseTime;   // Unsigned: safe across the micros() wrap
+            if (!havePulse || sinceLast > cfg.debounceUs) {
+                if (havePulse && isSpinning) {
+                    pulseInterval = sinceLast;
+                    currentRPM = 60000000.0f / ((float)pulseInterval * cfg.magnets);
+                }
+                lastPulseTime = nowUs;
+                havePulse = true;
+                pulses++;
+                events |= PULSE_EVENT_PULSE;
+
+                if (!isSpinning) {
+                    isSpinning = true;
+                    events |= PULSE_EVENT_STARTED;
+                }
+            }
+        }
+    } else if (reading < cfg.rearmLevel) {
+        magnetDetected = false;
+    }
+
+    return events | poll(nowUs);
+}
+
+uint8_t PulseCore::poll(uint32_t nowUs) {
+    if (isSpinning && (uint32_t)(nowUs - lastPulseTime) > cfg.stopTimeoutUs) {
+        isSpinning = false;
+        currentRPM = 0.0f;
+        pulseInterval = 0;
+        return PULSE_EVENT_STOPPED;
+    }
+    return PULSE_EVENT_NONE;
+}
@@ -0,0 +1,61 @@
+// PulseCore.h - Portable Hall Sensor Pulse Detection
+// The pulse detection, debounce, RPM and stop-timeout logic shared by the transmitter
+// sketches. No Arduino dependencies: the sketch passes in analogRead() and micros(),
+// so the same code also builds and runs on a normal Linux PC (see hostTest/).
+//
+// Install for the Arduino IDE: copy this PulseCore folder into your Arduino 'libraries' folder.
+//
+// All times are micros() values (unsigned long, wraps every ~71 minutes).
+// Every time comparison is done as an unsigned difference, so the wrap is harmless.
+
+#ifndef PULSE_CORE_H
+#define PULSE_CORE_H
+
+#include <stdint.h>
+
+// --- EVENTS RETURNED BY update() / poll() ---
+const uint8_t PULSE_EVENT_NONE = 0;
+const uint8_t PULSE_EVENT_PULSE = 1;     // A new magnet pulse was accepted
+const uint8_t PULSE_EVENT_STARTED = 2;   // First pulse after being stopped
+const uint8_t PULSE_EVENT_STOPPED = 4;   // No pulse for stopTimeoutUs
+
+struct PulseCoreConfig {
+    int triggerLevel;        // Reading above this = magnet present (MAGNET_THRESHOLD)
+    int rearmLevel;          // Reading must fall below this before the next pulse (hysteresis)
+    uint32_t debounceUs;     // Pulses closer together than this are ignored
+    uint32_t stopTimeoutUs;  // No pulse for this long = stopped, RPM = 0
+    uint8_t magnets;         // Magnets per revolution
+};
+
+class PulseCore {
+public:
+    explicit PulseCore(const PulseCoreConfig &config);
+
+    // Feeds one sensor reading taken at nowUs. Returns a PULSE_EVENT_* bitmask.
+    uint8_t update(int reading, uint32_t nowUs);
+
+    // Checks the stop timeout without a new reading. Returns PULSE_EVENT_STOPPED or NONE.
+    uint8_t poll(uint32_t nowUs);
+
+    float rpm() const { return currentRPM; }
+    bool spinning() const { return isSpinning; }
+    uint32_t lastPulseUs() const { return lastPulseTime; }
+    uint32_t pulseIntervalUs() const { return pulseInterval; }
+    uint32_t pulseCount() const { return pulses; }
+
+    void setLevels(int trigger, int rearm);
+    void setConfig(const PulseCoreConfig &config);   // Runtime retuning; the pulse timing is kept
+    const PulseCoreConfig &config() const { return cfg; }
+
+private:
+    PulseCoreConfig cfg;
+    bool magnetDetected;
+    bool isSpinning;
+    bool havePulse;
+    uint32_t lastPulseTime;
+    uint32_t pulseInterval;
+    uint32_t pulses;
+    float currentRPM;
+};
+
+#endif
@@ -0,0 +1,78 @@
+// TransmitPolicy.cpp - Event-driven transmit scheduling (see TransmitPolicy.h)
+
+#include "TransmitPolicy.h"
+#include "PulseCore.h"
+
+TransmitPolicy::TransmitPolicy(const TransmitPolicyConfig &config)
+    : cfg(config),
+      count(0),
+      stateChanged(true),       // Announce the state once at power-up
+      repeatsLeft(0),
+      urgent(false),
+      firstPendingUs(0),
+      lastPulseUs(0),
+      havePulse(false),
+      lastSendUs(0),
+      nextSeq(0) {
+}
+
+void TransmitPolicy::onEvents(uint8_t events, uint32_t pulseUs, uint32_t nowUs) {
+    if (events & (PULSE_EVENT_STARTED | PULSE_EVENT_STOPPED)) {
+        stateChanged = true;
+        repeatsLeft = cfg.stateRepeats;
+    }
+    if (!(events & PULSE_EVENT_PULSE)) {
+        return;
+    }
+
+    if (count == MAX_BATCH_PULSES) {
+        // Should not happen (a full batch is due at once), but never overflow: drop the oldest
+        for (uint8_t i = 1; i < MAX_BATCH_PULSES; i++) {
+            pulses[i - 1] = pulses[i];
+        }
+        count--;
+    }
+    if (count == 0) {
+        firstPendingUs = nowUs;
+    }
+    pulses[count++] = pulseUs;
+
+    // Low cadence: each pulse goes out on its own, immediately
+    if (!havePulse || (uint32_t)(pulseUs - lastPulseUs) > cfg.batchIntervalUs) {
+        urgent = true;
+    }
+    lastPulseUs = pulseUs;
+    havePulse = true;
+}
+
+bool TransmitPolicy::due(bool spinning, uint32_t nowUs) const {
+    if (stateChanged || urgent) {
+        return true;
+    }
+    if (count > 0) {
+        return count >= MAX_BATCH_PULSES || (uint32_t)(nowUs - firstPendingUs) >= cfg.maxBatchDelayUs;
+    }
+    uint32_t heartbeat = spinning ? cfg.activeHeartbeatUs : cfg.idleHeartbeatUs;
+    if (repeatsLeft > 0 && cfg.stateRepeatUs < heartbeat) {
+        heartbeat = cfg.stateRepeatUs;
+    }
+    return (uint32_t)(nowUs - lastSendUs) >= heartbeat;
+}
+
+void TransmitPolicy::build(PulsePayload &payload, bool spinning, float rpm, uint32_t nowUs) {
+    payload.flags = spinning ? PAYLOAD_FLAG_SPIN : 0;
+    payload.count = count;
+    payload.seq = nextSeq++;
+    payload.rpm = rpm;
+    payload.sentUs = nowUs;
+    for (uint8_t i = 0; i < MAX_BATCH_PULSES; i++) {
+        payload.pulseUs[i] = (i < count) ? pulses[i] : 0;
+    }
+    if (!stateChanged && repeatsLeft > 0) {
+        repeatsLeft--;
+    }
+    count = 0;
+    stateChanged = false;
+    urgent = false;
+    lastSendUs = nowUs;
+}
@@ -0,0 +1,73 @@
+// TransmitPolicy.h - When should the bike side send a radio packet?
+// Event-driven instead of a fixed 'radio.write every loop + delay(50)':
+//   - a state change (started / stopped) is sent right away,
+//   - at low cadence every pulse is sent right away (lowest latency, little airtime),
+//   - at high cadence pulse timestamps are batched into one 32-byte NRF payload,
+//   - a state change is repeated a few times shortly after, and with nothing to send a
+//     heartbeat repeats the current state, so a lost packet can never leave the PC in
+//     the wrong state for long.
+// Like PulseCore it has no Arduino dependencies and is simulated on the PC (hostTest/).
+
+#ifndef TRANSMIT_POLICY_H
+#define TRANSMIT_POLICY_H
+
+#include <stdint.h>
+
+const uint8_t MAX_BATCH_PULSES = 5;
+
+// --- RADIO PAYLOAD (32 bytes max for the NRF24L01) ---
+const uint8_t PAYLOAD_FLAG_SPIN = 1;
+
+struct PulsePayload {
+    uint8_t flags;                       // PAYLOAD_FLAG_SPIN while spinning
+    uint8_t count;                       // Pulse timestamps in this packet (0 = heartbeat)
+    uint16_t seq;                        // +1 per packet, so the PC can count lost packets
+    float rpm;                           // Current RPM from PulseCore
+    uint32_t sentUs;                     // micros() when the packet was built (latency)
+    uint32_t pulseUs[MAX_BATCH_PULSES];  // micros() of each pulse, oldest first
+};
+static_assert(sizeof(PulsePayload) <= 32, "PulsePayload must fit in one NRF24L01 packet");
+
+struct TransmitPolicyConfig {
+    uint32_t batchIntervalUs;     // Pulses closer together than this are batched (high cadence)
+    uint32_t maxBatchDelayUs;     // A batch is never held longer than this
+    uint32_t activeHeartbeatUs;   // Heartbeat while spinning (no pulse sent for this long)
+    uint32_t idleHeartbeatUs;     // Heartbeat while stopped
+    uint32_t stateRepeatUs;       // Gap between the repeats of a state change
+    uint8_t stateRepeats;         // Extra copies of every state change packet
+};
+
+class TransmitPolicy {
+public:
+    explicit TransmitPolicy(const TransmitPolicyConfig &config);
+
+    // Report a pulse / state change (PULSE_EVENT_* bits from PulseCore) at nowUs.
+    void onEvents(uint8_t events, uint32_t pulseUs, uint32_t nowUs);
+
+    // True when a packet should be sent now. Call every loop.
+    bool due(bool spinning, uint32_t nowUs) const;
+
+    // Fills the payload with the pending pulses, the next sequence number and nowUs,
+    // and clears the pending pulses. Call right before radio.write().
+    void build(PulsePayload &payload, bool spinning, float rpm, uint32_t nowUs);
+
+    uint8_t pending() const { return count; }
+
+    const TransmitPolicyConfig &config() const { return cfg; }
+    void setConfig(const TransmitPolicyConfig &config) { cfg = config; }
+
+private:
+    TransmitPolicyConfig cfg;
+    uint32_t pulses[MAX_BATCH_PULSES];
+    uint8_t count;
+    bool stateChanged;
+    uint8_t repeatsLeft;         // State change copies still to send
+    bool urgent;                 // Send without waiting for the batch
+    uint32_t firstPendingUs;     // When the oldest pending pulse was queued
+    uint32_t lastPulseUs;
+    bool havePulse;
+    uint32_t lastSendUs;
+    uint16_t nextSeq;
+};
+
+#endif
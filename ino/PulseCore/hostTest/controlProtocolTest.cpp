@@ -0,0 +1,115 @@
+// controlProtocolTest.cpp - Host Test for ControlProtocol
+// Runs the Receiver's text parsing, the transmitter's request handler and the EEPROM
+// image through the same code the Arduinos run.
+//
+// Build and run on Linux:   make test
+
+#include <cstdio>
+#include <cstring>
+
+#include "../ControlProtocol.h"
+
+const BikeSettings DEFAULTS = {
+    {650, 580, 10000, 500000, 1},
+    {60000, 50000, 250000, 1000000, 20000, 2}
+};
+
+static int failures = 0;
+
+static void check(bool ok, const char *what) {
+    std::printf("  [%s] %s\n", ok ? " OK " : "FAIL", what);
+    if (!ok) {
+        failures++;
+    }
+}
+
+// Parses a PC line, runs it through the handler and formats the reply the Receiver prints
+static uint8_t roundTrip(ControlHandler &handler, const char *line, char *out, size_t size) {
+    ControlMessage request, reply;
+    uint8_t status = parseControlLine(line, request);
+    if (status != CONTROL_OK) {
+        reply = request;
+        reply.status = status;
+        formatControlReply(reply, out, size);
+        return 0;
+    }
+    uint8_t result = handler.handle(request, reply);
+    formatControlReply(reply, out, size);
+    return result;
+}
+
+static void testParsing() {
+    std::printf("Receiver line parsing:\n");
+    ControlMessage m;
+    check(parseControlLine("C,7,SET,trigger_level,640", m) == CONTROL_OK && m.id == 7 &&
+          m.op == CONTROL_OP_SET && m.param == 0 && m.value == 640, "SET with name and value");
+    check(parseControlLine("C,8,GET,idle_heartbeat_us", m) == CONTROL_OK && m.param == 8, "GET by name");
+    check(parseControlLine("C,9,SAVE", m) == CONTROL_OK && m.op == CONTROL_OP_SAVE, "SAVE");
+    check(parseControlLine("C,3,GET,no_such_thing", m) == CONTROL_BAD_PARAM && m.id == 3, "unknown name keeps the id");
+    check(parseControlLine("C,3,SET,magnets,4x", m) == CONTROL_BAD_VALUE, "bad number");
+    check(parseControlLine("C,3,FROB", m) == CONTROL_BAD_OP, "unknown operation");
+    check(parseControlLine("C,0,SAVE", m) == CONTROL_BAD_REQUEST, "id 0 rejected");
+    check(parseControlLine("980.5", m) == CONTROL_BAD_REQUEST, "an RPM line is not a command");
+}
+
+static void testHandler() {
+    std::printf("Transmitter request handler:\n");
+    ControlHandler handler(DEFAULTS);
+    char out[64];
+
+    uint8_t r = roundTrip(handler, "C,1,SET,trigger_level,700", out, sizeof(out));
+    check(r == CONTROL_CHANGED && std::strcmp(out, "A,1,OK,trigger_level,700") == 0, "SET applies and echoes the value");
+    check(handler.settings().core.triggerLevel == 700, "setting changed");
+
+    roundTrip(handler, "C,2,GET,trigger_level", out, sizeof(out));
+    check(std::strcmp(out, "A,2,OK,trigger_level,700") == 0, "GET reads it back");
+
+    roundTrip(handler, "C,3,SET,rearm_level,800", out, sizeof(out));
+    check(std::strcmp(out, "A,3,ERR,bad_value") == 0, "re-arm above trigger rejected");
+    roundTrip(handler, "C,4,SET,magnets,0", out, sizeof(out));
+    check(std::strcmp(out, "A,4,ERR,bad_value") == 0 && handler.settings().core.magnets == 1, "out of range rejected");
+
+    // A retry with the same id is answered again but not applied twice
+    roundTrip(handler, "C,5,SET,state_repeats,3", out, sizeof(out));
+    r = roundTrip(handler, "C,5,SET,state_repeats,3", out, sizeof(out));
+    check(r == 0 && std::strcmp(out, "A,5,OK,state_repeats,3") == 0, "retry answered without re-applying");
+
+    r = roundTrip(handler, "C,6,SAVE", out, sizeof(out));
+    check(r == CONTROL_SAVE && std::strcmp(out, "A,6,OK") == 0, "SAVE asks the sketch to write EEPROM");
+    r = roundTrip(handler, "C,7,DEFAULTS", out, sizeof(out));
+    check(r == CONTROL_CHANGED && handler.settings().core.triggerLevel == 650, "DEFAULTS restores the sketch values");
+}
+
+static void testStorage() {
+    std::printf("EEPROM image:\n");
+    BikeSettings tuned = DEFAULTS;
+    tuned.core.triggerLevel = 612;
+    tuned.transmit.idleHeartbeatUs = 500000;
+
+    StoredSettings stored;
+    packSettings(tuned, stored);
+    BikeSettings loaded = DEFAULTS;
+    check(unpackSettings(stored, loaded) && loaded.core.triggerLevel == 612 &&
+          loaded.transmit.idleHeartbeatUs == 500000, "settings survive a save / load");
+
+    StoredSettings blank;
+    std::memset(&blank, 0xFF, sizeof(blank));   // A new Arduino's EEPROM reads 0xFF
+    check(!unpackSettings(blank, loaded), "blank EEPROM rejected");
+
+    StoredSettings corrupt = stored;
+    ((uint8_t *)&corrupt.settings)[3] ^= 0x10;
+    check(!unpackSettings(corrupt, loaded), "corrupted byte detected");
+}
+
+int main() {
+    testParsing();
+    testHandler();
+    testStorage();
+
+    if (failures) {
+        std::printf("%d check(s) FAILED\n", failures);
+        return 1;
+    }
+    std::printf("All checks passed.\n");
+    return 0;
+}
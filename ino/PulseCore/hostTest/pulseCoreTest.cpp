@@ -0,0 +1,229 @@
+// pulseCoreTest.cpp - Host Test and Benchmark for PulseCore
+// Feeds synthetic Hall sensor waveforms through the same PulseCore the Arduino runs,
+// checks the results, and measures timing error and the cost per sample.
+//
+// Build and run on Linux:   make test      (or: make bench)
+
+#include <chrono>
+#include <cmath>
+#include <cstdio>
+#include <cstdlib>
+#include <random>
+#include <string>
+#include <vector>
+
+#if defined(__x86_64__) || defined(__i386__)
+#include <x86intrin.h>
+#define HAVE_RDTSC 1
+#endif
+
+#include "../PulseCore.h"
+
+// --- SYNTHETIC SENSOR ---
+// SS49E idle level ~512; the magnet pass is a Gaussian bump up to ~780.
+const double IDLE_LEVEL = 512.0;
+const double MAGNET_PEAK = 780.0;
+const double BUMP_WIDTH_FRACTION = 0.02;  // Bump width as a fraction of one revolution
+
+const PulseCoreConfig DEFAULT_CONFIG = {
+    650,        // triggerLevel
+    580,        // rearmLevel
+    1000,       // debounceUs
+    500000,     // stopTimeoutUs
+    1           // magnets
+};
+
+struct Waveform {
+    std::vector<int> readings;
+    std::vector<uint32_t> times;
+    std::vector<double> trueCrossings;  // Exact times the bump crosses triggerLevel (rising)
+};
+
+static int failures = 0;
+
+static void check(bool ok, const char *what) {
+    std::printf("  [%s] %s\n", ok ? " OK " : "FAIL", what);
+    if (!ok) {
+        failures++;
+    }
+}
+
+// Generates 'seconds' of readings at 'sampleRateHz' for a wheel at 'rpm', starting at startUs.
+static Waveform makeWaveform(double rpm, double seconds, double sampleRateHz, double noise,
+                             uint32_t startUs, int trigger, unsigned seed) {
+    Waveform w;
+    std::mt19937 rng(seed);
+    std::normal_distribution<double> gauss(0.0, noise);
+
+    double periodUs = 60000000.0 / rpm;
+    double width = periodUs * BUMP_WIDTH_FRACTION;
+    double stepUs = 1000000.0 / sampleRateHz;
+    size_t n = (size_t)(seconds * sampleRateHz);
+    // Offset of the rising crossing from the bump centre
+    double crossOffset = width * std::sqrt(std::log((MAGNET_PEAK - IDLE_LEVEL) / (trigger - IDLE_LEVEL)));
+
+    w.readings.reserve(n);
+    w.times.reserve(n);
+    for (size_t i = 0; i < n; i++) {
+        double t = i * stepUs;
+        double phase = std::fmod(t, periodUs) - periodUs * 0.5;
+        double value = IDLE_LEVEL + (MAGNET_PEAK - IDLE_LEVEL) * std::exp(-(phase * phase) / (width * width));
+        value += gauss(rng);
+        if (value < 0) value = 0;
+        if (value > 1023) value = 1023;
+        w.readings.push_back((int)value);
+        w.times.push_back(startUs + (uint32_t)(int64_t)t);
+    }
+    for (double c = periodUs * 0.5 - crossOffset; c < seconds * 1000000.0; c += periodUs) {
+        w.trueCrossings.push_back(c);
+    }
+    return w;
+}
+
+struct RunResult {
+    std::vector<uint32_t> pulseTimes;
+    float finalRPM;
+    int starts;
+    int stops;
+};
+
+static RunResult run(PulseCore &core, const Waveform &w) {
+    RunResult r = {{}, 0.0f, 0, 0};
+    for (size_t i = 0; i < w.readings.size(); i++) {
+        uint8_t ev = core.update(w.readings[i], w.times[i]);
+        if (ev & PULSE_EVENT_PULSE) r.pulseTimes.push_back(w.times[i]);
+        if (ev & PULSE_EVENT_STARTED) r.starts++;
+        if (ev & PULSE_EVENT_STOPPED) r.stops++;
+    }
+    r.finalRPM = core.rpm();
+    return r;
+}
+
+// --- TESTS ---
+
+static void testSteadyCadence() {
+    // The 500 ms stop timeout means anything under 120 RPM counts as stopped
+    std::printf("Steady cadence (2 kHz sampling, noise sigma 3):\n");
+    const double rpms[] = {150.0, 300.0, 450.0, 600.0};
+    for (double rpm : rpms) {
+        PulseCore core(DEFAULT_CONFIG);
+        Waveform w = makeWaveform(rpm, 10.0, 2000.0, 3.0, 0, DEFAULT_CONFIG.triggerLevel, 1);
+        RunResult r = run(core, w);
+
+        double sumErr = 0.0, maxErr = 0.0;
+        size_t matched = 0;
+        for (size_t i = 0; i < r.pulseTimes.size() && i < w.trueCrossings.size(); i++) {
+            double err = (double)r.pulseTimes[i] - w.trueCrossings[i];
+            sumErr += std::fabs(err);
+            if (std::fabs(err) > maxErr) maxErr = std::fabs(err);
+            matched++;
+        }
+        double rpmErr = std::fabs(r.finalRPM - rpm) / rpm * 100.0;
+        std::printf("  %5.0f RPM: %zu/%zu pulses, timing error mean %.0f us max %.0f us, RPM error %.2f%%\n",
+                    rpm, r.pulseTimes.size(), w.trueCrossings.size(),
+                    matched ? sumErr / matched : 0.0, maxErr, rpmErr);
+        char label[96];
+        std::snprintf(label, sizeof(label), "%.0f RPM: every pulse detected exactly once", rpm);
+        check(r.pulseTimes.size() == w.trueCrossings.size(), label);
+        // One sample period of quantization, plus noise moving the crossing a little
+        std::snprintf(label, sizeof(label), "%.0f RPM: timing error within 1.5 samples (750 us)", rpm);
+        check(maxErr <= 750.0, label);
+    }
+}
+
+static void testStopTimeout() {
+    std::printf("Stop timeout:\n");
+    PulseCore core(DEFAULT_CONFIG);
+    Waveform w = makeWaveform(120.0, 3.0, 2000.0, 2.0, 0, DEFAULT_CONFIG.triggerLevel, 2);
+    RunResult r = run(core, w);
+    check(r.starts == 1 && r.stops == 0, "started once while pedalling");
+
+    // Idle samples after the last pulse
+    uint32_t t = w.times.back();
+    uint32_t stoppedAt = 0;
+    for (int i = 0; i < 4000 && !stoppedAt; i++) {
+        t += 500;
+        if (core.update((int)IDLE_LEVEL, t) & PULSE_EVENT_STOPPED) stoppedAt = t;
+    }
+    uint32_t late = stoppedAt - core.lastPulseUs();
+    std::printf("  stop reported %u us after the last pulse\n", late);
+    check(stoppedAt != 0 && late <= DEFAULT_CONFIG.stopTimeoutUs + 500, "stop reported within timeout + one sample");
+    check(core.rpm() == 0.0f && !core.spinning(), "RPM is zero after the stop");
+}
+
+static void testMicrosWrap() {
+    std::printf("micros() wrap-around:\n");
+    PulseCore core(DEFAULT_CONFIG);
+    // Start 2 seconds before the 32-bit micros() counter wraps
+    Waveform w = makeWaveform(300.0, 6.0, 2000.0, 2.0, 0xFFFFFFFFu - 2000000u, DEFAULT_CONFIG.triggerLevel, 3);
+    RunResult r = run(core, w);
+    check(r.stops == 0, "no false stop across the wrap");
+    check(std::fabs(r.finalRPM - 300.0f) < 3.0f, "RPM correct after the wrap");
+    check(r.pulseTimes.size() == w.trueCrossings.size(), "no pulses lost across the wrap");
+}
+
+static void testHysteresis() {
+    std::printf("Hysteresis against a noisy slow edge:\n");
+    // Very noisy, slow wheel: the bump lingers near the threshold for many samples
+    Waveform w = makeWaveform(130.0, 12.0, 2000.0, 12.0, 0, DEFAULT_CONFIG.triggerLevel, 4);
+
+    PulseCoreConfig noHyst = DEFAULT_CONFIG;
+    noHyst.rearmLevel = noHyst.triggerLevel;
+    noHyst.debounceUs = 0;
+    PulseCore plain(noHyst);
+    PulseCore schmitt(DEFAULT_CONFIG);
+    size_t plainPulses = run(plain, w).pulseTimes.size();
+    size_t schmittPulses = run(schmitt, w).pulseTimes.size();
+    std::printf("  single threshold: %zu pulses, Schmitt trigger: %zu pulses, true: %zu\n",
+                plainPulses, schmittPulses, w.trueCrossings.size());
+    check(schmittPulses == w.trueCrossings.size(), "Schmitt trigger counts every pulse once");
+}
+
+// --- BENCHMARK ---
+
+static void benchmark() {
+    std::printf("Benchmark (cost per sample):\n");
+    Waveform w = makeWaveform(300.0, 60.0, 10000.0, 3.0, 0, DEFAULT_CONFIG.triggerLevel, 5);
+    PulseCore core(DEFAULT_CONFIG);
+    const int rounds = 20;
+    volatile uint32_t sink = 0;
+
+    auto start = std::chrono::steady_clock::now();
+#ifdef HAVE_RDTSC
+    uint64_t c0 = __rdtsc();
+#endif
+    for (int round = 0; round < rounds; round++) {
+        for (size_t i = 0; i < w.readings.size(); i++) {
+            sink += core.update(w.readings[i], w.times[i] + round * 60000000u);
+        }
+    }
+#ifdef HAVE_RDTSC
+    uint64_t cycles = __rdtsc() - c0;
+#endif
+    auto ns = std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::steady_clock::now() - start).count();
+    double samples = (double)w.readings.size() * rounds;
+
+    std::printf("  %.0f samples, %.2f ns/sample", samples, ns / samples);
+#ifdef HAVE_RDTSC
+    std::printf(", %.1f TSC cycles/sample", cycles / samples);
+#endif
+    std::printf(" (sink %u)\n", (unsigned)sink);
+}
+
+int main(int argc, char **argv) {
+    bool benchOnly = argc > 1 && std::string(argv[1]) == "bench";
+    if (!benchOnly) {
+        testSteadyCadence();
+        testStopTimeout();
+        testMicrosWrap();
+        testHysteresis();
+    }
+    benchmark();
+
+    if (failures) {
+        std::printf("%d check(s) FAILED\n", failures);
+        return 1;
+    }
+    std::printf("All checks passed.\n");
+    return 0;
+}
@@ -0,0 +1,213 @@
+// transmitSim.cpp - Radio Transmit Policy Simulation
+// Runs a synthetic ride (pedalling, stops, sprints) through PulseCore and compares
+// three ways of deciding when to send a radio packet over a lossy NRF24L01 link:
+//   FIXED 50ms    - radio.write every loop + delay(50)      (bicyclePartInterface10.2.ino)
+//   STATE ONLY    - send only when spin state changes       (bicyclePartInterface21.ino)
+//   ADAPTIVE      - TransmitPolicy (events + batching + heartbeat)
+// Reported: packets per second, airtime, pulse latency, and how long the PC believed
+// the wrong spin state (e.g. after a lost 'stopped' packet). For ADAPTIVE it also checks
+// that the sequence numbers let the PC count every lost packet.
+//
+// Build and run on Linux:   make sim
+
+#include <cmath>
+#include <cstdio>
+#include <random>
+#include <vector>
+
+#include "../PulseCore.h"
+#include "../TransmitPolicy.h"
+
+// --- SIMULATION SETTINGS ---
+const double SAMPLE_PERIOD_US = 500.0;      // 2 kHz sensor sampling
+const double LOSS_PROBABILITY = 0.05;       // Packet lost even after NRF auto-retries
+const double AIR_BITRATE = 1000000.0;       // RF24_1MBPS
+const double PACKET_OVERHEAD_BITS = (1 + 5 + 2) * 8 + 9;  // preamble + address + CRC + packet control
+const double TX_SETTLE_US = 130.0;          // NRF24L01 TX settling time per packet
+
+const PulseCoreConfig CORE_CONFIG = {650, 580, 10000, 500000, 1};
+const TransmitPolicyConfig POLICY_CONFIG = {
+    60000,      // batchIntervalUs: batch when pulses are < 60 ms apart (> 1000 RPM)
+    50000,      // maxBatchDelayUs
+    250000,     // activeHeartbeatUs
+    1000000,    // idleHeartbeatUs
+    20000,      // stateRepeatUs
+    2           // stateRepeats
+};
+
+enum PolicyKind { FIXED_50MS, STATE_ONLY, ADAPTIVE };
+
+// Ride profile: RPM at time t (seconds)
+static double profileRPM(double t) {
+    double cycle = std::fmod(t, 60.0);
+    if (cycle < 20.0) return 300.0;                         // steady
+    if (cycle < 23.0) return 0.0;                           // traffic light
+    if (cycle < 40.0) return 300.0 + (cycle - 23.0) * 60.0; // sprint up to ~1300 RPM
+    if (cycle < 50.0) return 1300.0;
+    if (cycle < 52.0) return 0.0;                           // short stop
+    return 200.0;
+}
+
+struct Stats {
+    long packets;
+    double airtimeUs;
+    long pulsesSent;
+    long pulsesDelivered;
+    double latencySum;
+    double latencyMax;
+    double wrongStateUs;
+    double longestWrongUs;
+    long packetsLost;         // Lost before a packet that did arrive
+    long lossesCounted;       // Lost packets the PC found from sequence gaps
+};
+
+static Stats simulate(PolicyKind kind, double seconds, unsigned seed) {
+    std::mt19937 rng(seed);
+    std::uniform_real_distribution<double> uni(0.0, 1.0);
+    std::normal_distribution<double> noise(0.0, 3.0);
+
+    PulseCore core(CORE_CONFIG);
+    TransmitPolicy policy(POLICY_CONFIG);
+    Stats s = {0, 0.0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0, 0};
+
+    double phase = 0.0;
+    bool pcSpinning = false;
+    double wrongSince = -1.0;
+    uint32_t lastFixedSend = 0;
+    bool lastSentState = false;
+    long lostInRow = 0;
+    bool haveSeq = false;
+    uint16_t pcLastSeq = 0;
+    double payloadBits = sizeof(PulsePayload) * 8.0;
+
+    for (double t = 0.0; t < seconds * 1000000.0; t += SAMPLE_PERIOD_US) {
+        uint32_t now = (uint32_t)t;
+        double rpm = profileRPM(t / 1000000.0);
+        phase += rpm / 60.0 * SAMPLE_PERIOD_US / 1000000.0;
+        double frac = phase - std::floor(phase) - 0.5;
+        double width = 0.02;
+        int reading = (int)(512.0 + 268.0 * std::exp(-(frac * frac) / (width * width)) + noise(rng));
+
+        uint8_t events = core.update(reading, now);
+        bool send = false;
+        if (kind == FIXED_50MS) {
+            send = (now - lastFixedSend) >= 50000;
+        } else if (kind == STATE_ONLY) {
+            send = core.spinning() != lastSentState;
+        } else {
+            policy.onEvents(events, core.lastPulseUs(), now);
+            send = policy.due(core.spinning(), now);
+        }
+
+        if (send) {
+            PulsePayload payload;
+            long pulsesInPacket = 0;
+            if (kind == ADAPTIVE) {
+                policy.build(payload, core.spinning(), core.rpm(), now);
+                pulsesInPacket = payload.count;
+            }
+            lastFixedSend = now;
+            lastSentState = core.spinning();
+
+            double airtime = TX_SETTLE_US + (PACKET_OVERHEAD_BITS + payloadBits) / AIR_BITRATE * 1000000.0;
+            s.packets++;
+            s.airtimeUs += airtime;
+            s.pulsesSent += pulsesInPacket;
+            if (uni(rng) >= LOSS_PROBABILITY) {
+                pcSpinning = core.spinning();
+                if (kind == ADAPTIVE) {
+                    if (haveSeq) {
+                        s.lossesCounted += (uint16_t)(payload.seq - pcLastSeq) - 1;
+                    }
+                    haveSeq = true;
+                    pcLastSeq = payload.seq;
+                    s.packetsLost += lostInRow;
+                }
+                lostInRow = 0;
+                for (long i = 0; i < pulsesInPacket; i++) {
+                    double latency = t + airtime - payload.pulseUs[i];
+                    s.pulsesDelivered++;
+                    s.latencySum += latency;
+                    if (latency > s.latencyMax) s.latencyMax = latency;
+                }
+            } else if (haveSeq) {
+                lostInRow++;
+            }
+        }
+
+        // Time the PC shows the wrong state
+        bool wrong = pcSpinning != core.spinning();
+        if (wrong) {
+            s.wrongStateUs += SAMPLE_PERIOD_US;
+            if (wrongSince < 0) wrongSince = t;
+            if (t - wrongSince > s.longestWrongUs) s.longestWrongUs = t - wrongSince;
+        } else {
+            wrongSince = -1.0;
+        }
+    }
+    return s;
+}
+
+int main() {
+    const double seconds = 600.0;
+    const char *names[] = {"FIXED 50ms", "STATE ONLY", "ADAPTIVE"};
+    std::printf("Transmit policy simulation: 5 x %.0f s rides, %.0f%% packet loss, payload %u bytes\n\n",
+                seconds, LOSS_PROBABILITY * 100.0, (unsigned)sizeof(PulsePayload));
+    std::printf("%-11s %9s %9s %13s %13s %12s %14s\n",
+                "policy", "pkts/s", "airtime", "pulse lat avg", "pulse lat max", "wrong state", "longest wrong");
+
+    // Several rides with different random losses, added together
+    const unsigned seeds[] = {1, 2, 3, 4, 5};
+    const int rides = sizeof(seeds) / sizeof(seeds[0]);
+    int failures = 0;
+    Stats results[3];
+    for (int k = 0; k < 3; k++) {
+        Stats s = {0, 0.0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0, 0};
+        for (int r = 0; r < rides; r++) {
+            Stats one = simulate((PolicyKind)k, seconds, seeds[r]);
+            s.packets += one.packets;
+            s.airtimeUs += one.airtimeUs;
+            s.pulsesSent += one.pulsesSent;
+            s.pulsesDelivered += one.pulsesDelivered;
+            s.latencySum += one.latencySum;
+            if (one.latencyMax > s.latencyMax) s.latencyMax = one.latencyMax;
+            s.wrongStateUs += one.wrongStateUs;
+            if (one.longestWrongUs > s.longestWrongUs) s.longestWrongUs = one.longestWrongUs;
+            s.packetsLost += one.packetsLost;
+            s.lossesCounted += one.lossesCounted;
+        }
+        results[k] = s;
+        char avg[32] = "-", mx[32] = "-";
+        if (s.pulsesDelivered) {
+            std::snprintf(avg, sizeof(avg), "%.1f ms", s.latencySum / s.pulsesDelivered / 1000.0);
+            std::snprintf(mx, sizeof(mx), "%.1f ms", s.latencyMax / 1000.0);
+        }
+        double total = seconds * rides;
+        std::printf("%-11s %9.1f %8.2f%% %13s %13s %10.1f s %12.2f s\n",
+                    names[k], s.packets / total, s.airtimeUs / (total * 10000.0),
+                    avg, mx, s.wrongStateUs / 1000000.0, s.longestWrongUs / 1000000.0);
+    }
+
+    const Stats &adaptive = results[ADAPTIVE];
+    // Every pulse reaches the PC within the batch delay (plus airtime) unless its packet was lost
+    if (adaptive.latencyMax > POLICY_CONFIG.maxBatchDelayUs + 1000.0) {
+        std::printf("FAIL: adaptive pulse latency above the batch delay\n");
+        failures++;
+    }
+    // A lost packet is repaired by the next heartbeat
+    if (adaptive.longestWrongUs > POLICY_CONFIG.idleHeartbeatUs * 2.0) {
+        std::printf("FAIL: adaptive policy left the PC in the wrong state too long\n");
+        failures++;
+    }
+    if (adaptive.lossesCounted != adaptive.packetsLost) {
+        std::printf("FAIL: sequence numbers counted %ld lost packets, %ld were lost\n",
+                    adaptive.lossesCounted, adaptive.packetsLost);
+        failures++;
+    }
+    if (adaptive.packets >= results[FIXED_50MS].packets) {
+        std::printf("FAIL: adaptive policy used more packets than the fixed 50 ms policy\n");
+        failures++;
+    }
+    std::printf(failures ? "\n%d check(s) FAILED\n" : "\nAll checks passed.\n", failures);
+    return failures ? 1 : 0;
+}
@@ -0,0 +1,158 @@
+// tx_simulator.ino - Transmitter (Bike Side) - SS49E ANALOG VERSION using PulseCore
+// Reads Hall sensor on Analog Pin A0 and transmits RPM, the spin state and the pulse times.
+// The pulse detection, debounce, RPM and stop timeout live in the shared PulseCore
+// library (ino/PulseCore - copy it into your Arduino 'libraries' folder), which is
+// also tested on the PC (ino/PulseCore/hostTest).
+// Packets are event driven (TransmitPolicy): state changes and slow pulses go out at once,
+// fast pulses are batched, and a heartbeat repeats the state when nothing happens.
+// The settings below are only the defaults: they can be changed at runtime from the PC
+// ('python rollerTools.py tune', relayed by the Receiver) and are kept in EEPROM.
+
+#include <SPI.h>
+#include <EEPROM.h>
+#include "RF24.h"
+#include <PulseCore.h>
+#include <TransmitPolicy.h>
+#include <ControlProtocol.h>
+
+// --- NRF24L01 PIN DEFINITIONS ---
+RF24 radio(10, 9); // CE, CSN
+const byte addresses[][6] = {"00100"};
+
+// --- DATA STRUCTURE ---
+// PulsePayload from TransmitPolicy.h and ControlMessage from ControlProtocol.h
+// (shared with bicycleReceiverInterface30.ino)
+
+// --- SENSOR PIN DEFINITIONS ---
+const int HALL_SENSOR_PIN = A0;
+
+// --- PULSE DETECTION SETTINGS ---
+// Use 'python rollerTools.py calibrate' to pick the two levels for your sensor and magnet.
+const PulseCoreConfig PULSE_CONFIG = {
+    650,        // triggerLevel (MAGNET_THRESHOLD)
+    580,        // rearmLevel (reading must drop below this before the next pulse)
+    10000,      // debounceUs
+    500000,     // stopTimeoutUs (0.5 seconds without a pulse = stopped)
+    1           // magnets per revolution
+};
+
+// --- TRANSMIT SETTINGS ---
+// 'make sim' in ino/PulseCore/hostTest compares these against the old fixed 50 ms sending.
+const TransmitPolicyConfig TRANSMIT_CONFIG = {
+    60000,      // batchIntervalUs: batch pulses closer than 60 ms (above 1000 RPM)
+    50000,      // maxBatchDelayUs: a batch is never held longer than 50 ms
+    250000,     // activeHeartbeatUs
+    1000000,    // idleHeartbeatUs
+    20000,      // stateRepeatUs
+    2           // stateRepeats: every start/stop is sent 3 times
+};
+
+const int SETTINGS_EEPROM_ADDRESS = 0;
+
+// Set true to print 'Analog Reading (A0): N | Current RPM: X' for calibration.
+// Leave false when riding: a print per sample slows the sampling down a lot.
+const bool DEBUG_ANALOG = false;
+
+const BikeSettings DEFAULT_SETTINGS = {PULSE_CONFIG, TRANSMIT_CONFIG};
+
+// --- STATE VARIABLES ---
+PulseCore pulseCore(PULSE_CONFIG);
+TransmitPolicy transmitPolicy(TRANSMIT_CONFIG);
+ControlHandler controlHandler(DEFAULT_SETTINGS);
+ControlMessage controlReply;
+bool replyPending = false;
+
+// --- FUNCTION PROTOTYPES ---
+void transmitState();
+void transmit(const void *data, uint8_t size);
+void applySettings(const BikeSettings &settings);
+
+void setup() {
+  Serial.begin(9600);
+  Serial.println("--- Transmitter Setup (SS49E Analog, PulseCore) Start ---");
+
+  // Tuned settings from EEPROM, or the defaults above on a blank / outdated EEPROM
+  BikeSettings settings = DEFAULT_SETTINGS;
+  StoredSettings stored;
+  EEPROM.get(SETTINGS_EEPROM_ADDRESS, stored);
+  if (unpackSettings(stored, settings)) {
+    Serial.println("Settings loaded from EEPROM.");
+  }
+  controlHandler.setSettings(settings);
+  applySettings(settings);
+
+  radio.begin();
+  radio.enableDynamicPayloads();
+  radio.enableAckPayload();     // Commands from the PC ride back on the ACKs
+  radio.openWritingPipe(addresses[0]);
+  radio.setPALevel(RF24_PA_LOW);
+  radio.stopListening();
+
+  Serial.println("Sensor Ready. Start spinning the wheel to test.");
+}
+
+void loop() {
+  // 1. Read Sensor and run the shared pulse detection
+  int analogReading = analogRead(HALL_SENSOR_PIN);
+  uint32_t now = micros();
+  uint8_t events = pulseCore.update(analogReading, now);
+
+  // 2. Let the transmit policy decide whether a packet is due
+  transmitPolicy.onEvents(events, pulseCore.lastPulseUs(), now);
+  if (transmitPolicy.due(pulseCore.spinning(), now)) {
+    transmitState();
+  }
+
+  // 3. Answer a command from the PC
+  if (replyPending) {
+    replyPending = false;
+    transmit(&controlReply, sizeof(controlReply));
+  }
+
+  if (DEBUG_ANALOG) {
+    Serial.print("Analog Reading (A0): ");
+    Serial.print(analogReading);
+    Serial.print(" | Current RPM: ");
+    Serial.println(pulseCore.rpm());
+  }
+}
+
+// --- RADIO TRANSMITTER FUNCTION ---
+void transmitState() {
+  PulsePayload data;
+  transmitPolicy.build(data, pulseCore.spinning(), pulseCore.rpm(), micros());
+  transmit(&data, sizeof(data));
+}
+
+// Sends a packet and handles a command that came back in its ACK payload
+void transmit(const void *data, uint8_t size) {
+  radio.write(data, size);
+  while (radio.available()) {
+    ControlMessage request;
+    uint8_t length = radio.getDynamicPayloadSize();
+    if (length != sizeof(request)) {
+      radio.flush_rx();
+      break;
+    }
+    radio.read(&request, sizeof(request));
+    if (!(request.flags & PAYLOAD_FLAG_CONTROL)) {
+      continue;
+    }
+
+    uint8_t result = controlHandler.handle(request, controlReply);
+    if (result & CONTROL_CHANGED) {
+      applySettings(controlHandler.settings());
+    }
+    if (result & CONTROL_SAVE) {
+      StoredSettings stored;
+      packSettings(controlHandler.settings(), stored);
+      EEPROM.put(SETTINGS_EEPROM_ADDRESS, stored);   // Only changed bytes are written
+    }
+    replyPending = true;
+  }
+}
+
+void applySettings(const BikeSettings &settings) {
+  pulseCore.setConfig(settings.core);
+  transmitPolicy.setConfig(settings.transmit);
+}
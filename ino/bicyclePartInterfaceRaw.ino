@@ -0,0 +1,102 @@
+// tx_raw_samples.ino - Transmitter (Bike Side) - SS49E RAW SAMPLE VERSION
+// Samples the Hall sensor on A0 at a fixed rate and streams the raw ADC readings
+// to the PC over USB in binary blocks. ALL edge detection happens on the PC
+// (python/rawSamples.py), so threshold changes no longer need a reflash.
+//
+// Block format (little-endian, 8 + 2 * SAMPLES_PER_BLOCK bytes):
+//   0xA5 0x5A | seq (uint8) | count (uint8) | t0 micros() of first sample (uint32) | count x uint16 samples
+//
+// Nothing else is printed: a Serial.print per sample would cap the rate at a few hundred Hz.
+
+// --- SENSOR PIN DEFINITIONS ---
+const int HALL_SENSOR_PIN = A0;
+
+// --- SAMPLING ---
+const unsigned long SERIAL_BAUD = 250000;       // Exact on a 16 MHz Nano
+const unsigned long SAMPLE_PERIOD_US = 500;     // 2000 samples per second
+const uint8_t SAMPLES_PER_BLOCK = 64;
+const uint8_t BLOCK_HEADER_BYTES = 8;
+const uint16_t BLOCK_BYTES = BLOCK_HEADER_BYTES + 2 * SAMPLES_PER_BLOCK;
+
+// --- DOUBLE BUFFER ---
+// One block fills while the other drains to the serial port a few bytes at a time,
+// so sampling never waits on Serial.write().
+uint8_t blocks[2][BLOCK_BYTES];
+uint8_t fillBlock = 0;
+uint8_t fillCount = 0;
+int sendBlock = -1;         // Block being sent, -1 = none
+uint16_t sendOffset = 0;
+uint8_t blockSeq = 0;
+unsigned long nextSampleTime = 0;
+unsigned long droppedBlocks = 0;
+
+// --- FUNCTION PROTOTYPES ---
+void takeSample();
+void drainSerial();
+
+void setup() {
+  Serial.begin(SERIAL_BAUD);
+  nextSampleTime = micros();
+}
+
+void loop() {
+  // 1. Fixed-rate sampling (catches up if a loop ran long, without drifting)
+  if ((long)(micros() - nextSampleTime) >= 0) {
+    takeSample();
+    nextSampleTime += SAMPLE_PERIOD_US;
+  }
+
+  // 2. Send whatever fits in the serial TX buffer right now
+  drainSerial();
+}
+
+void takeSample() {
+  uint8_t *block = blocks[fillBlock];
+  if (fillCount == 0) {
+    unsigned long t0 = micros();
+    block[0] = 0xA5;
+    block[1] = 0x5A;
+    block[2] = blockSeq;
+    block[3] = SAMPLES_PER_BLOCK;
+    block[4] = t0 & 0xFF;
+    block[5] = (t0 >> 8) & 0xFF;
+    block[6] = (t0 >> 16) & 0xFF;
+    block[7] = (t0 >> 24) & 0xFF;
+  }
+
+  int reading = analogRead(HALL_SENSOR_PIN);
+  uint8_t *slot = block + BLOCK_HEADER_BYTES + 2 * fillCount;
+  slot[0] = reading & 0xFF;
+  slot[1] = (reading >> 8) & 0xFF;
+  fillCount++;
+
+  if (fillCount == SAMPLES_PER_BLOCK) {
+    if (sendBlock < 0) {
+      sendBlock = fillBlock;
+      sendOffset = 0;
+      fillBlock ^= 1;
+    } else {
+      // Serial link too slow: overwrite this block (the PC sees the gap in 'seq')
+      droppedBlocks++;
+    }
+    fillCount = 0;
+    blockSeq++;
+  }
+}
+
+void drainSerial() {
+  if (sendBlock < 0) {
+    return;
+  }
+  int room = Serial.availableForWrite();
+  if (room <= 0) {
+    return;
+  }
+  uint16_t remaining = BLOCK_BYTES - sendOffset;
+  uint16_t n = (room < remaining) ? room : remaining;
+  Serial.write(blocks[sendBlock] + sendOffset, n);
+  sendOffset += n;
+  if (sendOffset >= BLOCK_BYTES) {
+    sendBlock = -1;
+  }
+}
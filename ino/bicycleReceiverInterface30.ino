@@ -0,0 +1,149 @@
+// rx_serial_interface.ino - Receiver (PC Side) for bicyclePartInterface30.ino
+// Receives wireless data and prints it to the PC's Serial port
+// in the formats read by python/rollerInterface30.py:
+// F,<seq>,<tx_us>,<rx_us>\n   every packet first: link statistics (radioLink.py)
+// RPM\n                       every packet (0 when stopped)
+// P,0,<t_us>,<t_us>...\n      when the packet carries pulse times (pulseEngine.py)
+// A,<id>,OK,...\n             replies to tuning commands (python/bikeControl.py)
+//
+// Tuning commands from the PC (C,<id>,...\n, see ControlProtocol.h) are queued and handed
+// to the transmitter in the ACK of its next packet; it sends at least one heartbeat a
+// second, so a command is answered within about a second.
+
+#include <SPI.h>
+#include "RF24.h"
+#include <TransmitPolicy.h>
+#include <ControlProtocol.h>
+
+// --- NRF24L01 PIN DEFINITIONS ---
+RF24 radio(10, 9); // CE, CSN
+const byte addresses[][6] = {"00100"}; // Unique address for the pipe (MUST MATCH TX)
+
+// --- DATA STRUCTURE ---
+// PulsePayload from TransmitPolicy.h and ControlMessage from ControlProtocol.h
+// (ino/PulseCore, shared with the transmitter)
+
+// --- COMMAND QUEUE ---
+const uint8_t COMMAND_QUEUE_SIZE = 8;
+ControlMessage commandQueue[COMMAND_QUEUE_SIZE];
+uint8_t queueHead = 0;
+uint8_t queueCount = 0;
+bool ackLoaded = false;      // A command is waiting in the radio for the next ACK
+char lineBuffer[64];
+uint8_t lineLength = 0;
+
+// --- FUNCTION PROTOTYPES ---
+void readCommands();
+void printReply(const ControlMessage &reply);
+void printPulsePayload(const PulsePayload &receivedData, uint32_t arrivedUs);
+
+void setup() {
+  // IMPORTANT: The Python script is looking for this exact baud rate!
+  Serial.begin(9600);
+
+  radio.begin();
+  radio.enableDynamicPayloads();
+  radio.enableAckPayload();
+  radio.openReadingPipe(1, addresses[0]);
+  radio.setPALevel(RF24_PA_LOW);
+  radio.startListening();
+
+  Serial.println("Wireless Receiver Ready. Waiting for data...");
+}
+
+void loop() {
+  readCommands();
+
+  // Hand the next command to the radio; it goes out with the ACK of the next packet
+  if (!ackLoaded && queueCount > 0) {
+    radio.writeAckPayload(1, &commandQueue[queueHead], sizeof(ControlMessage));
+    queueHead = (queueHead + 1) % COMMAND_QUEUE_SIZE;
+    queueCount--;
+    ackLoaded = true;
+  }
+
+  if (radio.available()) {
+    uint32_t arrivedUs = micros();
+    uint8_t buffer[32];
+    uint8_t length = radio.getDynamicPayloadSize();
+    if (length == 0 || length > sizeof(buffer)) {
+      radio.flush_rx();
+      return;
+    }
+    radio.read(buffer, length);
+    ackLoaded = false;       // That packet's ACK carried the loaded command
+
+    if (buffer[0] & PAYLOAD_FLAG_CONTROL) {
+      if (length == sizeof(ControlMessage)) {
+        ControlMessage reply;
+        memcpy(&reply, buffer, sizeof(reply));
+        printReply(reply);
+      }
+    } else if (length == sizeof(PulsePayload)) {
+      PulsePayload receivedData;
+      memcpy(&receivedData, buffer, sizeof(receivedData));
+      printPulsePayload(receivedData, arrivedUs);
+    }
+  }
+}
+
+// Collects 'C,...' lines from the PC into the command queue
+void readCommands() {
+  while (Serial.available()) {
+    char c = Serial.read();
+    if (c != '\n' && c != '\r') {
+      if (lineLength < sizeof(lineBuffer) - 1) {
+        lineBuffer[lineLength++] = c;
+      }
+      continue;
+    }
+    if (lineLength == 0) {
+      continue;
+    }
+    lineBuffer[lineLength] = '\0';
+    lineLength = 0;
+
+    ControlMessage request;
+    uint8_t status = parseControlLine(lineBuffer, request);
+    if (status == CONTROL_OK && queueCount == COMMAND_QUEUE_SIZE) {
+      status = CONTROL_BUSY;
+    }
+    if (status != CONTROL_OK) {
+      request.status = status;
+      printReply(request);
+      continue;
+    }
+    commandQueue[(queueHead + queueCount) % COMMAND_QUEUE_SIZE] = request;
+    queueCount++;
+  }
+}
+
+void printReply(const ControlMessage &reply) {
+  char line[64];
+  formatControlReply(reply, line, sizeof(line));
+  Serial.println(line);
+}
+
+void printPulsePayload(const PulsePayload &receivedData, uint32_t arrivedUs) {
+  // Frame line: sequence number, transmitter send time, receiver arrival time
+  Serial.print("F,");
+  Serial.print(receivedData.seq);
+  Serial.print(',');
+  Serial.print(receivedData.sentUs);
+  Serial.print(',');
+  Serial.println(arrivedUs);
+
+  // A stopped wheel always reads 0, whatever the last RPM was
+  bool spin = receivedData.flags & PAYLOAD_FLAG_SPIN;
+  Serial.println(spin ? receivedData.rpm : 0.0);
+
+  // Pulse times (transmitter micros()) for the PC-side pulse engine
+  if (receivedData.count > 0) {
+    Serial.print("P,0");
+    for (uint8_t i = 0; i < receivedData.count && i < MAX_BATCH_PULSES; i++) {
+      Serial.print(',');
+      Serial.print(receivedData.pulseUs[i]);
+    }
+    Serial.println();
+  }
+}
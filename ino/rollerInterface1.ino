@@ -1,6 +1,9 @@
 // arduino_simulator_interface.ino
 // Connects Hall Sensor, Joystick (XY), and Rotary Dial to read bike speed,
 // mouse look (XY), and zoom, sending data to Python via Serial.
+// The zoom dial is counted, not sampled: every quadrature step is added to a signed
+// counter (pin change interrupts on the Uno / Nano, fast polling elsewhere), and each
+// packet sends the detents turned since the last one, so a fast spin loses nothing.
 
 // --- PIN DEFINITIONS ---
 const int HALL_SENSOR_PIN = 2; // Digital Pin 2 (must be an interrupt pin)
@@ -17,13 +20,21 @@ float currentRPM = 0.0;
 unsigned long speedTimer = 0;
 
 // --- ROTARY ENCODER VARIABLES (ZOOM DIAL) ---
-int lastZoomState;
-volatile int zoomChange = 0; // +1 for zoom in, -1 for zoom out
+const int STEPS_PER_DETENT = 4;   // Quadrature steps per click (most KY-040 dials: 4; some: 2)
+const unsigned long SEND_INTERVAL_MS = 50;
+volatile uint8_t lastEncoderState = 0;  // (CLK << 1) | DT
+volatile int zoomSteps = 0;             // Signed quadrature steps not sent yet
+unsigned long sendTimer = 0;
+
+// Step for (previous state << 2) | new state: +1 clockwise, -1 counter-clockwise,
+// 0 for no change or an impossible jump (a bounce or a missed step)
+const int8_t QUADRATURE_TABLE[16] = {0, -1, 1, 0, 1, 0, 0, -1, -1, 0, 0, 1, 0, 1, -1, 0};
 
 // --- FUNCTION PROTOTYPE ---
 void handleMagnetPulse();
 void updateRPM();
 void updateZoom();
+int takeZoomDetents();
 
 void setup() {
   Serial.begin(9600);
@@ -35,10 +46,32 @@ void setup() {
   // Set up Rotary Encoder (Zoom Dial)
   pinMode(ROTARY_CLK_PIN, INPUT_PULLUP);
   pinMode(ROTARY_DT_PIN, INPUT_PULLUP);
-  lastZoomState = digitalRead(ROTARY_CLK_PIN);
+  lastEncoderState = (digitalRead(ROTARY_CLK_PIN) << 1) | digitalRead(ROTARY_DT_PIN);
+#if defined(__AVR_ATmega328P__)
+  // Pin change interrupts: D7 is PCINT23 (port D), D8 is PCINT0 (port B)
+  PCMSK2 |= bit(PCINT23);
+  PCMSK0 |= bit(PCINT0);
+  PCIFR |= bit(PCIF2) | bit(PCIF0);
+  PCICR |= bit(PCIE2) | bit(PCIE0);
+#endif
 }
 
+#if defined(__AVR_ATmega328P__)
+ISR(PCINT2_vect) { updateZoom(); }
+ISR(PCINT0_vect) { updateZoom(); }
+#endif
+
 void loop() {
+#if !defined(__AVR_ATmega328P__)
+  updateZoom();   // No pin change interrupts here: poll every loop instead (no delay() below)
+#endif
+
+  // Send every SEND_INTERVAL_MS without blocking, so the dial keeps being read in between
+  if (millis() - sendTimer < SEND_INTERVAL_MS) {
+    return;
+  }
+  sendTimer = millis();
+
   // 1. Update RPM calculation every 50ms for smooth motion control
   if (millis() - speedTimer >= 50) {
     updateRPM();
@@ -54,11 +87,12 @@ void loop() {
   int steerXValue = map(joystickX, 0, 1023, -100, 100); // -100=left, 100=right
   int steerYValue = map(joystickY, 0, 1023, 100, -100); // 100=up, -100=down (reversed for mouse standard)
 
-  // 3. Read Zoom Dial
-  updateZoom();
+  // 3. Zoom Dial: whole detents turned since the last packet (signed)
+  int zoomChange = takeZoomDetents();
 
   // 4. Send Data Packet (RPM, SteerX, SteerY, ZoomChange)
   // The Python script relies on this specific four-part format: R,X,Y,Z\n
+  // ZoomChange is a delta: +3 = three clicks toward zoom in since the last packet
   Serial.print(currentRPM);
   Serial.print(",");
   Serial.print(steerXValue);
@@ -66,11 +100,6 @@ void loop() {
   Serial.print(steerYValue);
   Serial.print(",");
   Serial.println(zoomChange);
-
-  // Reset zoom change after sending
-  zoomChange = 0;
-
-  delay(50); // Send data every 50ms for smooth control
 }
 
 // --- INTERRUPT HANDLER (Called when magnet passes) ---
@@ -96,16 +125,18 @@ void updateRPM() {
 }
 
 // --- ZOOM DIAL DETECTION ---
+// Called from the pin change interrupts (or every loop): adds one quadrature step
 void updateZoom() {
-  int newZoomState = digitalRead(ROTARY_CLK_PIN);
-  if (newZoomState != lastZoomState) {
-    if (digitalRead(ROTARY_DT_PIN) != newZoomState) {
-      // Clockwise (Zoom In)
-      zoomChange = 1;
-    } else {
-      // Counter-Clockwise (Zoom Out)
-      zoomChange = -1;
-    }
-    lastZoomState = newZoomState;
-  }
+  uint8_t state = (digitalRead(ROTARY_CLK_PIN) << 1) | digitalRead(ROTARY_DT_PIN);
+  zoomSteps += QUADRATURE_TABLE[(lastEncoderState << 2) | state];
+  lastEncoderState = state;
+}
+
+// Takes the whole detents counted so far; a part-turned detent stays for the next packet
+int takeZoomDetents() {
+  noInterrupts();
+  int detents = zoomSteps / STEPS_PER_DETENT;
+  zoomSteps -= detents * STEPS_PER_DETENT;
+  interrupts();
+  return detents;
 }
@@ -0,0 +1,232 @@
+# bikeControl.py - Runtime Tuning of the Transmitter
+# Reads and writes the transmitter's settings (thresholds, debounce, transmit policy)
+# while it runs, and stores them in its EEPROM, so a tuning round needs no reflash.
+#
+# The PC writes text commands to the Receiver, which relays them over the radio
+# (ino/PulseCore/ControlProtocol.h); the answers come back between the RPM lines:
+#   C,<id>,GET,<name>          ->  A,<id>,OK,<name>,<value>
+#   C,<id>,SET,<name>,<value>  ->  A,<id>,OK,<name>,<value>   or  A,<id>,ERR,<reason>
+#   C,<id>,SAVE                ->  A,<id>,OK
+#   C,<id>,DEFAULTS            ->  A,<id>,OK
+#
+# ControlClient keeps several requests in flight at once (the Receiver queues them), matches
+# the answers by id, and retries (with back-off) a request whose answer did not come back in
+# time. A retry has the same id, so the transmitter answers it again without applying it twice.
+# Every request returns a concurrent.futures.Future.
+
+import time
+from collections import deque
+from concurrent.futures import Future
+
+# --- PARAMETERS (MUST MATCH CONTROL_PARAMS in ControlProtocol.cpp) ---
+# name: (min, max)
+PARAMS = {
+    'trigger_level': (0, 1023),
+    'rearm_level': (0, 1023),
+    'debounce_us': (0, 1000000),
+    'stop_timeout_us': (50000, 5000000),
+    'magnets': (1, 16),
+    'batch_interval_us': (0, 1000000),
+    'max_batch_delay_us': (1000, 1000000),
+    'active_heartbeat_us': (10000, 10000000),
+    'idle_heartbeat_us': (10000, 10000000),
+    'state_repeat_us': (1000, 1000000),
+    'state_repeats': (0, 10),
+}
+
+# --- CONFIGURATION ---
+REQUEST_TIMEOUT_SECONDS = 3.0   # The transmitter picks up a command with its next packet (<= 1 s idle)
+REQUEST_RETRIES = 3             # Resends before a request fails with ControlTimeout
+MAX_IN_FLIGHT = 8               # Requests sent but not answered (= the Receiver queue)
+BUSY_RETRY_SECONDS = 0.5        # Wait after a 'busy' answer before sending the request again
+
+
+class ControlError(Exception):
+    """The transmitter or Receiver rejected a request (bad_value, bad_param, busy, ...)."""
+
+
+class ControlTimeout(ControlError):
+    """No answer after all retries."""
+
+
+def check_value(name, value, settings=None):
+    """
+    Checks a SET before it is sent. Returns None when fine, else the reason the
+    transmitter would give ('bad_param' / 'bad_value'). With the current settings,
+    also checks that the re-arm level stays at or below the trigger level.
+    """
+    if name not in PARAMS:
+        return 'bad_param'
+    low, high = PARAMS[name]
+    if not low <= value <= high:
+        return 'bad_value'
+    if settings is not None:
+        if name == 'trigger_level' and value < settings['rearm_level']:
+            return 'bad_value'
+        if name == 'rearm_level' and value > settings['trigger_level']:
+            return 'bad_value'
+    return None
+
+
+def parse_reply_line(line):
+    """
+    Parses 'A,<id>,OK[,<name>,<value>]' or 'A,<id>,ERR,<reason>'.
+    Returns (id, ok, name, value) - for ERR, name is the reason and value None - or None.
+    """
+    if not line.startswith('A,'):
+        return None
+    parts = line.split(',')
+    try:
+        request_id = int(parts[1])
+    except (IndexError, ValueError):
+        return None
+    if len(parts) == 3 and parts[2] == 'OK':
+        return request_id, True, None, None
+    if len(parts) == 5 and parts[2] == 'OK':
+        try:
+            return request_id, True, parts[3], int(parts[4])
+        except ValueError:
+            return None
+    if len(parts) == 4 and parts[2] == 'ERR':
+        return request_id, False, parts[3], None
+    return None
+
+
+class _Request:
+    __slots__ = ('line', 'future', 'deadline', 'tries')
+
+    def __init__(self, line, future):
+        self.line = line
+        self.future = future
+        self.deadline = None       # Resend (or fail) when no answer came by then
+        self.tries = 0
+
+
+class ControlClient:
+    """
+    Request / response over the Receiver's serial port.
+
+    :param write: callable that writes bytes to the port (e.g. ser.write).
+    Feed every line read from the port to feed_line() and call poll() regularly,
+    or use wait() when nothing else reads the port.
+    """
+
+    def __init__(self, write, timeout=REQUEST_TIMEOUT_SECONDS, retries=REQUEST_RETRIES,
+                 max_in_flight=MAX_IN_FLIGHT, clock=time.monotonic):
+        self.write = write
+        self.timeout = timeout
+        self.retries = retries
+        self.max_in_flight = max_in_flight
+        self.clock = clock
+        self.in_flight = {}        # id -> _Request
+        self.queue = deque()       # (_Request, id) not sent yet
+        self.next_id = 1
+        self.retried = 0
+
+    def _take_id(self):
+        reserved = set(self.in_flight) | {request_id for _, request_id in self.queue}
+        for _ in range(255):
+            request_id = self.next_id
+            self.next_id = self.next_id % 255 + 1
+            if request_id not in reserved:
+                return request_id
+        raise ControlError("more than 255 requests pending")
+
+    def request(self, op, name=None, value=None):
+        """Queues 'C,<id>,<op>[,<name>[,<value>]]' and returns a Future for the answer."""
+        if name is not None and name not in PARAMS:
+            raise ValueError(f"unknown parameter {name!r} (known: {', '.join(PARAMS)})")
+        request_id = self._take_id()
+        fields = [f"C,{request_id},{op}"]
+        if name is not None:
+            fields.append(name)
+        if value is not None:
+            fields.append(str(int(value)))
+        req = _Request(','.join(fields) + '\n', Future())
+        self.queue.append((req, request_id))
+        self.poll()
+        return req.future
+
+    def get(self, name):
+        """Future for the current value of a parameter."""
+        return self.request('GET', name)
+
+    def set(self, name, value):
+        """Future for the value after the change (ControlError when rejected)."""
+        reason = check_value(name, value)
+        if reason is not None:
+            low, high = PARAMS.get(name, (None, None))
+            raise ValueError(f"{name}={value}: {reason} (range {low}..{high})")
+        return self.request('SET', name, value)
+
+    def save(self):
+        """Future that completes once the settings are in the transmitter's EEPROM."""
+        return self.request('SAVE')
+
+    def defaults(self):
+        """Future that completes once the sketch's compiled-in settings are back."""
+        return self.request('DEFAULTS')
+
+    @property
+    def pending(self):
+        return len(self.in_flight) + len(self.queue)
+
+    def _send(self, req):
+        req.tries += 1
+        # Back off: every retry waits one timeout longer, so retries do not clog the queue
+        req.deadline = self.clock() + self.timeout * req.tries
+        self.write(req.line.encode('ascii'))
+
+    def poll(self):
+        """Sends queued requests as slots free up and retries or fails overdue ones."""
+        now = self.clock()
+        for request_id, req in list(self.in_flight.items()):
+            if now < req.deadline:
+                continue
+            if req.tries > self.retries:
+                del self.in_flight[request_id]
+                req.future.set_exception(ControlTimeout(f"no answer to {req.line.strip()}"))
+            else:
+                self.retried += 1
+                self._send(req)
+        while self.queue and len(self.in_flight) < self.max_in_flight:
+            req, request_id = self.queue.popleft()
+            self.in_flight[request_id] = req
+            self._send(req)
+
+    def feed_line(self, line):
+        """Handles one line from the port. Returns True if it was an answer (not an RPM line etc.)."""
+        reply = parse_reply_line(line)
+        if reply is None:
+            return False
+        request_id, ok, name, value = reply
+        req = self.in_flight.pop(request_id, None)
+        if req is not None:
+            if not ok and name == 'busy':
+                # The Receiver's queue was full, nothing was lost: send it again (not counted
+                # as a retry) once the queue had time to drain
+                self.in_flight[request_id] = req
+                req.tries -= 1
+                req.deadline = self.clock() + BUSY_RETRY_SECONDS
+                return True
+            if ok:
+                req.future.set_result(value)
+            else:
+                req.future.set_exception(ControlError(f"{req.line.strip()}: {name}"))
+            self.poll()
+        return True
+
+    def wait(self, futures, readline):
+        """
+        Reads lines with readline() (which should return within ~0.1 s) until every future
+        is done, then returns their results in order (raises the first ControlError).
+        """
+        futures = list(futures)
+        while not all(f.done() for f in futures):
+            line = readline()
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', errors='replace')
+            if line:
+                self.feed_line(line.strip())
+            self.poll()
+        return [f.result() for f in futures]
@@ -0,0 +1,93 @@
+# bridgeEvents.py - Input Events for the Bridge's Main Loop
+# The keyboard listener, the hotkey device and any other input thread do not change the
+# bridge's state (is_moving, is_motion_enabled, held keys) themselves: they post an event
+# and the main loop, the only owner of that state, applies the events in the order they
+# were posted. A toggle can then never release the step key while the main loop is about to
+# press it, and no key is left stuck by two threads disagreeing about is_moving.
+#
+# - Event: an immutable (kind, value, time) tuple.
+# - EventQueue: bounded (EVENT_CAPACITY; further events are dropped and counted). Posting
+#   is a deque append, atomic in CPython, so an input thread never waits on a lock held by
+#   the main loop. The main loop can sleep on it and wakes as soon as something is posted.
+# - The time from posting to applying is kept for the last LATENCY_SAMPLES events, so the
+#   summary shows what an input costs (median, 99th percentile, worst).
+
+import threading
+import time
+from collections import deque, namedtuple
+
+# --- CONFIGURATION ---
+EVENT_CAPACITY = 256            # Queued events at most (a rider cannot press keys this fast)
+LATENCY_SAMPLES = 1000          # Post-to-apply times kept for the summary
+
+Event = namedtuple('Event', 'kind value time')
+
+
+class EventQueue:
+    """Bounded many-producer / one-consumer event queue."""
+
+    def __init__(self, capacity=EVENT_CAPACITY):
+        self.capacity = capacity
+        self.events = deque()
+        self.ready = threading.Event()
+        self.posted = 0
+        self.dropped = 0
+        self.applied = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def post(self, kind, value=None):
+        """Queues an event from any thread. Returns False if the queue was full."""
+        if len(self.events) >= self.capacity:
+            self.dropped += 1
+            return False
+        self.events.append(Event(kind, value, time.perf_counter()))
+        self.posted += 1
+        self.ready.set()
+        return True
+
+    def wait(self, timeout):
+        """Sleeps until an event is posted or timeout seconds passed. True if there are events."""
+        if not self.events:
+            self.ready.wait(timeout)
+        self.ready.clear()
+        return bool(self.events)
+
+    def drain(self, handle):
+        """Applies every queued event with handle(event), in posting order. Only the owner calls this."""
+        count = 0
+        while True:
+            try:
+                event = self.events.popleft()
+            except IndexError:
+                break
+            handle(event)
+            self.latencies.append(time.perf_counter() - event.time)
+            count += 1
+        self.applied += count
+        return count
+
+    def sleep(self, seconds, handle):
+        """time.sleep() for the owner's loop, applying events as they arrive instead of after it."""
+        deadline = time.perf_counter() + seconds
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            if self.wait(remaining):
+                self.drain(handle)
+
+    def latency_ms(self, fraction):
+        """Post-to-apply time (ms) that this fraction of recent events stayed within."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000.0
+
+    def summary(self):
+        text = f"EVENTS: {self.applied} applied"
+        if self.latencies:
+            text += (f", latency median {self.latency_ms(0.5):.2f} ms, 99% {self.latency_ms(0.99):.2f} ms, "
+                     f"max {max(self.latencies) * 1000.0:.2f} ms")
+        if self.dropped:
+            text += f", {self.dropped} dropped (queue full)"
+        return text
@@ -0,0 +1,118 @@
+# bridgeLog.py - Console Messages Off the Input Path
+# print() writes to the console before it returns, and a Windows console or a slow terminal
+# can take milliseconds to do that - in the middle of pressing or releasing a key. BridgeLog
+# takes the writing out of the input path:
+#
+# - write() only appends a record (time, text, arguments) to a bounded ring: no formatting,
+#   no I/O and no lock. When the ring is full the oldest record goes and is counted.
+# - A background thread formats the records and writes them every LOG_FLUSH_SECONDS, all
+#   at once.
+# - Each message text (before formatting) may be written LOG_RATE times per second on
+#   average, with bursts of LOG_BURST. Beyond that only every LOG_SAMPLE_EVERY-th record is
+#   kept, marked with how many like it were left out.
+# - At most LOG_MAX_BUCKETS message texts are tracked; past that the rate state starts over,
+#   so text that was formatted before write() cannot grow it for the whole session. Pass a
+#   template and its arguments instead, so the rate limit applies.
+# - summary() says how many records were written, left out by the rate limit and dropped.
+#
+#   log = BridgeLog().start()
+#   log.write("ACTION: UP ARROW PRESSED ({})", reason)   # Formatted later, on the log thread
+
+import sys
+import threading
+import time
+from collections import deque
+
+# --- CONFIGURATION ---
+LOG_CAPACITY = 1024             # Records waiting to be written at most
+LOG_FLUSH_SECONDS = 0.05        # How often the log thread writes
+LOG_RATE = 20.0                 # Records per second per message text, on average...
+LOG_BURST = 40                  # ...and at once
+LOG_SAMPLE_EVERY = 50           # Over the rate: keep one record in this many
+LOG_MAX_BUCKETS = 256           # Message texts rate-limited at once
+
+
+class BridgeLog:
+    """Bounded, rate-limited console log written by a background thread."""
+
+    def __init__(self, capacity=LOG_CAPACITY, rate=LOG_RATE, burst=LOG_BURST,
+                 sample_every=LOG_SAMPLE_EVERY, stream=None, max_buckets=LOG_MAX_BUCKETS):
+        self.capacity = capacity
+        self.max_buckets = max_buckets
+        self.rate = rate
+        self.burst = burst
+        self.sample_every = sample_every
+        self.stream = stream            # None: sys.stdout at the time of writing
+        self.ring = deque(maxlen=capacity)
+        self.buckets = {}               # Message text -> [tokens, last time, left out since last kept]
+        self.logged = 0
+        self.written = 0
+        self.suppressed = 0
+        self.dropped = 0
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def write(self, text, *args):
+        """Queues a message; text.format(*args) is done on the log thread. Never blocks."""
+        now = time.perf_counter()
+        # Shared by the threads that log: a race costs at most a token, never a lock
+        bucket = self.buckets.get(text)
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self.buckets.clear()    # Pre-formatted texts: start over rather than grow
+            bucket = self.buckets[text] = [float(self.burst), now, 0]
+        bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        left_out = 0
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+        else:
+            bucket[2] += 1
+            if bucket[2] % self.sample_every:
+                self.suppressed += 1
+                return
+            left_out, bucket[2] = bucket[2] - 1, 0
+        if len(self.ring) == self.capacity:
+            self.dropped += 1           # The append below pushes out the oldest
+        self.ring.append((now, text, args, left_out))
+        self.logged += 1
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Writes what is still queued and stops the log thread."""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.flush()
+
+    def _run(self):
+        while not self.stopping.wait(LOG_FLUSH_SECONDS):
+            self.flush()
+
+    def flush(self):
+        lines = []
+        while True:
+            try:
+                _, text, args, left_out = self.ring.popleft()
+            except IndexError:
+                break
+            try:
+                line = text.format(*args) if args else text
+            except (IndexError, KeyError, ValueError):
+                line = f"{text} {args}"
+            if left_out:
+                line += f" (+{left_out} like it not shown)"
+            lines.append(line)
+        if lines:
+            stream = self.stream or sys.stdout
+            stream.write('\n'.join(lines) + '\n')
+            stream.flush()
+            self.written += len(lines)
+
+    def summary(self):
+        return (f"LOG: {self.written} messages written, {self.suppressed} left out by the rate limit, "
+                f"{self.dropped} dropped (queue full)")
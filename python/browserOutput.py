@@ -0,0 +1,188 @@
+# browserOutput.py - Drive the Street View Page Directly over a WebSocket
+# Synthesized keys and mouse moves only work while the browser window has focus, and the
+# view can only be turned by relative mouse moves. With --browser the bridge instead sends
+# small commands to streetView.html, which calls the panorama's setPov / setZoom / setPano
+# itself. The bridge serves the page too: open http://localhost:8765/?key=YOUR_MAPS_API_KEY
+#
+# Messages (JSON, zero fields left out):
+#   bridge -> page   {"q": seq, "h": +heading deg, "p": +pitch deg, "z": +zoom notches,
+#                     "n": steps, "u": 1/0 = step key held / released}
+#   page -> bridge   {"a": last seq applied, "h": heading, "pano": id}
+# Everything asked for within one frame (FRAME_SECONDS) goes out as one message, and the page
+# applies whatever arrived since its last animation frame in one go. The page acknowledges
+# each frame it applied, and the time from sending to that acknowledgement is the round trip.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from webSocket import WebSocketServer
+
+# --- CONFIGURATION ---
+BROWSER_HOST = '127.0.0.1'      # Only this PC can connect
+BROWSER_PORT = 8765             # Must match the port in the page's address
+FRAME_SECONDS = 1.0 / 60        # At most one message per display frame
+RTT_HISTORY = 200               # Round trips kept for the summary
+
+PAGE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'streetView.html')
+
+
+class BrowserOutput:
+    """
+    Output target for the bridge: look / zoom / step / hold instead of mouse and keyboard.
+    Calls only accumulate; a sender thread sends at most one coalesced message per frame.
+    """
+
+    def __init__(self, pixels_per_degree, host=BROWSER_HOST, port=BROWSER_PORT, frame_seconds=FRAME_SECONDS):
+        self.pixels_per_degree = pixels_per_degree
+        self.frame_seconds = frame_seconds
+        self.cond = threading.Condition()
+        self.heading = self.pitch = 0.0     # Not sent yet
+        self.zooms = self.steps = 0
+        self.held = False
+        self.sent_held = False
+        self.seq = 0
+        self.sent_times = deque()           # (seq, perf_counter) awaiting acknowledgement
+        self.rtts = deque(maxlen=RTT_HISTORY)
+        self.calls = 0                      # look / zoom / step / hold calls
+        self.messages = 0                   # Messages actually sent
+        self.page_heading = None            # Last heading the page reported
+        self.pano = None
+        self.running = False
+        self.server = WebSocketServer(host, port, on_message=self._on_message, on_connect=self._on_connect,
+                                      files={'/': PAGE_FILE, '/streetView.html': PAGE_FILE})
+        self.port = self.server.port
+
+    def start(self):
+        self.running = True
+        self.server.start()
+        threading.Thread(target=self._send_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify()
+        self.server.stop()
+
+    @property
+    def connected(self):
+        return bool(self.server.connections())
+
+    # --- Commands from the bridge (any thread) ---
+
+    def look(self, move_x, move_y):
+        """Turns the view by mouse-look pixels, converted with pixels_per_degree."""
+        if not move_x and not move_y:
+            return
+        with self.cond:
+            self.heading += move_x / self.pixels_per_degree
+            self.pitch -= move_y / self.pixels_per_degree
+            self.calls += 1
+            self.cond.notify()
+
+    def zoom(self, notches):
+        if not notches:
+            return
+        with self.cond:
+            self.zooms += notches
+            self.calls += 1
+            self.cond.notify()
+
+    def step(self):
+        """One step forward (a tap of the Up key)."""
+        with self.cond:
+            self.steps += 1
+            self.calls += 1
+            self.cond.notify()
+
+    def hold(self, held):
+        """Up key held: the page keeps stepping as fast as panoramas load."""
+        with self.cond:
+            if held != self.held:
+                self.held = held
+                self.calls += 1
+                self.cond.notify()
+
+    # --- Sending ---
+
+    def _take_message(self):
+        # Called with the lock held; returns the coalesced message or None
+        message = {}
+        if self.heading:
+            message['h'] = round(self.heading, 2)
+        if self.pitch:
+            message['p'] = round(self.pitch, 2)
+        if self.zooms:
+            message['z'] = self.zooms
+        if self.steps:
+            message['n'] = self.steps
+        if self.held != self.sent_held:
+            message['u'] = int(self.held)
+        if not message:
+            return None
+        self.seq += 1
+        message['q'] = self.seq
+        self.heading = self.pitch = 0.0
+        self.zooms = self.steps = 0
+        self.sent_held = self.held
+        return message
+
+    def _send_loop(self):
+        last_send = 0.0
+        while True:
+            with self.cond:
+                # Without a page, commands keep accumulating until one connects (_on_connect)
+                while self.running and not (self._has_pending() and self.server.connections()):
+                    self.cond.wait()
+                if not self.running:
+                    return
+            # Let a frame's worth of commands pile up, then send them as one message
+            time.sleep(max(0.0, last_send + self.frame_seconds - time.perf_counter()))
+            with self.cond:
+                message = self._take_message()
+            if message is None:
+                continue
+            last_send = time.perf_counter()
+            if self.server.broadcast_text(json.dumps(message, separators=(',', ':'))):
+                self.messages += 1
+                self.sent_times.append((message['q'], last_send))
+
+    def _has_pending(self):
+        return bool(self.heading or self.pitch or self.zooms or self.steps or self.held != self.sent_held)
+
+    # --- Acknowledgements from the page ---
+
+    def _on_connect(self, connection):
+        with self.cond:
+            self.sent_held = False      # A fresh page holds nothing: resend the hold state
+            self.sent_times.clear()     # Messages to an earlier page will never be acknowledged
+            self.cond.notify()
+
+    def _on_message(self, connection, text):
+        now = time.perf_counter()
+        try:
+            reply = json.loads(text)
+            acked = int(reply['a'])
+        except (ValueError, KeyError, TypeError):
+            return
+        # The page acknowledges the last message of a frame: everything up to it has arrived
+        while self.sent_times and self.sent_times[0][0] <= acked:
+            seq, sent = self.sent_times.popleft()
+            if seq == acked:
+                self.rtts.append(now - sent)
+        self.page_heading = reply.get('h', self.page_heading)
+        self.pano = reply.get('pano', self.pano)
+
+    def summary(self):
+        """One line for the console."""
+        text = f"BROWSER: {self.messages} messages for {self.calls} commands"
+        rtts = sorted(self.rtts)
+        if rtts:
+            text += (f", round trip {rtts[len(rtts) // 2] * 1000:.1f} ms median"
+                     f" / {rtts[min(len(rtts) - 1, int(len(rtts) * 0.95))] * 1000:.1f} ms p95")
+        if not self.connected:
+            text += f" | page not connected (open http://localhost:{self.port}/)"
+        return text
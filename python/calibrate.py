@@ -0,0 +1,186 @@
+# calibrate.py - Hall Sensor Threshold Calibration
+# Proposes MAGNET_THRESHOLD (plus a hysteresis band) for the transmitter sketches
+# from their debug output:
+#   Analog Reading (A0): 512 | Current RPM: 0.00
+#   Analog Reading (A0): 512 | Is Spinning State: 0
+#
+# The text is parsed in large chunks with one regex pass per chunk straight into
+# NumPy arrays, so captures with millions of lines take seconds.
+# The two signal modes (no magnet / magnet passing) are split with Otsu's method
+# on the 10-bit ADC histogram.
+
+import re
+import math
+import time
+import numpy as np
+
+# --- CONFIGURATION ---
+ADC_LEVELS = 1024               # Arduino analogRead() is 10-bit
+CHUNK_BYTES = 4 * 1024 * 1024   # Read captures in 4 MB chunks
+NOISE_SIGMAS = 5.0              # Trigger level sits at least this many noise sigmas above the idle level
+HYSTERESIS_FRACTION = 0.5       # Re-arm level: this fraction of the way back from trigger to idle
+MIN_SAMPLES = 100
+
+READING_PATTERN = re.compile(rb'Analog Reading \(A0\): (-?\d+)')
+
+
+def parse_chunk(data):
+    """Returns the analog readings found in a chunk of bytes as an int16 array."""
+    values = READING_PATTERN.findall(data)
+    if not values:
+        return np.zeros(0, dtype=np.int16)
+    return np.array(values).astype(np.int16)
+
+
+def _stream_chunks(read, sink):
+    """
+    Feeds chunks from 'read()' through the parser, carrying a partial last line
+    over to the next chunk so a reading split across two reads is not lost.
+    """
+    tail = b''
+    while True:
+        data = read()
+        if data is None:
+            break
+        if not data:
+            continue
+        data = tail + data
+        cut = data.rfind(b'\n') + 1
+        tail = data[cut:]
+        if cut:
+            sink(parse_chunk(data[:cut]))
+    if tail:
+        sink(parse_chunk(tail))
+
+
+def read_capture(path):
+    """Parses a capture file; returns (readings, seconds_per_sample or None)."""
+    parts = []
+    with open(path, 'rb') as f:
+        def read():
+            data = f.read(CHUNK_BYTES)
+            return data if data else None
+        _stream_chunks(read, parts.append)
+    return (np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)), None
+
+
+def read_serial(port, baud, seconds):
+    """Streams debug output from the transmitter for 'seconds'; returns (readings, seconds_per_sample)."""
+    import serial
+
+    parts = []
+    ser = serial.Serial(port, baud, timeout=0.1)
+    ser.reset_input_buffer()
+    start = time.perf_counter()
+    try:
+        def read():
+            if time.perf_counter() - start > seconds:
+                return None
+            return ser.read(max(ser.in_waiting, 1))
+        _stream_chunks(read, parts.append)
+    finally:
+        ser.close()
+    elapsed = time.perf_counter() - start
+    readings = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+    return readings, (elapsed / readings.size if readings.size else None)
+
+
+def otsu_threshold(histogram):
+    """Otsu's threshold on a histogram: the level that maximizes between-class variance."""
+    levels = np.arange(histogram.size, dtype=np.float64)
+    weight = np.cumsum(histogram, dtype=np.float64)
+    total = weight[-1]
+    mass = np.cumsum(histogram * levels)
+    w0 = weight[:-1]
+    w1 = total - w0
+    valid = (w0 > 0) & (w1 > 0)
+    mu0 = np.divide(mass[:-1], w0, out=np.zeros_like(w0), where=valid)
+    mu1 = np.divide(mass[-1] - mass[:-1], w1, out=np.zeros_like(w1), where=valid)
+    between = np.where(valid, w0 * w1 * (mu0 - mu1) ** 2, -1.0)
+    # An empty gap between the modes gives a plateau of equal scores: take its centre.
+    # Values <= t are class 0; return the first level of class 1
+    best = np.flatnonzero(between >= between.max() * (1.0 - 1e-9))
+    return int(best[0] + best[-1]) // 2 + 1
+
+
+def _tail_probability(z):
+    """P(X > mean + z * sigma) for a normal distribution."""
+    return 0.5 * math.erfc(z / math.sqrt(2.0))
+
+
+def propose_threshold(readings, seconds_per_sample=None):
+    """
+    Finds the idle and magnet modes and proposes a trigger level and a re-arm level.
+
+    :return: dict with the proposal and the statistics behind it.
+    """
+    readings = np.asarray(readings)
+    if readings.size < MIN_SAMPLES:
+        raise ValueError(f"Need at least {MIN_SAMPLES} readings, got {readings.size}.")
+
+    histogram = np.bincount(np.clip(readings, 0, ADC_LEVELS - 1), minlength=ADC_LEVELS)
+    split = otsu_threshold(histogram)
+    levels = np.arange(ADC_LEVELS)
+
+    low_hist, high_hist = histogram[:split], histogram[split:]
+    low_n, high_n = low_hist.sum(), high_hist.sum()
+    if low_n == 0 or high_n == 0:
+        raise ValueError("Only one signal level found. Spin the wheel while capturing.")
+
+    low_mean = float(np.dot(low_hist, levels[:split]) / low_n)
+    high_mean = float(np.dot(high_hist, levels[split:]) / high_n)
+    low_std = float(np.sqrt(np.dot(low_hist, (levels[:split] - low_mean) ** 2) / low_n))
+    high_std = float(np.sqrt(np.dot(high_hist, (levels[split:] - high_mean) ** 2) / high_n))
+
+    # The magnet is only near the sensor for a short part of each revolution: the bigger mode is idle
+    magnet_above = high_n < low_n
+    if magnet_above:
+        idle_mean, idle_std, magnet_mean = low_mean, low_std, high_mean
+    else:
+        idle_mean, idle_std, magnet_mean = high_mean, high_std, low_mean
+    direction = 1.0 if magnet_above else -1.0
+    noise = max(idle_std, 1.0)
+
+    # Trigger: halfway between the two modes (equal margin against noise and weak passes),
+    # but at least at the Otsu split and NOISE_SIGMAS of noise away from idle,
+    # and never past the magnet level itself
+    midpoint = (idle_mean + magnet_mean) * 0.5
+    trigger = max(direction * split, direction * midpoint, direction * idle_mean + NOISE_SIGMAS * noise)
+    trigger = direction * min(trigger, direction * magnet_mean - noise)
+    rearm = trigger - direction * HYSTERESIS_FRACTION * abs(trigger - idle_mean)
+
+    # False triggers: chance that idle noise alone reaches the trigger (Gaussian tail)
+    false_rate = _tail_probability(abs(trigger - idle_mean) / noise)
+
+    result = {
+        'samples': int(readings.size),
+        'otsu_split': split,
+        'idle_mean': idle_mean,
+        'idle_std': idle_std,
+        'magnet_mean': magnet_mean,
+        'magnet_above_idle': magnet_above,
+        'threshold': int(round(trigger)),
+        'rearm': int(round(rearm)),
+        'false_trigger_per_sample': false_rate,
+        'false_triggers_per_hour': None,
+    }
+    if seconds_per_sample:
+        result['false_triggers_per_hour'] = result['false_trigger_per_sample'] * 3600.0 / seconds_per_sample
+    return result
+
+
+def print_proposal(r):
+    print("--- HALL SENSOR CALIBRATION ---")
+    print(f"Readings:            {r['samples']}")
+    print(f"Idle level:          {r['idle_mean']:.1f} (noise sigma {r['idle_std']:.2f})")
+    print(f"Magnet level:        {r['magnet_mean']:.1f}")
+    print(f"Otsu split:          {r['otsu_split']}")
+    print(f"Proposed MAGNET_THRESHOLD = {r['threshold']}  (RAW_TRIGGER_LEVEL in rawSamples.py)")
+    print(f"Proposed re-arm level      = {r['rearm']}  (RAW_REARM_LEVEL, hysteresis band {abs(r['threshold'] - r['rearm'])})")
+    rate = f"{r['false_trigger_per_sample']:.2e} per sample"
+    if r['false_triggers_per_hour'] is not None:
+        rate += f", ~{r['false_triggers_per_hour']:.2f} per hour"
+    print(f"Estimated false triggers:  {rate}")
+    if not r['magnet_above_idle']:
+        print("NOTE: The reading DROPS when the magnet passes (magnet pole facing the other way).")
+        print("      Flip the magnet, or change 'analogReading > MAGNET_THRESHOLD' to '<' in the sketch.")
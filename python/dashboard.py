@@ -0,0 +1,223 @@
+# dashboard.py - Live Terminal Dashboard
+# With --dashboard the bridge shows one screen that updates in place instead of scrolling
+# status lines: cadence and speed with sparklines of the last minutes, power, distance, Up key
+# and motion state, watchdog, input and loop rates, parse errors and latency percentiles, and
+# the last few messages (the bridge log writes into it, bridgeLog.py).
+#
+# - The main loop only stores numbers (set(), tick()); it never draws.
+# - A background thread draws at most DASHBOARD_FPS times a second and only rewrites the
+#   lines that changed (ANSI cursor moves), so a still screen costs next to nothing.
+# - History lives in fixed-size rings (HistoryRing), sampled every SAMPLE_SECONDS: an
+#   hours-long ride uses the same memory as a minute.
+#
+#   python dashboard.py       (a demo with made-up numbers)
+
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# --- CONFIGURATION ---
+DASHBOARD_FPS = 4.0             # Redraws per second at most
+SAMPLE_SECONDS = 2.0            # Sparkline resolution
+SPARK_WIDTH = 60                # Sparkline samples shown (SPARK_WIDTH x SAMPLE_SECONDS of history)
+LOOP_SAMPLES = 512              # Loop times kept for the percentiles
+MESSAGE_LINES = 8               # Last log messages shown
+SPARK_BLOCKS = '▁▂▃▄▅▆▇█'
+SPARK_ASCII = '_.-:=+*#'        # For consoles that cannot show the blocks
+
+
+class HistoryRing:
+    """The last 'capacity' values in a fixed numpy array."""
+
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity)
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.count % len(self.data)] = value
+        self.count += 1
+
+    def values(self):
+        """Oldest first."""
+        n = len(self.data)
+        if self.count <= n:
+            return self.data[:self.count]
+        start = self.count % n
+        return np.concatenate((self.data[start:], self.data[:start]))
+
+
+def sparkline(values, width, blocks=SPARK_BLOCKS, top=None):
+    """The last 'width' values as one character each, scaled from 0 to top (default: their maximum)."""
+    values = values[-width:]
+    if len(values) == 0:
+        return ''
+    top = top if top is not None else max(float(values.max()), 1e-9)
+    levels = np.clip((values / top * (len(blocks) - 1)).round(), 0, len(blocks) - 1).astype(int)
+    return ''.join(blocks[i] for i in levels)
+
+
+def _can_encode(text, stream):
+    try:
+        text.encode(getattr(stream, 'encoding', None) or 'ascii')
+        return True
+    except (UnicodeEncodeError, LookupError):
+        return False
+
+
+class Dashboard:
+    """Bridge state on one self-updating terminal screen. Also a file-like sink for BridgeLog."""
+
+    def __init__(self, stream=None, fps=DASHBOARD_FPS):
+        self.stream = stream or sys.stdout
+        self.interval = 1.0 / fps
+        self.values = {'rpm': 0.0, 'speed': 0.0, 'power': 0.0, 'distance': 0.0, 'moving': False, 'motion': True,
+                       'stalled': False, 'frames': 0, 'parse_errors': 0}
+        self.latency = None             # Object with latency_ms(fraction) (bridgeEvents.EventQueue)
+        self.rpm_history = HistoryRing(SPARK_WIDTH)
+        self.speed_history = HistoryRing(SPARK_WIDTH)
+        self.loop_times = HistoryRing(LOOP_SAMPLES)
+        self.messages = deque(maxlen=MESSAGE_LINES)
+        self.blocks = SPARK_BLOCKS if _can_encode(SPARK_BLOCKS, self.stream) else SPARK_ASCII
+        self.shown = []                 # Lines on screen now
+        self.start_time = time.perf_counter()
+        self.loops = 0
+        self.redraws = 0
+        self.lines_written = 0
+        self.stopping = threading.Event()
+        self.thread = None
+
+    # --- Main loop side: store only ---
+
+    def set(self, **values):
+        self.values.update(values)
+
+    def tick(self, loop_seconds):
+        self.loops += 1
+        self.loop_times.append(loop_seconds)
+
+    def write(self, text):
+        """BridgeLog writes its messages here instead of the console."""
+        for line in text.splitlines():
+            if line:
+                self.messages.append(line)
+
+    def flush(self):
+        pass
+
+    # --- Drawing thread ---
+
+    def start(self):
+        if os.name == 'nt':
+            os.system('')               # Turns on ANSI escape codes in the Windows console
+        self.stream.write('\x1b[?25l\x1b[2J')   # Hide the cursor, clear the screen
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stops drawing and leaves the cursor below the dashboard for the exit summary."""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.stream.write(f'\x1b[{len(self.shown) + 1};1H\x1b[?25h\n')
+        self.stream.flush()
+
+    def _run(self):
+        last_sample = 0.0
+        last = (time.perf_counter(), 0, 0)
+        rates = (0.0, 0.0)
+        while not self.stopping.wait(self.interval):
+            now = time.perf_counter()
+            if now - last_sample >= SAMPLE_SECONDS:
+                last_sample = now
+                self.rpm_history.append(self.values['rpm'])
+                self.speed_history.append(self.values['speed'])
+                seconds = now - last[0]
+                rates = ((self.loops - last[1]) / seconds, (self.values['frames'] - last[2]) / seconds)
+                last = (now, self.loops, self.values['frames'])
+            self.draw(self.render(now, *rates))
+
+    def render(self, now, loop_rate, frame_rate):
+        """The dashboard as a list of lines."""
+        v = self.values
+        elapsed = int(now - self.start_time)
+        spark_top = max(1.0, float(self.rpm_history.values().max()) if self.rpm_history.count else 1.0)
+        lines = [
+            f" ROLLER BRIDGE   {elapsed // 3600}:{elapsed // 60 % 60:02d}:{elapsed % 60:02d}",
+            "",
+            f" Cadence  {v['rpm']:6.0f} rpm   {sparkline(self.rpm_history.values(), SPARK_WIDTH, self.blocks, spark_top)}",
+            f" Speed    {v['speed'] * 3.6:6.1f} km/h  {sparkline(self.speed_history.values(), SPARK_WIDTH, self.blocks)}",
+            f" Power    {v['power']:6.0f} W",
+            f" Distance {v['distance'] / 1000.0:6.2f} km",
+            "",
+            f" Motion {'ENABLED ' if v['motion'] else 'DISABLED'}   Up key {'HELD' if v['moving'] else 'up  '}"
+            f"   Watchdog {'STALLED' if v['stalled'] else 'ok'}",
+        ]
+        loop_ms = self.loop_times.values() * 1000.0
+        loop_text = (f"p50 {np.percentile(loop_ms, 50):.1f} ms  p99 {np.percentile(loop_ms, 99):.1f} ms"
+                     if len(loop_ms) else "")
+        lines.append(f" Loop {loop_rate:6.1f} Hz  {loop_text}")
+        lines.append(f" Input {frame_rate:5.1f} frames/s   parse errors {v['parse_errors']}")
+        if self.latency is not None:
+            lines.append(f" Input to action  p50 {self.latency.latency_ms(0.5):.2f} ms  "
+                         f"p99 {self.latency.latency_ms(0.99):.2f} ms")
+        lines.append("")
+        lines.append(" Messages:")
+        messages = list(self.messages)  # One step under the GIL: the log thread may be adding
+        lines.extend(f"  {m}" for m in messages)
+        lines.extend([""] * (MESSAGE_LINES - len(messages)))
+        return lines
+
+    def draw(self, lines):
+        """Rewrites only the lines that differ from what is on screen."""
+        # A line as wide as the terminal (or wider) wraps and shifts every row below it
+        width = max(1, shutil.get_terminal_size().columns - 1)
+        lines = [line[:width] for line in lines]
+        out = []
+        for row, line in enumerate(lines):
+            if row >= len(self.shown) or self.shown[row] != line:
+                out.append(f'\x1b[{row + 1};1H{line}\x1b[K')
+        for row in range(len(lines), len(self.shown)):
+            out.append(f'\x1b[{row + 1};1H\x1b[K')
+        self.shown = lines
+        if out:
+            self.stream.write(''.join(out))
+            self.stream.flush()
+            self.redraws += 1
+            self.lines_written += len(out)
+
+    def summary(self):
+        return f"DASHBOARD: {self.redraws} redraws, {self.lines_written} lines rewritten"
+
+
+def main():
+    dashboard = Dashboard().start()
+    start = time.perf_counter()
+    last = start
+    try:
+        while True:
+            time.sleep(0.01)
+            now = time.perf_counter()
+            t = now - start
+            rpm = max(0.0, 80 + 20 * math.sin(t / 5))
+            dashboard.tick(now - last)
+            last = now
+            dashboard.set(rpm=rpm, speed=rpm * 0.09, distance=t * 6.0, moving=rpm > 70,
+                          frames=int(t * 10))
+            if int(t) % 7 == 0 and int(t) != int(t - 0.01):
+                dashboard.write(f"demo message at {t:.0f} s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dashboard.stop()
+        print(dashboard.summary())
+
+
+if __name__ == "__main__":
+    main()
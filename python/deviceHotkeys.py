@@ -0,0 +1,202 @@
+# deviceHotkeys.py - Handlebar Device Hotkeys (Linux evdev)
+# The pynput listener behind Ctrl+M (and the middle-click toggle of the older bridges) hooks
+# every key and click on the whole desktop and runs a Python callback for each. On Linux the
+# bridge can instead read only the handlebar device (the BT mini keyboard or ring mouse)
+# straight from /dev/input:
+#
+#   python rollerInterface30.py --hotkeys "mini keyboard" [--hotkeys-grab]
+#   python deviceHotkeys.py                      (lists the input devices and their names)
+#   python deviceHotkeys.py "mini keyboard"      (prints the actions its keys map to)
+#
+# - Only that device's events are read; the rest of the desktop is not hooked at all.
+# - With --hotkeys-grab the device is grabbed exclusively: its keys no longer reach the
+#   browser or anything else, they are only bridge actions.
+# - Keys become action names (HOTKEY_BINDINGS, e.g. 'KEY_M': 'motion'), posted as 'hotkey'
+#   events to the bridge's EventQueue (bridgeEvents.py): the bridge applies them on its own
+#   loop, so nothing else touches its state.
+#
+# Needs python-evdev (pip install evdev) and read access to the device (the 'input' group).
+
+import argparse
+import select
+import threading
+
+from bridgeEvents import EventQueue
+
+# --- CONFIGURATION ---
+# Key (or 'MODIFIER+KEY') -> bridge action. Names are the kernel's (evtest shows them).
+HOTKEY_BINDINGS = {
+    'KEY_M': 'motion',              # Start / stop the motion (Ctrl+M)
+    'KEY_LEFTCTRL+KEY_M': 'motion',
+    'BTN_MIDDLE': 'motion',         # Ring mouse middle click (rollerInterface20middleMouseClicker.py)
+    'KEY_H': 'recentre',            # Recentre head tracking (Ctrl+H)
+    'KEY_LEFTCTRL+KEY_H': 'recentre',
+    'KEY_UP': 'step',               # One step forward
+    'KEY_PAGEUP': 'zoom_in',
+    'KEY_PAGEDOWN': 'zoom_out',
+}
+HOTKEY_ACTIONS = ('motion', 'recentre', 'step', 'zoom_in', 'zoom_out')
+POLL_SECONDS = 0.5              # How often the reader checks whether it should stop
+KEY_PRESS = 1                   # evdev key event values: 0 = release, 1 = press, 2 = auto-repeat
+KEY_RELEASE = 0
+
+
+def parse_bindings(text):
+    """'KEY_M=motion,BTN_MIDDLE=motion' -> dict (added to / replacing HOTKEY_BINDINGS entries)."""
+    bindings = {}
+    for item in text.split(','):
+        if item.strip():
+            key, _, action = item.partition('=')
+            action = action.strip()
+            if action not in HOTKEY_ACTIONS:
+                raise ValueError(f"Binding '{item}' is not KEY=action (actions: {', '.join(HOTKEY_ACTIONS)})")
+            bindings[key.strip().upper()] = action
+    return bindings
+
+
+class HotkeyMap:
+    """Turns key codes and values into actions, following the held modifiers."""
+
+    def __init__(self, bindings, code_of):
+        # code_of: key name -> code (evdev.ecodes.ecodes); resolved once, not per event.
+        # Either Ctrl (Shift, Alt) counts as the left one, the name used in the bindings.
+        self.modifiers = {}
+        for side in ('CTRL', 'SHIFT', 'ALT'):
+            left = code_of[f'KEY_LEFT{side}']
+            self.modifiers[left] = self.modifiers[code_of[f'KEY_RIGHT{side}']] = left
+        self.bindings = {}
+        for keys, action in bindings.items():
+            *mods, key = keys.split('+')
+            try:
+                self.bindings[(frozenset(code_of[m.replace('RIGHT', 'LEFT')] for m in mods), code_of[key])] = action
+            except KeyError as e:
+                raise ValueError(f"Unknown key {e} in binding '{keys}'") from None
+        self.held = set()
+
+    def feed(self, code, value):
+        """One EV_KEY event. Returns the action for a key press, or None."""
+        modifier = self.modifiers.get(code)
+        if modifier is not None:
+            if value == KEY_RELEASE:
+                self.held.discard(modifier)
+            else:
+                self.held.add(modifier)
+            return None
+        if value != KEY_PRESS:
+            return None                 # Releases and auto-repeat are not actions
+        return self.bindings.get((frozenset(self.held), code))
+
+
+def open_device(name):
+    """An evdev InputDevice by path (/dev/input/eventN) or by (part of) its name."""
+    import evdev
+    if name.startswith('/dev/'):
+        return evdev.InputDevice(name)
+    matches = []
+    for path in evdev.list_devices():
+        device = evdev.InputDevice(path)
+        if name.lower() in device.name.lower():
+            matches.append(device)
+        else:
+            device.close()
+    if not matches:
+        raise OSError(f"No input device named like '{name}' (python deviceHotkeys.py lists them)")
+    # A BT keyboard often shows up as several devices: prefer the one with the most keys
+    matches.sort(key=lambda d: len(d.capabilities().get(evdev.ecodes.EV_KEY, [])), reverse=True)
+    for extra in matches[1:]:
+        extra.close()
+    return matches[0]
+
+
+class DeviceHotkeys:
+    """Reads one input device on a daemon thread and posts the actions of its keys as events."""
+
+    def __init__(self, name, bindings=None, grab=False, events=None):
+        import evdev
+        self.ecodes = evdev.ecodes
+        self.device = open_device(name)
+        self.map = HotkeyMap(bindings if bindings is not None else HOTKEY_BINDINGS, evdev.ecodes.ecodes)
+        self.grab = grab
+        self.events = events if events is not None else EventQueue()
+        self.key_events = 0
+        self.count = 0                  # Actions posted
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.grab:
+            self.device.grab()          # Raises OSError if something else grabbed it first
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=POLL_SECONDS * 2)
+        try:
+            if self.grab:
+                self.device.ungrab()
+        except OSError:
+            pass
+        self.device.close()
+
+    def _run(self):
+        ev_key = self.ecodes.EV_KEY
+        try:
+            while self.running:
+                ready, _, _ = select.select([self.device.fd], [], [], POLL_SECONDS)
+                if not ready:
+                    continue
+                for event in self.device.read():
+                    if event.type != ev_key:
+                        continue        # Pointer movement etc. of a ring mouse
+                    self.key_events += 1
+                    action = self.map.feed(event.code, event.value)
+                    if action is not None:
+                        self.count += 1
+                        self.events.post('hotkey', action)
+        except OSError as e:
+            if self.running:
+                print(f"HOTKEYS: {self.device.name} disconnected ({e})")
+
+    def summary(self):
+        return f"HOTKEYS: {self.device.name}, {self.key_events} key events, {self.count} actions"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lists input devices, or shows the hotkey actions of one")
+    parser.add_argument('device', nargs='?', help="Device path or (part of) its name")
+    parser.add_argument('--grab', action='store_true', help="Grab the device exclusively while testing")
+    args = parser.parse_args()
+    try:
+        import evdev
+    except ImportError:
+        print("ERROR: needs python-evdev (pip install evdev), Linux only.")
+        return
+    if not args.device:
+        for path in evdev.list_devices():
+            device = evdev.InputDevice(path)
+            print(f"{path}: {device.name}")
+            device.close()
+        return
+    try:
+        hotkeys = DeviceHotkeys(args.device, grab=args.grab).start()
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return
+    print(f"Reading {hotkeys.device.path}: {hotkeys.device.name} (Ctrl+C to stop)")
+    try:
+        while hotkeys.thread.is_alive():
+            if hotkeys.events.wait(POLL_SECONDS):
+                hotkeys.events.drain(lambda event: print(event.value))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        hotkeys.stop()
+        print(hotkeys.summary())
+
+
+if __name__ == "__main__":
+    main()
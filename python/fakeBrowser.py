@@ -0,0 +1,120 @@
+# fakeBrowser.py - Stand-In for streetView.html
+# Connects to the bridge's WebSocket (rollerInterface30.py --browser) like the page does,
+# without a browser or a Maps API key, so the browser output can be tried and measured:
+#
+#   python rollerInterface30.py --browser        (or anything else using BrowserOutput)
+#   python fakeBrowser.py --load-ms 300
+#
+# It keeps a pretend view (heading, pitch, zoom, panorama number), applies what arrived
+# since its last 'animation frame' in one go, acknowledges it like the page, and prints
+# what it did every few seconds.
+
+import argparse
+import json
+import threading
+import time
+
+from webSocket import WebSocketClient, WebSocketClosed
+
+# --- CONFIGURATION ---
+FRAME_SECONDS = 1.0 / 60        # The page's animation frame
+HOLD_STEP_SECONDS = 0.25        # Same as HOLD_STEP_MS in streetView.html
+MAX_QUEUED_STEPS = 2
+PRINT_SECONDS = 5.0
+
+
+class FakePage:
+    """The page's state and frame logic (applyFrame in streetView.html)."""
+
+    def __init__(self, load_seconds=0.3):
+        self.load_seconds = load_seconds
+        self.heading = 0.0
+        self.pitch = 0.0
+        self.zoom = 1.0
+        self.pano = 0
+        self.pending = {'h': 0.0, 'p': 0.0, 'z': 0, 'n': 0}
+        self.held = False
+        self.last_seq = 0
+        self.unacked = False
+        self.loading_since = None
+        self.last_hold_step = 0.0
+        self.messages = 0
+        self.frames = 0               # Frames that applied something
+
+    def message(self, m):
+        self.pending['h'] += m.get('h', 0)
+        self.pending['p'] += m.get('p', 0)
+        self.pending['z'] += m.get('z', 0)
+        self.pending['n'] = min(MAX_QUEUED_STEPS, self.pending['n'] + m.get('n', 0))
+        if 'u' in m:
+            self.held = m['u'] == 1
+        self.last_seq = m['q']
+        self.unacked = True
+        self.messages += 1
+
+    def frame(self, now):
+        """Applies the pending commands. Returns the acknowledgement to send, or None."""
+        p = self.pending
+        self.heading = (self.heading + p['h']) % 360.0
+        self.pitch = max(-90.0, min(90.0, self.pitch + p['p']))
+        self.zoom = max(0.0, min(5.0, self.zoom + p['z'] * 0.5))
+        p['h'] = p['p'] = p['z'] = 0
+        if self.loading_since is not None and now - self.loading_since >= self.load_seconds:
+            self.loading_since = None
+        if self.loading_since is None:
+            if p['n'] > 0 or (self.held and now - self.last_hold_step >= HOLD_STEP_SECONDS):
+                p['n'] = max(0, p['n'] - 1)
+                self.pano += 1
+                self.loading_since = now
+                self.last_hold_step = now
+        if not self.unacked:
+            return None
+        self.unacked = False
+        self.frames += 1
+        return {'a': self.last_seq, 'h': round(self.heading, 1), 'pano': f"fake{self.pano}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in for streetView.html")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--load-ms', type=float, default=300.0, help="How long a pretend panorama takes to load")
+    args = parser.parse_args()
+
+    page = FakePage(args.load_ms / 1000.0)
+    lock = threading.Lock()
+    client = WebSocketClient(args.host, args.port)
+    print(f"Connected to ws://{args.host}:{args.port}/ (Ctrl+C to stop)")
+
+    def receive_loop():
+        try:
+            while True:
+                m = json.loads(client.receive())
+                with lock:
+                    page.message(m)
+        except (WebSocketClosed, OSError):
+            pass
+
+    threading.Thread(target=receive_loop, daemon=True).start()
+    last_print = time.perf_counter()
+    try:
+        while not client.closed:
+            time.sleep(FRAME_SECONDS)
+            now = time.perf_counter()
+            with lock:
+                ack = page.frame(now)
+            if ack is not None:
+                client.send_text(json.dumps(ack, separators=(',', ':')))
+            if now - last_print >= PRINT_SECONDS:
+                last_print = now
+                print(f"heading {page.heading:6.1f} pitch {page.pitch:5.1f} zoom {page.zoom:.1f} "
+                      f"panorama {page.pano} | {page.messages} messages in {page.frames} frames")
+        print("Bridge closed the connection.")
+    except (KeyboardInterrupt, WebSocketClosed):
+        pass
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# fakePhones.py - Load Test for the Telemetry Server
+# Connects many simulated phones to a TelemetryServer (telemetryServer.py) at once, some of
+# them deliberately slow, while a stand-in bridge loop publishes made-up ride values:
+#
+#   python fakePhones.py --phones 300 --slow 30 --seconds 20
+#   python fakePhones.py --phones 300 --slow 30 --hz 200      (fills the slow phones' sockets)
+#   python fakePhones.py --port 8770 --phones 50      (against a running bridge --telemetry)
+#
+# It checks what the server promises and prints the numbers:
+# - the bridge loop is never held up: publish() cost and the loop's longest gap;
+# - every phone ends with the same values as the server (the deltas add up), slow ones too;
+# - update latency (server time stamp to arrival) and messages per phone;
+# - slow phones only read every SLOW_READ_SECONDS and get merged updates, not a backlog.
+#
+# The phones run in this process too, so the loop gap includes the time they hold the GIL.
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import os
+import random
+import socket
+import struct
+import threading
+import time
+
+from telemetryServer import TELEMETRY_HZ, TelemetryServer, rounded
+from webSocket import OP_CLOSE, OP_TEXT, encode_frame
+
+# --- CONFIGURATION ---
+BRIDGE_LOOP_SECONDS = 0.01      # The stand-in bridge publishes this often
+SLOW_READ_SECONDS = 5.0         # A slow phone stops reading for this long between reads
+SLOW_RECEIVE_BUFFER = 2048      # Socket receive buffer of a slow phone, so its backlog reaches the server soon
+CATCH_UP_SECONDS = 3.0          # After the run, phones read what is still on the way for this long at most
+
+
+class FakePhone:
+    """One WebSocket client that merges the updates it receives."""
+
+    def __init__(self, slow=False):
+        self.slow = slow
+        self.state = {}
+        self.messages = 0
+        self.bytes = 0
+        self.latencies = []
+
+    async def run(self, host, port, until):
+        if self.slow:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_RECEIVE_BUFFER)
+            sock.setblocking(False)
+            await asyncio.get_running_loop().sock_connect(sock, (host, port))
+            reader, writer = await asyncio.open_connection(sock=sock, limit=SLOW_RECEIVE_BUFFER)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        writer.write((f"GET /ws HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+                      ).encode('ascii'))
+        head = await reader.readuntil(b'\r\n\r\n')
+        if b' 101 ' not in head.split(b'\r\n')[0]:
+            raise ConnectionError(f"handshake refused: {head[:40]!r}")
+        next_pause = time.perf_counter() + SLOW_READ_SECONDS
+        try:
+            while time.perf_counter() < until:
+                if self.slow and time.perf_counter() >= next_pause:
+                    await asyncio.sleep(SLOW_READ_SECONDS)     # Not reading: the socket fills up
+                    next_pause = time.perf_counter() + SLOW_READ_SECONDS
+                try:
+                    opcode, payload = await asyncio.wait_for(self._read_frame(reader), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                if opcode == OP_TEXT:
+                    message = json.loads(payload)
+                    self.latencies.append(time.time() - message.pop('t'))
+                    self.state.update(message)
+                    self.messages += 1
+                    self.bytes += len(payload)
+            # The bridge has stopped: catch up with whatever is still on the way before comparing
+            end = time.perf_counter() + CATCH_UP_SECONDS
+            try:
+                while time.perf_counter() < end:
+                    opcode, payload = await asyncio.wait_for(self._read_frame(reader), 1.0)
+                    if opcode == OP_TEXT:
+                        message = json.loads(payload)
+                        message.pop('t')
+                        self.state.update(message)
+            except asyncio.TimeoutError:
+                pass
+            writer.write(encode_frame(OP_CLOSE, b'\x03\xe8', mask=True))
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_frame(reader):
+        first, second = await reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('>H', await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('>Q', await reader.readexactly(8))[0]
+        return first & 0x0F, await reader.readexactly(length)
+
+
+def fake_bridge(server, until, stats):
+    """Publishes changing ride values like the bridge loop, timing publish() and the loop."""
+    start = last = time.perf_counter()
+    distance = 0.0
+    while last < until:
+        now = time.perf_counter()
+        stats['max_gap'] = max(stats['max_gap'], now - last)
+        last = now
+        t = now - start
+        rpm = 85 + 15 * math.sin(t / 3) + random.uniform(-3, 3)     # Sensor jitter: changes every update
+        speed = rpm / 60 * 2.1
+        distance += speed * BRIDGE_LOOP_SECONDS
+        values = {'rpm': rpm, 'speed': speed * 3.6, 'power': rpm * 2.4, 'distance': distance, 'motion': True,
+                  'moving': rpm > 80, 'ghost': f"{int(t) % 20 - 10:+d} m"}
+        before = time.perf_counter()
+        server.publish(values)
+        stats['publish'].append(time.perf_counter() - before)
+        time.sleep(BRIDGE_LOOP_SECONDS)
+    stats['last'] = values
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+async def run_phones(host, port, phones, slow, until):
+    clients = [FakePhone(slow=i < slow) for i in range(phones)]
+    results = await asyncio.gather(*(c.run(host, port, until) for c in clients), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    return clients, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the telemetry server")
+    parser.add_argument('--phones', type=int, default=300)
+    parser.add_argument('--slow', type=int, default=30, help="How many of the phones read slowly")
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--hz', type=float, default=TELEMETRY_HZ,
+                        help="Update rate of the server started here (raise it to fill the slow phones sooner)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0, help="A running server (default: start one here)")
+    args = parser.parse_args()
+
+    server = stats = None
+    port = args.port
+    until = time.perf_counter() + args.seconds
+    if not port:
+        server = TelemetryServer('127.0.0.1', 0, hz=args.hz).start()
+        port = server.port
+        stats = {'publish': [], 'max_gap': 0.0}
+        bridge = threading.Thread(target=fake_bridge, args=(server, until, stats), daemon=True)
+        bridge.start()
+    print(f"{args.phones} phones ({args.slow} slow) on port {port} for {args.seconds:g} s...")
+
+    clients, failures = asyncio.run(run_phones(args.host, port, args.phones, args.slow, until))
+
+    if server is not None:
+        bridge.join()
+        expected = server.state
+        fast_ok = sum(c.state == expected for c in clients if not c.slow)
+        slow_ok = sum(c.state == expected for c in clients if c.slow)
+        print(f"Phones in step with the server at the end: {fast_ok}/{args.phones - args.slow} normal, "
+              f"{slow_ok}/{args.slow} slow" + ("" if rounded(stats['last']) == expected else " (still changing)"))
+        publish = stats['publish']
+        print(f"Bridge loop: publish() p99 {percentile(publish, 0.99) * 1e6:.1f} us, "
+              f"longest loop gap {stats['max_gap'] * 1000:.1f} ms (sleeps {BRIDGE_LOOP_SECONDS * 1000:.0f} ms)")
+    for kind, group in (("normal", [c for c in clients if not c.slow]), ("slow", [c for c in clients if c.slow])):
+        if not group:
+            continue
+        latencies = [x for c in group for x in c.latencies]
+        messages = sum(c.messages for c in group) / len(group)
+        size = sum(c.bytes for c in group) / max(1, sum(c.messages for c in group))
+        print(f"{kind.capitalize()} phones: {messages:.0f} messages each, {size:.0f} bytes per message, "
+              f"latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms, "
+              f"max {max(latencies, default=0) * 1000:.0f} ms")
+    if failures:
+        print(f"{len(failures)} phones failed: {failures[0]!r}")
+    if server is not None:
+        print(server.summary())
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# fakeReceiver.py - Fake Receiver + Transmitter on a Pseudo-Terminal
+# Pretends to be bicycleReceiverInterface30.ino with a bike behind it, so the bridge and
+# the tuning tools can be tried without any Arduino. It opens a pty and prints its name;
+# use that name as the serial port:
+#
+#   python fakeReceiver.py --rpm 300 --loss 0.05
+#   python rollerTools.py tune --port /dev/pts/5 trigger_level=640 --save
+#
+# It prints the same lines as the Receiver (F / RPM / P, see radioLink.py and
+# pulseEngine.py) and answers tuning commands like the real pair: the first command waits
+# for the transmitter's next packet and each answer fetches the next one, lost packets
+# lose commands or answers (so retries are exercised), a repeated request is answered
+# again without being applied twice, and SAVE writes the settings to a JSON file standing
+# in for the EEPROM.
+# Linux / macOS only (pseudo-terminals).
+
+import argparse
+import json
+import os
+import random
+import select
+import time
+import tty
+from collections import deque
+
+from bikeControl import PARAMS, check_value
+
+# --- CONFIGURATION ---
+# Defaults compiled into bicyclePartInterface30.ino
+DEFAULT_SETTINGS = {
+    'trigger_level': 650,
+    'rearm_level': 580,
+    'debounce_us': 10000,
+    'stop_timeout_us': 500000,
+    'magnets': 1,
+    'batch_interval_us': 60000,
+    'max_batch_delay_us': 50000,
+    'active_heartbeat_us': 250000,
+    'idle_heartbeat_us': 1000000,
+    'state_repeat_us': 20000,
+    'state_repeats': 2,
+}
+COMMAND_QUEUE_SIZE = 8          # Same as the Receiver sketch
+REPLY_DELAY_SECONDS = 0.005     # Transmitter handles the command and sends its answer
+MICROS_WRAP = 0x100000000
+
+
+class FakeTransmitter:
+    """The transmitter's settings and request handling (ControlHandler in ControlProtocol.cpp)."""
+
+    def __init__(self, eeprom_path=None):
+        self.eeprom_path = eeprom_path
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.last_request = None
+        self.last_reply = None
+        if eeprom_path and os.path.exists(eeprom_path):
+            with open(eeprom_path) as f:
+                stored = json.load(f)
+            if set(stored) == set(PARAMS) and all(check_value(k, v) is None for k, v in stored.items()):
+                self.settings = stored
+
+    def handle(self, request_id, op, name, value):
+        """Returns the answer line for one request."""
+        request = (request_id, op, name, value)
+        if request == self.last_request:
+            return self.last_reply    # Retry: answer again, apply nothing
+
+        if op == 'GET':
+            reply = f"A,{request_id},OK,{name},{self.settings[name]}"
+        elif op == 'SET':
+            reason = check_value(name, value, self.settings)
+            if reason is None:
+                self.settings[name] = value
+                reply = f"A,{request_id},OK,{name},{value}"
+            else:
+                reply = f"A,{request_id},ERR,{reason}"
+        elif op == 'SAVE':
+            if self.eeprom_path:
+                with open(self.eeprom_path, 'w') as f:
+                    json.dump(self.settings, f, indent=1)
+            reply = f"A,{request_id},OK"
+        else:  # DEFAULTS
+            self.settings = dict(DEFAULT_SETTINGS)
+            reply = f"A,{request_id},OK"
+
+        self.last_request = request
+        self.last_reply = reply
+        return reply
+
+
+def parse_command(line):
+    """
+    Parses a 'C,...' line like parseControlLine() in ControlProtocol.cpp.
+    Returns ((id, op, name, value), None) or (id_or_None, reason).
+    """
+    parts = line.split(',')
+    if parts[0] != 'C' or len(parts) < 3:
+        return None, 'bad_request'
+    try:
+        request_id = int(parts[1])
+    except ValueError:
+        return None, 'bad_request'
+    if not 1 <= request_id <= 255:
+        return None, 'bad_request'
+    op = parts[2]
+    if op not in ('GET', 'SET', 'SAVE', 'DEFAULTS'):
+        return request_id, 'bad_op'
+    name = value = None
+    if op in ('GET', 'SET'):
+        if len(parts) < 4 or parts[3] not in PARAMS:
+            return request_id, 'bad_param'
+        name = parts[3]
+    if op == 'SET':
+        try:
+            value = int(parts[4])
+        except (IndexError, ValueError):
+            return request_id, 'bad_value'
+    return (request_id, op, name, value), None
+
+
+class FakeReceiver:
+    """Produces the Receiver's serial output and relays commands to a FakeTransmitter."""
+
+    def __init__(self, rpm=300.0, loss=0.0, eeprom_path=None, seed=None):
+        self.rpm = rpm
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.transmitter = FakeTransmitter(eeprom_path)
+        self.commands = deque()
+        self.loaded = None            # Command waiting for the next ACK
+        self.replies = []             # (due_time, line)
+        self.seq = 0
+        self.tx_offset_us = self.random.randrange(MICROS_WRAP)
+        self.rx_offset_us = self.random.randrange(MICROS_WRAP)
+        self.next_pulse = None
+        self.last_send = 0.0
+        self.partial = b''
+
+    def feed(self, data):
+        """Bytes written by the PC. Returns lines to print right away (Receiver errors)."""
+        out = []
+        lines = (self.partial + data).replace(b'\r', b'\n').split(b'\n')
+        self.partial = lines.pop()
+        for raw in lines:
+            line = raw.decode('ascii', errors='replace').strip()
+            if not line:
+                continue
+            command, reason = parse_command(line)
+            if reason is None and len(self.commands) >= COMMAND_QUEUE_SIZE:
+                command, reason = command[0], 'busy'
+            if reason is not None:
+                out.append(f"A,{command if command is not None else 0},ERR,{reason}")
+            else:
+                self.commands.append(command)
+        return out
+
+    def tick(self, now):
+        """Lines the Receiver prints up to time now (perf_counter seconds)."""
+        out = []
+        if self.loaded is None and self.commands:
+            self.loaded = self.commands.popleft()
+
+        settings = self.transmitter.settings
+        pulse = False
+        period = 60.0 / (self.rpm * settings['magnets']) if self.rpm > 0 else None
+        if period is not None:
+            if self.next_pulse is None:
+                self.next_pulse = now
+            if now >= self.next_pulse:
+                pulse = True
+                self.next_pulse += period
+        heartbeat_us = settings['active_heartbeat_us'] if period else settings['idle_heartbeat_us']
+        if pulse or now - self.last_send >= heartbeat_us / 1000000.0:
+            out += self._packet(now, pulse)
+
+        due = [r for r in self.replies if r[0] <= now]
+        for reply in due:
+            self.replies.remove(reply)
+            out.append(reply[1])
+        return out
+
+    def _packet(self, now, pulse):
+        self.last_send = now
+        seq = self.seq
+        self.seq = (self.seq + 1) % 0x10000
+        if self.random.random() < self.loss:
+            return []          # Lost: no ACK either, the loaded command waits for the next packet
+
+        tx_us = (int(now * 1000000) + self.tx_offset_us) % MICROS_WRAP
+        rx_us = (tx_us + self.rx_offset_us + 600) % MICROS_WRAP
+        lines = [f"F,{seq},{tx_us},{rx_us}", f"{self.rpm:.2f}"]
+        if pulse:
+            lines.append(f"P,0,{tx_us}")
+
+        # The loaded command rides back on this packet's ACK. The answer is a packet of its
+        # own, and its ACK already carries the next queued command, so a queue drains quickly.
+        delay = 0.0
+        while self.loaded is not None:
+            reply = self.transmitter.handle(*self.loaded)
+            self.loaded = None
+            delay += REPLY_DELAY_SECONDS
+            if self.random.random() < self.loss:
+                break          # Answer lost: the PC will retry
+            self.replies.append((now + delay, reply))
+            if self.commands:
+                self.loaded = self.commands.popleft()
+        return lines
+
+
+def open_pty():
+    """Opens a pseudo-terminal in raw mode. Returns (master_fd, slave_name, slave_fd)."""
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    os.set_blocking(master, False)
+    return master, os.ttyname(slave), slave
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Receiver on a pseudo-terminal")
+    parser.add_argument('--rpm', type=float, default=300.0, help="Roller RPM to report (0 = stopped)")
+    parser.add_argument('--loss', type=float, default=0.0, help="Radio packet loss, 0..1")
+    parser.add_argument('--eeprom', default='fakeReceiverEeprom.json', help="File standing in for the EEPROM")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    master, name, slave = open_pty()
+    fake = FakeReceiver(args.rpm, args.loss, args.eeprom, args.seed)
+    print(f"Fake Receiver on {name} (Ctrl+C to stop)")
+
+    try:
+        while True:
+            readable, _, _ = select.select([master], [], [], 0.002)
+            out = []
+            if readable:
+                try:
+                    out = fake.feed(os.read(master, 1024))
+                except BlockingIOError:
+                    pass
+            out += fake.tick(time.perf_counter())
+            if out:
+                try:
+                    os.write(master, ('\r\n'.join(out) + '\r\n').encode('ascii'))
+                except BlockingIOError:
+                    pass    # Nobody is reading the port: the lines are lost, like on a real one
+    except KeyboardInterrupt:
+        pass
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+if __name__ == "__main__":
+    main()
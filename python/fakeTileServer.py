@@ -0,0 +1,125 @@
+# fakeTileServer.py - Stand-In for the Street View Image and Metadata Endpoints
+# Answers the same two requests as the Street View Static API, slowly, so the panorama
+# cache (panoCache.py) can be tried and measured without a network or an API key:
+#
+#   python fakeTileServer.py --latency-ms 250
+#   python panoCache.py --upstream http://localhost:8767
+#
+# Panoramas sit on a grid of PANO_SPACING_METERS: the metadata for any location names the
+# nearest one, and the 'image' is a block of bytes derived from its pano id and heading.
+# It counts requests and TCP connections, so connection reuse shows up too.
+
+import argparse
+import hashlib
+import json
+import math
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# --- CONFIGURATION ---
+FAKE_PORT = 8767
+PANO_SPACING_METERS = 10.0
+IMAGE_BYTES = 40000             # About a 640 x 640 JPEG
+METERS_PER_DEGREE_LAT = 111195.0
+
+
+def nearest_pano(lat, lng):
+    """(pano_id, lat, lng) of the grid panorama nearest to a location."""
+    step_lat = PANO_SPACING_METERS / METERS_PER_DEGREE_LAT
+    step_lng = step_lat / max(0.01, math.cos(math.radians(lat)))
+    i, j = round(lat / step_lat), round(lng / step_lng)
+    return f"fake_{i}_{j}", i * step_lat, j * step_lng
+
+
+class FakeTileServer:
+    """Threading HTTP server with a fixed extra latency per request."""
+
+    def __init__(self, port=FAKE_PORT, latency=0.25, host='127.0.0.1'):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with server.lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handle(self, handler):
+        with self.lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        parts = urlsplit(handler.path)
+        params = dict(parse_qsl(parts.query))
+        if parts.path == '/maps/api/streetview/metadata':
+            try:
+                lat, lng = (float(v) for v in params['location'].split(','))
+            except (KeyError, ValueError):
+                body = json.dumps({'status': 'INVALID_REQUEST'}).encode('ascii')
+            else:
+                pano, plat, plng = nearest_pano(lat, lng)
+                body = json.dumps({'status': 'OK', 'pano_id': pano,
+                                   'location': {'lat': plat, 'lng': plng}}).encode('ascii')
+            content_type = 'application/json'
+        elif parts.path == '/maps/api/streetview' and 'pano' in params:
+            seed = hashlib.sha1(f"{params['pano']}/{params.get('heading', '0')}".encode('ascii')).digest()
+            body = (seed * (IMAGE_BYTES // len(seed) + 1))[:IMAGE_BYTES]
+            content_type = 'image/jpeg'
+        else:
+            handler.send_response(404)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+        handler.send_response(200)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in Street View image / metadata server")
+    parser.add_argument('--port', type=int, default=FAKE_PORT)
+    parser.add_argument('--latency-ms', type=float, default=250.0, help="Extra delay per request")
+    args = parser.parse_args()
+
+    server = FakeTileServer(args.port, args.latency_ms / 1000.0).start()
+    print(f"Fake tile server on http://localhost:{server.port}/ (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"{server.requests} requests over {server.connections} connections")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
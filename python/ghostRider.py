@@ -0,0 +1,159 @@
+# ghostRider.py - Ghost Rider Comparison
+# Races the current ride against earlier rides recorded with rideLog.py.
+#
+# Each stored ride is resampled once, when it is loaded, onto two regular grids:
+#   - distance at every GHOST_TIME_STEP seconds   -> "where was the ghost at this time?"
+#   - time at every GHOST_DISTANCE_STEP meters    -> "when did the ghost get here?"
+# Every per-tick lookup is then a plain array index (constant time).
+# The ghost's clock starts at its first moving sample, like the bridge's (the first RPM above 0),
+# so idle time before a recorded ride does not count.
+# Many rides are stacked into one matrix so a whole leaderboard is a single column read.
+
+import numpy as np
+
+from rideLog import load_ride, cumulative_distance, ROLLER_CIRCUMFERENCE_METERS
+
+# --- CONFIGURATION ---
+GHOST_TIME_STEP = 0.1       # Seconds between time-grid samples
+GHOST_DISTANCE_STEP = 1.0   # Meters between distance-grid samples
+
+
+def _trim_lead_in(t, rpm):
+    """The ride from its first sample with rpm > 0 (unchanged if it never moves)."""
+    moving = np.flatnonzero(rpm > 0)
+    if moving.size == 0 or moving[0] == 0:
+        return t, rpm
+    return t[moving[0]:], rpm[moving[0]:]
+
+
+def _time_grid(t, distance):
+    """Distance at every GHOST_TIME_STEP from the start of the ride."""
+    grid = np.arange(0.0, t[-1] - t[0] + GHOST_TIME_STEP, GHOST_TIME_STEP)
+    return np.interp(grid + t[0], t, distance)
+
+
+def _distance_grid(t, distance):
+    """
+    Elapsed time at which each GHOST_DISTANCE_STEP was first reached.
+    Distance never decreases but stays flat while stopped, so the first crossing is used.
+    """
+    grid = np.arange(0.0, distance[-1], GHOST_DISTANCE_STEP)
+    i = np.clip(np.searchsorted(distance, grid, side='left'), 1, distance.size - 1)
+    d0, d1 = distance[i - 1], distance[i]
+    span = d1 - d0
+    f = np.where(span > 0, (grid - d0) / np.where(span > 0, span, 1.0), 0.0)
+    times = t[i - 1] + (t[i] - t[i - 1]) * np.clip(f, 0.0, 1.0)
+    times[0] = t[0]
+    return times - t[0]
+
+
+class GhostRide:
+    """One stored ride indexed by elapsed time and by distance."""
+
+    def __init__(self, t, rpm, name='ghost', circumference=ROLLER_CIRCUMFERENCE_METERS):
+        t, rpm = _trim_lead_in(t, rpm)
+        if t.size < 2:
+            raise ValueError("Ghost ride needs at least two samples.")
+        distance = cumulative_distance(t, rpm, circumference)
+        self.name = name
+        self.total_distance = float(distance[-1])
+        self.total_time = float(t[-1] - t[0])
+        self.distance_by_time = _time_grid(t, distance)
+        self.time_by_distance = _distance_grid(t, distance)
+        self._last_time_index = self.distance_by_time.size - 1
+        self._last_distance_index = self.time_by_distance.size - 1
+
+    @classmethod
+    def from_file(cls, path):
+        t, rpm = load_ride(path)
+        return cls(t, rpm, name=path)
+
+    def distance_at(self, elapsed):
+        """Ghost distance (meters) after 'elapsed' seconds. The ghost waits at the finish."""
+        i = int(elapsed / GHOST_TIME_STEP)
+        if i >= self._last_time_index:
+            return self.total_distance
+        return self.distance_by_time[max(i, 0)]
+
+    def time_at(self, distance):
+        """Elapsed time (seconds) when the ghost reached 'distance', or None past its finish."""
+        i = int(distance / GHOST_DISTANCE_STEP)
+        if i > self._last_distance_index:
+            return None
+        return self.time_by_distance[max(i, 0)]
+
+    def gap(self, elapsed, distance):
+        """
+        Gap to the ghost. Positive means the rider is AHEAD of the ghost.
+
+        :return: (gap_meters, gap_seconds); gap_seconds is None once past the ghost's finish.
+        """
+        gap_meters = distance - self.distance_at(elapsed)
+        ghost_time = self.time_at(distance)
+        gap_seconds = None if ghost_time is None else ghost_time - elapsed
+        return gap_meters, gap_seconds
+
+
+class GhostPack:
+    """Many stored rides stacked into matrices for vectorized leaderboard lookups."""
+
+    def __init__(self, ghosts):
+        if not ghosts:
+            raise ValueError("No ghost rides given.")
+        self.ghosts = ghosts
+        self.names = [g.name for g in ghosts]
+
+        # Pad shorter rides: distance holds at the finish, time is unknown (NaN) past it
+        steps = max(g.distance_by_time.size for g in ghosts)
+        self.distance_by_time = np.empty((len(ghosts), steps))
+        for row, g in zip(self.distance_by_time, ghosts):
+            row[:g.distance_by_time.size] = g.distance_by_time
+            row[g.distance_by_time.size:] = g.total_distance
+
+        steps = max(g.time_by_distance.size for g in ghosts)
+        self.time_by_distance = np.full((len(ghosts), steps), np.nan)
+        for row, g in zip(self.time_by_distance, ghosts):
+            row[:g.time_by_distance.size] = g.time_by_distance
+
+    def gaps(self, elapsed, distance):
+        """
+        Gaps to every ghost at once.
+
+        :return: (gap_meters, gap_seconds) arrays, one entry per ghost (NaN seconds past a ghost's finish).
+        """
+        ti = min(int(elapsed / GHOST_TIME_STEP), self.distance_by_time.shape[1] - 1)
+        di = int(distance / GHOST_DISTANCE_STEP)
+        gap_meters = distance - self.distance_by_time[:, max(ti, 0)]
+        if di < self.time_by_distance.shape[1]:
+            gap_seconds = self.time_by_distance[:, max(di, 0)] - elapsed
+        else:
+            gap_seconds = np.full(len(self.ghosts), np.nan)
+        return gap_meters, gap_seconds
+
+    def position(self, elapsed, distance):
+        """Leaderboard place of the rider (1 = ahead of every ghost) by distance covered."""
+        gap_meters, _ = self.gaps(elapsed, distance)
+        return int(np.count_nonzero(gap_meters < 0)) + 1
+
+    def personal_best(self, distance):
+        """The ghost that reached 'distance' meters fastest, or None if none got that far."""
+        di = int(distance / GHOST_DISTANCE_STEP)
+        if di >= self.time_by_distance.shape[1]:
+            return None
+        times = self.time_by_distance[:, di]
+        if np.all(np.isnan(times)):
+            return None
+        return self.ghosts[int(np.nanargmin(times))]
+
+
+def load_ghosts(paths):
+    """Loads every ride file in 'paths' into a GhostPack."""
+    return GhostPack([GhostRide.from_file(p) for p in paths])
+
+
+def format_gap(gap_meters, gap_seconds):
+    ahead = "AHEAD" if gap_meters >= 0 else "BEHIND"
+    text = f"{abs(gap_meters):.0f} m {ahead}"
+    if gap_seconds is not None and not np.isnan(gap_seconds):
+        text += f" ({gap_seconds:+.1f} s)"
+    return text
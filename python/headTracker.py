@@ -0,0 +1,338 @@
+# headTracker.py - Webcam Head Tracker
+# Turns the Street View camera with your head using a plain webcam, without OpenTrack:
+# rollerInterface30.py --head [camera number or video file] feeds it into the mouse-look path.
+#
+# - Face detection (OpenCV's Haar cascade) is slow, so it only runs to find the face: on a
+#   small copy of the frame when the face is lost, and otherwise now and then inside a
+#   window around the last position to correct drift.
+# - In between, the face is followed by optical flow of a few dozen corner points inside
+#   it, on a TRACK_WIDTH pixel wide copy of the frame.
+# - Yaw and pitch come from how far the face moved from where it sat when tracking started
+#   (recentred with Ctrl+H in the bridge), in face widths. Small movements inside
+#   HEAD_DEAD_ZONE_DEGREES are ignored, so bobbing on the rollers does not turn the view.
+# - Each frame has a budget of FRAME_BUDGET_MS: when processing runs over it, the tracking
+#   copy gets smaller; when there is plenty to spare, it grows back.
+#
+# Offline, on a recorded video (e.g. recorded with --record, or any video of a face):
+#   python headTracker.py --video head.mp4 [--csv pose.csv]
+# processes every frame as fast as it can and prints the tracking and timing statistics.
+#
+# Needs OpenCV 4 (pip install "opencv-python<5"); version 5 no longer has the Haar cascades.
+
+import argparse
+import csv
+import math
+import threading
+import time
+
+import numpy as np
+
+# --- CONFIGURATION ---
+CAMERA = 0                      # Camera number (or a video file to play as the camera)
+DETECT_WIDTH = 320              # Frame width face detection runs at
+TRACK_WIDTH = 320               # Frame width tracking starts at (adapted to the budget)
+MIN_TRACK_WIDTH = 160
+MAX_TRACK_WIDTH = 480
+FRAME_BUDGET_MS = 12.0          # Processing time allowed per frame
+REDETECT_SECONDS = 1.0          # Drift correction: detection in a window around the face
+TRACK_POINTS = 40               # Corner points followed inside the face
+MIN_TRACK_POINTS = 8            # Fewer left: the face is lost
+DEGREES_PER_FACE_WIDTH = 45.0   # Head angle for moving the face one face width in the frame
+HEAD_DEAD_ZONE_DEGREES = 6.0    # Head angles ignored around the centre
+HEAD_TURN_RATE = 3.0            # View turns this many degrees per second per degree beyond it
+SMOOTHING = 0.4                 # Weight of the newest angle (1 = no smoothing)
+MIRROR = True                   # Camera faces the rider: turning right moves the face left
+
+
+class FaceTracker:
+    """Finds a face and follows it frame to frame. Positions are fractions of the frame."""
+
+    def __init__(self, track_width=TRACK_WIDTH, detector=None):
+        import cv2
+        self.cv2 = cv2
+        if detector is None:
+            if not hasattr(cv2, 'CascadeClassifier'):
+                raise ImportError("This OpenCV has no Haar cascades: pip install \"opencv-python<5\"")
+            cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            detector = lambda grey: cascade.detectMultiScale(grey, scaleFactor=1.2, minNeighbors=4, minSize=(24, 24))
+        self.detector = detector        # grey image -> [(x, y, w, h)] in its pixels
+        self.track_width = track_width
+        self.box = None                 # (cx, cy, w, h) as fractions of the frame
+        self.prev = None                # Last tracking-size grey frame
+        self.points = None
+        self.last_detect = 0.0
+        self.detections = 0
+        self.lost = 0
+
+    def process(self, frame, now):
+        """Updates the face from a BGR (or grey) frame. Returns the box or None."""
+        cv2 = self.cv2
+        grey = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        height, width = grey.shape
+        small = cv2.resize(grey, (self.track_width, round(height * self.track_width / width)),
+                           interpolation=cv2.INTER_AREA)
+
+        if self.box is not None and self.prev is not None and self.prev.shape == small.shape:
+            self._follow(small)
+        elif self.box is not None:
+            self.points = None          # Tracking size changed: pick new points below
+
+        if self.box is None:
+            self._detect(grey, None, now)
+        elif now - self.last_detect >= REDETECT_SECONDS or self.points is None:
+            self._detect(grey, self.box, now)
+        if self.box is not None and (self.points is None or len(self.points) < MIN_TRACK_POINTS):
+            self._pick_points(small)
+        self.prev = small
+        return self.box
+
+    def _detect(self, grey, near, now):
+        """Face detection on the whole frame, or in a window twice the size of the box 'near'."""
+        cv2 = self.cv2
+        height, width = grey.shape
+        x0, y0, x1, y1 = 0.0, 0.0, 1.0, 1.0
+        if near is not None:
+            cx, cy, w, h = near
+            x0, y0 = max(0.0, cx - w), max(0.0, cy - h)
+            x1, y1 = min(1.0, cx + w), min(1.0, cy + h)
+        window = grey[int(y0 * height):int(y1 * height), int(x0 * width):int(x1 * width)]
+        scale = min(1.0, DETECT_WIDTH / width) if near is None else min(1.0, DETECT_WIDTH / 2 / window.shape[1])
+        if scale < 1.0:
+            window = cv2.resize(window, (max(1, round(window.shape[1] * scale)), max(1, round(window.shape[0] * scale))),
+                                interpolation=cv2.INTER_AREA)
+        self.last_detect = now
+        self.detections += 1
+        faces = self.detector(window)
+        if len(faces) == 0:
+            if near is not None and self.points is None:
+                self.box = None         # Neither tracked nor found: lost
+                self.lost += 1
+            return
+        fx, fy, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+        to_x = (x1 - x0) / window.shape[1]
+        to_y = (y1 - y0) / window.shape[0]
+        self.box = (x0 + (fx + fw / 2) * to_x, y0 + (fy + fh / 2) * to_y, fw * to_x, fh * to_y)
+        self.points = None              # Fresh points on the corrected box
+
+    def _pick_points(self, small):
+        height, width = small.shape
+        cx, cy, w, h = self.box
+        mask = np.zeros_like(small)
+        # The middle of the face: away from the background and the hair line
+        mask[int((cy - h * 0.35) * height):int((cy + h * 0.4) * height),
+             int((cx - w * 0.3) * width):int((cx + w * 0.3) * width)] = 255
+        points = self.cv2.goodFeaturesToTrack(small, TRACK_POINTS, 0.01, 3, mask=mask)
+        self.points = points if points is not None and len(points) >= MIN_TRACK_POINTS else None
+
+    def _follow(self, small):
+        if self.points is None:
+            return
+        moved, status, _ = self.cv2.calcOpticalFlowPyrLK(self.prev, small, self.points, None,
+                                                         winSize=(15, 15), maxLevel=2)
+        ok = status.ravel() == 1
+        if ok.sum() < MIN_TRACK_POINTS:
+            self.points = None
+            return
+        shift = moved[ok] - self.points[ok]
+        median = np.median(shift, axis=0)
+        # Points that went their own way (background, glasses reflections) are dropped
+        keep = np.linalg.norm(shift - median, axis=-1).ravel() < 2.0
+        self.points = moved[ok][keep].reshape(-1, 1, 2) if keep.sum() >= MIN_TRACK_POINTS else None
+        height, width = small.shape
+        cx, cy, w, h = self.box
+        self.box = (cx + median[0][0] / width, cy + median[0][1] / height, w, h)
+
+
+class HeadPose:
+    """Yaw and pitch (degrees) of the face relative to where it sat when centred."""
+
+    def __init__(self, mirror=MIRROR):
+        self.mirror = mirror
+        self.centre = None
+        self.yaw = self.pitch = 0.0
+
+    def recentre(self):
+        self.centre = None
+
+    def update(self, box):
+        if box is None:
+            return None
+        cx, cy, w, _ = box
+        if self.centre is None:
+            self.centre = (cx, cy, w)
+            self.yaw = self.pitch = 0.0
+        # In face widths as the face looked when centred, so moving nearer does not change the scale
+        x0, y0, w0 = self.centre
+        yaw = (cx - x0) / w0 * DEGREES_PER_FACE_WIDTH
+        pitch = (y0 - cy) / w0 * DEGREES_PER_FACE_WIDTH
+        if self.mirror:
+            yaw = -yaw
+        self.yaw += (yaw - self.yaw) * SMOOTHING
+        self.pitch += (pitch - self.pitch) * SMOOTHING
+        return self.yaw, self.pitch
+
+
+def head_rate(angle):
+    """View turn rate (degrees per second) for a head angle."""
+    beyond = abs(angle) - HEAD_DEAD_ZONE_DEGREES
+    return math.copysign(beyond * HEAD_TURN_RATE, angle) if beyond > 0 else 0.0
+
+
+class HeadTracker:
+    """Reads a camera (or video file) on a daemon thread and tracks the head in every frame."""
+
+    def __init__(self, source=CAMERA, pixels_per_degree=4.0, record=None, tracker=None):
+        import cv2
+        self.cv2 = cv2
+        self.capture = cv2.VideoCapture(source)
+        if not self.capture.isOpened():
+            raise OSError(f"Could not open camera {source}")
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)   # Always the newest frame, not a queue
+        self.tracker = tracker if tracker is not None else FaceTracker()
+        self.pose = HeadPose()
+        self.pixels_per_degree = pixels_per_degree
+        self.record = record
+        self.writer = None
+        self.lock = threading.Lock()
+        self.angles = None              # (yaw, pitch), None while no face is tracked
+        self.carry_x = self.carry_y = 0.0
+        self.frames = 0
+        self.over_budget = 0
+        self.process_ms = 0.0           # Smoothed processing time per frame
+        self.max_ms = 0.0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.capture.release()
+        if self.writer is not None:
+            self.writer.release()
+
+    def recentre(self):
+        with self.lock:
+            self.pose.recentre()
+
+    def _run(self):
+        while self.running:
+            ok, frame = self.capture.read()
+            if not ok:
+                break
+            if self.record:
+                if self.writer is None:
+                    fps = self.capture.get(self.cv2.CAP_PROP_FPS) or 30.0
+                    self.writer = self.cv2.VideoWriter(self.record, self.cv2.VideoWriter_fourcc(*'MJPG'),
+                                                       fps, (frame.shape[1], frame.shape[0]))
+                self.writer.write(frame)
+            self.step(frame, time.perf_counter())
+
+    def step(self, frame, now):
+        """Tracks one frame (taken at 'now') and keeps the per-frame time within FRAME_BUDGET_MS."""
+        start = time.perf_counter()
+        with self.lock:
+            angles = self.pose.update(self.tracker.process(frame, now))
+            self.angles = angles
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.frames += 1
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.process_ms += (elapsed_ms - self.process_ms) * 0.1
+        if elapsed_ms > FRAME_BUDGET_MS:
+            self.over_budget += 1
+        tracker = self.tracker
+        if self.process_ms > FRAME_BUDGET_MS and tracker.track_width > MIN_TRACK_WIDTH:
+            tracker.track_width = max(MIN_TRACK_WIDTH, tracker.track_width - 32)
+            self.process_ms = FRAME_BUDGET_MS * 0.75   # Give the new size a fresh start
+        elif self.process_ms < FRAME_BUDGET_MS * 0.4 and tracker.track_width < MAX_TRACK_WIDTH:
+            tracker.track_width = min(MAX_TRACK_WIDTH, tracker.track_width + 32)
+            self.process_ms = FRAME_BUDGET_MS * 0.5
+        return angles
+
+    def look(self, dt):
+        """Mouse movement (pixels) for the last dt seconds of head pose."""
+        angles = self.angles
+        if angles is None:
+            return 0, 0
+        self.carry_x += head_rate(angles[0]) * dt * self.pixels_per_degree
+        self.carry_y -= head_rate(angles[1]) * dt * self.pixels_per_degree
+        move_x, move_y = int(self.carry_x), int(self.carry_y)
+        self.carry_x -= move_x
+        self.carry_y -= move_y
+        return move_x, move_y
+
+    def summary(self):
+        t = self.tracker
+        return (f"HEAD: {self.frames} frames, {self.process_ms:.1f} ms per frame (max {self.max_ms:.1f}), "
+                f"{self.over_budget} over {FRAME_BUDGET_MS:g} ms, tracking at {t.track_width} px, "
+                f"{t.detections} detections, lost {t.lost}x")
+
+
+def run_file(path, csv_path=None, tracker=None):
+    """Tracks every frame of a video file as fast as possible. Returns the HeadTracker (stopped)."""
+    head = HeadTracker(path, tracker=tracker)
+    fps = head.capture.get(head.cv2.CAP_PROP_FPS) or 30.0
+    out = open(csv_path, 'w', newline='') if csv_path else None
+    writer = csv.writer(out) if out else None
+    if writer:
+        writer.writerow(['time_s', 'yaw', 'pitch'])
+    found = 0
+    try:
+        while True:
+            ok, frame = head.capture.read()
+            if not ok:
+                break
+            # The video's own clock, so drift correction runs as often as it would live
+            angles = head.step(frame, head.frames / fps)
+            if angles is not None:
+                found += 1
+            if writer:
+                writer.writerow([f"{head.frames / fps:.3f}"] + (
+                    [f"{angles[0]:.2f}", f"{angles[1]:.2f}"] if angles else ['', '']))
+    finally:
+        if out:
+            out.close()
+        head.stop()
+    head.found = found
+    return head
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Webcam head tracker")
+    parser.add_argument('--video', help="Track a recorded video instead of the camera")
+    parser.add_argument('--camera', type=int, default=CAMERA)
+    parser.add_argument('--record', help="Save the camera frames to this video (.avi) for later")
+    parser.add_argument('--csv', help="Write yaw and pitch per frame here (with --video)")
+    args = parser.parse_args()
+
+    try:
+        if args.video:
+            head = run_file(args.video, args.csv)
+            print(f"{head.found}/{head.frames} frames with a face")
+            print(head.summary())
+            return
+        head = HeadTracker(args.camera, record=args.record).start()
+    except (OSError, ImportError) as e:
+        print(f"ERROR: {e}")
+        return
+    print("Tracking (Ctrl+C to stop)...")
+    try:
+        while head.thread.is_alive():
+            time.sleep(0.5)
+            angles = head.angles
+            print("no face" if angles is None else f"yaw {angles[0]:6.1f}  pitch {angles[1]:6.1f}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        head.stop()
+        print(head.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# inputWatchdog.py - Liveness Watchdog for Held Inputs
+# A held 'Up' key is only safe while the bike keeps talking. If the serial stream stalls,
+# the cable is pulled or the stop frame ('0' in rollerInterface27.py) is lost, the key would
+# stay down and the rider keeps rolling down the road. The watchdog releases everything:
+#
+# - The bridge calls feed() for every valid frame. If none arrives for WATCHDOG_SECONDS,
+#   the watchdog's own timer thread calls the release functions itself: a main loop that is
+#   stuck (blocked on the port, sleeping after an error) cannot delay it.
+# - The release functions only send releases (harmless for keys that are not down). The
+#   main loop sees 'stalled' and brings its own state in line, so it stays the owner of it.
+# - install() also releases on process exit, SIGTERM / SIGHUP / SIGBREAK and uncaught
+#   exceptions (main or other threads).
+# - A quiet port is only a deadline miss while something is held (held()): receivers that
+#   send nothing after the stop frame are not stuck. Misses are reported through the
+#   bridge's log (bridgeLog.py), never printed from the timer thread.
+# - Deadline misses, how late the timer released after the deadline and how long the input
+#   took to come back are kept in metrics() and printed by summary().
+
+import atexit
+import signal
+import sys
+import threading
+import time
+
+# --- CONFIGURATION ---
+WATCHDOG_SECONDS = 2.5          # No valid frame for this long: release everything (> the 1 s idle heartbeat)
+CHECK_FRACTION = 0.1            # The timer checks this often (fraction of the deadline)
+MIN_CHECK_SECONDS = 0.01
+
+
+class InputWatchdog:
+    """Releases held inputs when valid frames stop arriving. Thread-safe."""
+
+    def __init__(self, deadline=WATCHDOG_SECONDS, releases=(), held=None, log=None):
+        self.deadline = deadline
+        self.releases = list(releases)  # Functions that release a held input
+        self.held = held                # Function: is an input held now? (None: assume it is)
+        self.log = log                  # Object with write(text, *args) (bridgeLog.BridgeLog), None = silent
+        self.lock = threading.Lock()
+        self.last_feed = time.perf_counter()
+        self.stalled = False
+        self.stall_time = None
+        self.stall_missed = False       # The current stall caught something held
+        self.misses = 0
+        self.max_gap = 0.0
+        self.late = []                  # Release time after the deadline, per miss (seconds)
+        self.recoveries = []            # Release to next valid frame, per miss (seconds)
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def add_release(self, release):
+        self.releases.append(release)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+    def feed(self, now=None):
+        """A valid frame arrived. Returns True if this ends a stall that caught something held."""
+        now = time.perf_counter() if now is None else now
+        with self.lock:
+            self.max_gap = max(self.max_gap, now - self.last_feed)
+            self.last_feed = now
+            if not self.stalled:
+                return False
+            self.stalled = False
+            if not self.stall_missed:
+                return False
+            self.recoveries.append(now - self.stall_time)
+            return True
+
+    def check(self, now=None):
+        """Releases everything if the deadline passed. Called by the timer thread."""
+        now = time.perf_counter() if now is None else now
+        with self.lock:
+            if self.stalled or now - self.last_feed < self.deadline:
+                return False
+            self.stalled = True
+            self.stall_time = now
+            self.stall_missed = self._is_held()
+            if self.stall_missed:
+                self.misses += 1
+                self.late.append(now - self.last_feed - self.deadline)
+        self.release_all()              # Harmless when nothing is held
+        if self.stall_missed and self.log is not None:
+            self.log.write("--- WATCHDOG: no valid input for {:.0f} ms, everything released ---",
+                           self.deadline * 1000)
+        return True
+
+    def _is_held(self):
+        if self.held is None:
+            return True
+        try:
+            return bool(self.held())
+        except Exception:
+            return True
+
+    def release_all(self):
+        for release in self.releases:
+            try:
+                release()
+            except Exception:
+                pass                    # The other inputs must still be released
+
+    def _run(self):
+        interval = max(MIN_CHECK_SECONDS, self.deadline * CHECK_FRACTION)
+        while not self.stopping.wait(interval):
+            self.check()
+
+    def install(self):
+        """Also releases on exit, termination signals and uncaught exceptions. Main thread only."""
+        atexit.register(self.release_all)
+
+        def on_signal(signum, frame):
+            self.release_all()
+            raise SystemExit(128 + signum)
+
+        for name in ('SIGTERM', 'SIGHUP', 'SIGBREAK'):
+            if hasattr(signal, name):
+                signal.signal(getattr(signal, name), on_signal)
+
+        previous_hook = sys.excepthook
+        previous_thread_hook = threading.excepthook
+
+        def excepthook(*args):
+            self.release_all()
+            previous_hook(*args)
+
+        def thread_excepthook(args):
+            self.release_all()
+            previous_thread_hook(args)
+
+        sys.excepthook = excepthook
+        threading.excepthook = thread_excepthook
+        return self
+
+    def metrics(self):
+        with self.lock:
+            late, recoveries = list(self.late), list(self.recoveries)
+            return {
+                'deadline_ms': self.deadline * 1000.0,
+                'deadline_misses': self.misses,
+                'stalled': self.stalled,
+                'max_gap_ms': self.max_gap * 1000.0,
+                'max_release_late_ms': max(late) * 1000.0 if late else 0.0,
+                'recoveries': len(recoveries),
+                'mean_recovery_ms': sum(recoveries) / len(recoveries) * 1000.0 if recoveries else 0.0,
+                'max_recovery_ms': max(recoveries) * 1000.0 if recoveries else 0.0,
+            }
+
+    def summary(self):
+        m = self.metrics()
+        text = f"WATCHDOG: {m['deadline_misses']} deadline misses ({m['deadline_ms']:.0f} ms), longest gap {m['max_gap_ms']:.0f} ms"
+        if m['deadline_misses']:
+            text += f", released at most {m['max_release_late_ms']:.0f} ms late"
+        if m['recoveries']:
+            text += f", input back after {m['mean_recovery_ms']:.0f} ms on average (max {m['max_recovery_ms']:.0f})"
+        return text
@@ -0,0 +1,139 @@
+# joystickCal.py - Joystick Auto-Centering and Adaptive Dead Zone
+# A thumbstick's resting point drifts (temperature, wear), and the Arduino's
+# map(joystickX, 0, 1023, -100, 100) passes that drift straight on. Once it is past a
+# fixed dead zone of 10, every packet turns into a small mouse.move and the view creeps.
+#
+# Instead, each axis learns its own centre and noise while the stick is left alone:
+# - Welford's running mean / variance over a block of consecutive still samples (a stick
+#   at rest jitters by a unit or two; a thumb holding a deflection wobbles far more);
+# - a full, quiet block near 0 becomes the new calibration: centre = mean, dead zone =
+#   noise * NOISE_SIGMAS (a thumb holding a slight turn is too noisy to be taken for a rest);
+# - the response (dead zone, expo curve, sensitivity) is precomputed into a lookup table
+#   once per calibration, so shaping a packet is one list index per axis, and everything
+#   inside the dead zone is exactly 0 - no mouse event at all.
+
+import math
+
+# --- CONFIGURATION ---
+STICK_RANGE = 100               # The Arduino maps the stick to -100..100
+START_DEAD_ZONE = 10            # Until the first calibration (the old fixed STEER_DEAD_ZONE)
+MIN_DEAD_ZONE = 3               # Never smaller than this, however quiet the stick
+NOISE_SIGMAS = 4.0              # Dead zone = this many standard deviations of the resting noise
+CAPTURE_RANGE = 30              # A still stick up to this far from 0 is taken as a drifted centre
+STILL_SAMPLES = 40              # Still samples per calibration (2 s of packets at 20 Hz)
+STILL_TOLERANCE = 2.0           # A sample further than max(this, 3 sigma) from the mean is movement
+MAX_REST_NOISE = 1.5            # A block noisier than this is a thumb holding the stick, not a rest
+RESPONSE_EXPO = 1.5             # 1 = linear; higher = finer control near the centre
+FULL_SCALE_PIXELS = 100         # Mouse pixels per packet at full deflection (x MOUSE_SENSITIVITY)
+
+
+class RunningStats:
+    """Welford's online mean and variance."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+def build_response_lut(center, dead_zone, full_scale, expo=RESPONSE_EXPO, stick_range=STICK_RANGE):
+    """
+    Mouse movement for every stick value -stick_range..stick_range (index value + stick_range).
+    The travel left outside the dead zone on each side of the centre is mapped onto 0..full_scale.
+    """
+    lut = []
+    for value in range(-stick_range, stick_range + 1):
+        offset = value - center
+        distance = abs(offset) - dead_zone
+        if distance <= 0:
+            lut.append(0)
+            continue
+        travel = (stick_range - center if offset > 0 else stick_range + center) - dead_zone
+        fraction = min(1.0, distance / travel) if travel > 0 else 1.0
+        move = int(round(full_scale * fraction ** expo))
+        lut.append(max(1, move) if offset > 0 else -max(1, move))
+    return lut
+
+
+class AxisCalibrator:
+    """Centre, noise and response lookup table of one joystick axis."""
+
+    def __init__(self, full_scale=FULL_SCALE_PIXELS, dead_zone=START_DEAD_ZONE):
+        self.full_scale = full_scale
+        self.center = 0.0
+        self.noise = None              # Standard deviation at rest (None until calibrated)
+        self.dead_zone = dead_zone
+        self.calibrations = 0
+        self.block = RunningStats()
+        self.lut = build_response_lut(self.center, self.dead_zone, self.full_scale)
+
+    def observe(self, value):
+        """Feeds one raw stick value. Returns True when the calibration changed."""
+        block = self.block
+        if block.count and abs(value - block.mean) > max(STILL_TOLERANCE, 3.0 * block.std):
+            block.reset()              # The stick moved: start a new still block here
+        block.add(value)
+        if block.count < STILL_SAMPLES:
+            return False
+
+        center, noise = block.mean, block.std
+        block.reset()
+        if abs(center) > CAPTURE_RANGE or noise > MAX_REST_NOISE:
+            return False               # Held still far out, or held by a thumb: that is steering
+        self.noise = noise
+        dead_zone = max(MIN_DEAD_ZONE, int(math.ceil(NOISE_SIGMAS * noise)) + 1)
+        if dead_zone == self.dead_zone - 1:
+            dead_zone = self.dead_zone     # Hysteresis: grow at once, shrink only by 2 or more
+        if abs(center - self.center) < 1.0 and dead_zone == self.dead_zone:
+            return False
+        self.center, self.dead_zone = center, dead_zone
+        self.lut = build_response_lut(center, dead_zone, self.full_scale)
+        self.calibrations += 1
+        return True
+
+    def shape(self, value):
+        """Mouse movement for a raw stick value (0 inside the dead zone)."""
+        index = int(value) + STICK_RANGE
+        return self.lut[min(max(index, 0), 2 * STICK_RANGE)]
+
+
+class JoystickCalibrator:
+    """Both axes of the mouse-look joystick."""
+
+    def __init__(self, sensitivity=1.0, dead_zone=START_DEAD_ZONE):
+        full_scale = FULL_SCALE_PIXELS * sensitivity
+        self.x = AxisCalibrator(full_scale, dead_zone)
+        self.y = AxisCalibrator(full_scale, dead_zone)
+
+    def update(self, stick_x, stick_y):
+        """
+        Learns from one joystick packet and returns (move_x, move_y, changed),
+        changed being True when either axis was re-calibrated.
+        """
+        changed = self.x.observe(stick_x)
+        changed = self.y.observe(stick_y) or changed
+        return self.x.shape(stick_x), self.y.shape(stick_y), changed
+
+    def describe(self):
+        """One line for the console."""
+        def axis(a):
+            noise = f" noise {a.noise:.1f}" if a.noise is not None else ""
+            return f"centre {a.center:+.1f}{noise} dead zone {a.dead_zone}"
+        return f"JOYSTICK: X {axis(self.x)} | Y {axis(self.y)}"
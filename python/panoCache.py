@@ -0,0 +1,522 @@
+# panoCache.py - Local Panorama Cache with Prefetching Along the Direction of Travel
+# Every step to a new panorama waits for its metadata and imagery to download. This local
+# HTTP proxy keeps what was downloaded in a size-bounded disk cache and fetches the next
+# panoramas ahead of the rider while the current one is being looked at:
+#
+#   python panoCache.py --upstream https://maps.googleapis.com
+#   then point the viewer at http://localhost:8766/maps/api/streetview?...  (instead of the upstream host)
+#
+# It is a standalone tool for viewers built on the Street View Static API (image and metadata
+# requests). streetView.html and the bridge use the Maps JavaScript API, which loads its
+# imagery through its own tile URLs and cannot be pointed at this proxy, so the bridge does
+# not start it.
+#
+# - DiskLRUCache: one file per response, least recently used evicted past CACHE_MAX_MB.
+# - FetchPool: a few worker threads, each keeping one keep-alive connection per host.
+# - Prefetching learns from the viewer's own Street View (Static API) requests: where it is,
+#   where it looks and which image parameters it uses. The riding speed (--speed, or
+#   odometry() from a caller that knows it) sets how far ahead to fetch (PREFETCH_SECONDS
+#   of riding); a route_ahead function gives the exact road ahead, otherwise it
+#   extrapolates straight along the heading. Metadata is fetched first, and
+#   the image by its pano id, which is what a viewer asks for after its own metadata lookup.
+# - Metrics: hit rate (and how many hits prefetching earned) and upstream fetch latency,
+#   printed by summary() and served as JSON at /metrics.
+
+import argparse
+import hashlib
+import http.client
+import json
+import math
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# --- CONFIGURATION ---
+CACHE_PORT = 8766
+UPSTREAM = 'https://maps.googleapis.com'
+CACHE_FOLDER = 'panoCache'
+CACHE_MAX_MB = 500
+FETCH_WORKERS = 4               # Parallel upstream fetches
+FETCH_TIMEOUT_SECONDS = 10.0
+PANO_SPACING_METERS = 10.0      # Typical distance between Street View panoramas
+PREFETCH_SECONDS = 6.0          # Fetch as far ahead as the rider covers in this time...
+PREFETCH_MIN_METERS = 20.0      # ...but at least this far
+PREFETCH_MAX_METERS = 100.0     # ...and at most this far
+LOCATION_DECIMALS = 5           # Cache key rounding of 'location=lat,lng' (~1 m)
+IMAGE_PATH = '/maps/api/streetview'
+METADATA_PATH = '/maps/api/streetview/metadata'
+LATENCY_HISTORY = 500
+PREFETCHED_HISTORY = 2000       # Prefetched keys remembered for the hit statistics
+
+EARTH_RADIUS_METERS = 6371008.8
+
+
+def offset_position(lat, lng, heading, meters):
+    """The point 'meters' away from (lat, lng) toward 'heading' (flat earth, fine for < 1 km)."""
+    rad = math.radians(heading)
+    dlat = meters * math.cos(rad) / EARTH_RADIUS_METERS
+    dlng = meters * math.sin(rad) / (EARTH_RADIUS_METERS * math.cos(math.radians(lat)))
+    return lat + math.degrees(dlat), lng + math.degrees(dlng)
+
+
+def parse_location(value):
+    """'lat,lng' -> (lat, lng), or None for an address or pano id."""
+    try:
+        lat, lng = (float(v) for v in value.split(','))
+    except (ValueError, AttributeError):
+        return None
+    return lat, lng
+
+
+def cache_key(path, query):
+    """
+    Cache key of a request: the path and the sorted query, with locations rounded to
+    LOCATION_DECIMALS, so the prefetcher's and the viewer's URLs for a spot are the same.
+    """
+    params = []
+    for name, value in sorted(parse_qsl(query, keep_blank_values=True)):
+        if name == 'location':
+            location = parse_location(value)
+            if location is not None:
+                value = f"{location[0]:.{LOCATION_DECIMALS}f},{location[1]:.{LOCATION_DECIMALS}f}"
+        params.append((name, value))
+    return f"{path}?{urlencode(params)}"
+
+
+class DiskLRUCache:
+    """Responses on disk, least recently used evicted first. Thread-safe."""
+
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=CACHE_MAX_MB * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.index = OrderedDict()      # file name -> size, least recently used first
+        self.total_bytes = 0
+        os.makedirs(folder, exist_ok=True)
+        # Pick up an earlier session's cache, oldest use first (get() touches the files)
+        entries = []
+        for name in os.listdir(folder):
+            if name.endswith('.bin'):
+                st = os.stat(os.path.join(folder, name))
+                entries.append((st.st_mtime, name, st.st_size))
+        for _, name, size in sorted(entries):
+            self.index[name] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _name(self, key):
+        return hashlib.sha1(key.encode('utf-8')).hexdigest() + '.bin'
+
+    def get(self, key):
+        """Returns (content_type, body) or None."""
+        name = self._name(key)
+        with self.lock:
+            if name not in self.index:
+                return None
+            self.index.move_to_end(name)
+        path = os.path.join(self.folder, name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.total_bytes -= self.index.pop(name, 0)
+            return None
+        content_type, _, body = data.partition(b'\n')
+        return content_type.decode('ascii'), body
+
+    def put(self, key, content_type, body):
+        name = self._name(key)
+        data = content_type.encode('ascii', errors='replace') + b'\n' + body
+        if len(data) > self.max_bytes:
+            return
+        path = os.path.join(self.folder, name)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)            # Readers never see a half-written file
+        with self.lock:
+            self.total_bytes += len(data) - self.index.pop(name, 0)
+            self.index[name] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.index:
+            name, size = self.index.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.folder, name))
+            except OSError:
+                pass
+
+    def __contains__(self, key):
+        with self.lock:
+            return self._name(key) in self.index
+
+    def __len__(self):
+        with self.lock:
+            return len(self.index)
+
+
+class FetchPool:
+    """
+    Upstream GETs on FETCH_WORKERS threads. Each thread keeps one keep-alive connection per
+    host, and a URL already being fetched is not fetched twice (both callers share the result).
+    """
+
+    def __init__(self, workers=FETCH_WORKERS, timeout=FETCH_TIMEOUT_SECONDS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch')
+        self.timeout = timeout
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.in_flight = {}             # key -> Future
+        self.latencies = deque(maxlen=LATENCY_HISTORY)
+        self.connections_opened = 0
+        self.fetches = 0
+        self.errors = 0
+
+    def submit(self, url, key=None):
+        """
+        Future of (status, content_type, body) for a GET of url. Requests with the same key
+        (default: the url) share one fetch. Raises RuntimeError once the pool is closed.
+        """
+        key = key or url
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is None:
+                future = self.executor.submit(self._fetch, url)
+                self.in_flight[key] = future
+                future.add_done_callback(lambda f, key=key: self._done(key))
+            return future
+
+    def _done(self, key):
+        with self.lock:
+            self.in_flight.pop(key, None)
+
+    def _connection(self, scheme, netloc):
+        connections = getattr(self.local, 'connections', None)
+        if connections is None:
+            connections = self.local.connections = {}
+        conn = connections.get((scheme, netloc))
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conn = connections[(scheme, netloc)] = cls(netloc, timeout=self.timeout)
+            with self.lock:
+                self.connections_opened += 1
+        return conn
+
+    def _fetch(self, url):
+        parts = urlsplit(url)
+        target = parts.path + ('?' + parts.query if parts.query else '')
+        start = time.perf_counter()
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request('GET', target)
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (OSError, http.client.HTTPException):
+                # A kept-alive connection the server closed meanwhile: reconnect once
+                conn.close()
+                del self.local.connections[(parts.scheme, parts.netloc)]
+                if attempt:
+                    with self.lock:
+                        self.errors += 1
+                    raise
+        with self.lock:
+            self.fetches += 1
+            self.latencies.append(time.perf_counter() - start)
+        return response.status, response.getheader('Content-Type', 'application/octet-stream'), body
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Prefetcher:
+    """Plans which panoramas to fetch ahead from the viewer's requests and the odometry."""
+
+    def __init__(self, proxy, route_ahead=None):
+        self.proxy = proxy
+        self.route_ahead = route_ahead  # Optional: meters ahead -> (lat, lng, heading), None off the route
+        self.lock = threading.Lock()
+        self.image_params = None        # The viewer's last image request, minus location / pano
+        self.metadata_params = None
+        self.location = None            # (lat, lng) the viewer last asked for
+        self.heading = None
+        self.distance_at_location = 0.0
+        self.distance = 0.0             # Odometer (meters)
+        self.speed = 0.0                # m/s
+        self.planned_distance = None
+
+    def saw_request(self, path, params):
+        """Learns from one viewer request."""
+        location = parse_location(params.get('location'))
+        with self.lock:
+            rest = {k: v for k, v in params.items() if k not in ('location', 'pano')}
+            if path == IMAGE_PATH:
+                self.image_params = rest
+                if 'heading' in params:
+                    try:
+                        self.heading = float(params['heading'])
+                    except ValueError:
+                        pass
+            elif path == METADATA_PATH:
+                self.metadata_params = rest
+            if location is not None:
+                self.location = location
+                self.distance_at_location = self.distance
+                self.planned_distance = None
+        self.plan()
+
+    def odometry(self, distance, speed):
+        """The bridge's odometer (meters) and speed (m/s); plans again every PANO_SPACING_METERS."""
+        with self.lock:
+            self.distance = distance
+            self.speed = speed
+            due = self.planned_distance is None or distance - self.planned_distance >= PANO_SPACING_METERS
+        if due:
+            self.plan()
+
+    def lookahead(self):
+        return min(PREFETCH_MAX_METERS, max(PREFETCH_MIN_METERS, self.speed * PREFETCH_SECONDS))
+
+    def points_ahead(self):
+        """(lat, lng, heading) every PANO_SPACING_METERS up to the lookahead distance."""
+        with self.lock:
+            if self.metadata_params is None or (self.location is None and self.route_ahead is None):
+                return []
+            self.planned_distance = self.distance
+            travelled = self.distance - self.distance_at_location
+            location, heading, lookahead = self.location, self.heading, self.lookahead()
+        points = []
+        steps = int(lookahead // PANO_SPACING_METERS)
+        for i in range(1, steps + 1):
+            ahead = i * PANO_SPACING_METERS
+            point = self.route_ahead(ahead) if self.route_ahead is not None else None
+            if point is not None:
+                points.append(point)
+            elif location is not None and heading is not None:
+                lat, lng = offset_position(location[0], location[1], heading, travelled + ahead)
+                points.append((lat, lng, heading))
+        return points
+
+    def plan(self):
+        for lat, lng, heading in self.points_ahead():
+            params = dict(self.metadata_params)
+            params['location'] = f"{lat:.{LOCATION_DECIMALS}f},{lng:.{LOCATION_DECIMALS}f}"
+            if cache_key(METADATA_PATH, urlencode(params)) in self.proxy.pool.in_flight:
+                continue
+            # Already cached metadata still goes through prefetch(): its image may have been evicted
+            self.proxy.prefetch(METADATA_PATH, params, lambda meta, heading=heading: self._image(meta, heading))
+
+    def _image(self, metadata_body, heading):
+        # Metadata arrived: prefetch the image of that pano id, looking the way the viewer looks
+        try:
+            meta = json.loads(metadata_body)
+        except ValueError:
+            return
+        if meta.get('status') != 'OK' or 'pano_id' not in meta:
+            return
+        with self.lock:
+            if self.image_params is None:
+                return
+            params = dict(self.image_params)
+            look = self.heading if self.heading is not None else heading
+        params['pano'] = meta['pano_id']
+        params['heading'] = f"{look:g}"
+        key = cache_key(IMAGE_PATH, urlencode(params))
+        if key in self.proxy.cache or key in self.proxy.pool.in_flight:
+            return
+        self.proxy.prefetch(IMAGE_PATH, params)
+
+
+class PanoramaProxy:
+    """The caching proxy: a threading HTTP server in front of FetchPool and DiskLRUCache."""
+
+    def __init__(self, upstream=UPSTREAM, port=CACHE_PORT, cache=None, pool=None, route_ahead=None,
+                 host='127.0.0.1'):
+        self.upstream = upstream.rstrip('/')
+        self.cache = cache if cache is not None else DiskLRUCache()
+        self.pool = pool if pool is not None else FetchPool()
+        self.prefetcher = Prefetcher(self, route_ahead)
+        self.lock = threading.Lock()
+        self.prefetched = OrderedDict()  # Keys stored by prefetching and not requested yet (oldest first)
+        self.requests = self.hits = self.prefetch_hits = 0
+        self.prefetches = 0
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'   # Keep-alive toward the viewer too
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out as separate writes: without this, Nagle's algorithm
+                # and the viewer's delayed ACK hold every cached reply back by ~40 ms
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                proxy._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.pool.close()
+
+    def odometry(self, distance, speed):
+        self.prefetcher.odometry(distance, speed)
+
+    def _handle(self, handler):
+        parts = urlsplit(handler.path)
+        if parts.path == '/metrics':
+            body = json.dumps(self.metrics()).encode('utf-8')
+            self._reply(handler, 200, 'application/json', body)
+            return
+
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+        key = cache_key(parts.path, parts.query)
+        with self.lock:
+            self.requests += 1
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self.lock:
+                self.hits += 1
+                if self.prefetched.pop(key, None) is not None:
+                    self.prefetch_hits += 1
+            self._reply(handler, 200, *cached)
+        else:
+            try:
+                # A prefetch of the same panorama already on its way is joined, not repeated
+                status, content_type, body = self.pool.submit(self.upstream + handler.path, key).result()
+            except (OSError, http.client.HTTPException, RuntimeError) as e:
+                self._reply(handler, 502, 'text/plain', f"upstream: {e}".encode('utf-8'))
+                return
+            if status == 200:
+                self.cache.put(key, content_type, body)
+            self._reply(handler, status, content_type, body)
+        self.prefetcher.saw_request(parts.path, params)
+
+    def _reply(self, handler, status, content_type, body):
+        try:
+            handler.send_response(status)
+            handler.send_header('Content-Type', content_type)
+            handler.send_header('Content-Length', str(len(body)))
+            handler.send_header('Access-Control-Allow-Origin', '*')
+            handler.end_headers()
+            handler.wfile.write(body)
+        except OSError:
+            pass                        # The viewer went away
+
+    def prefetch(self, path, params, then=None):
+        """Fetches path?params into the cache in the background; then(body) once it is there."""
+        query = urlencode(params)
+        key = cache_key(path, query)
+        if key in self.cache:
+            if then is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    then(cached[1])
+            return
+        try:
+            future = self.pool.submit(f"{self.upstream}{path}?{query}", key)
+        except RuntimeError:
+            return                      # Shutting down
+        with self.lock:
+            self.prefetches += 1
+
+        def done(f):
+            try:
+                status, content_type, body = f.result()
+            except Exception:
+                return
+            if status != 200:
+                return
+            self.cache.put(key, content_type, body)
+            with self.lock:
+                self.prefetched[key] = True
+                self.prefetched.move_to_end(key)
+                if len(self.prefetched) > PREFETCHED_HISTORY:
+                    self.prefetched.popitem(last=False)
+            if then is not None:
+                then(body)
+
+        future.add_done_callback(done)
+
+    def metrics(self):
+        with self.lock:
+            requests, hits, prefetch_hits, prefetches = self.requests, self.hits, self.prefetch_hits, self.prefetches
+        latencies = sorted(self.pool.latencies)
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1) if latencies else None
+
+        return {
+            'requests': requests,
+            'hits': hits,
+            'hit_rate': round(hits / requests, 3) if requests else None,
+            'prefetch_hits': prefetch_hits,
+            'prefetches': prefetches,
+            'upstream_fetches': self.pool.fetches,
+            'upstream_errors': self.pool.errors,
+            'upstream_connections': self.pool.connections_opened,
+            'fetch_ms_median': pct(0.5),
+            'fetch_ms_p95': pct(0.95),
+            'cached_items': len(self.cache),
+            'cached_mb': round(self.cache.total_bytes / 1048576, 1),
+        }
+
+    def summary(self):
+        """One line for the console."""
+        m = self.metrics()
+        if not m['requests']:
+            return f"PANO CACHE: no requests yet (http://localhost:{self.port}/)"
+        text = (f"PANO CACHE: {m['hit_rate'] * 100:.0f}% hits of {m['requests']} "
+                f"({m['prefetch_hits']} thanks to prefetching)")
+        if m['fetch_ms_median'] is not None:
+            text += f", upstream {m['fetch_ms_median']:.0f} ms median / {m['fetch_ms_p95']:.0f} ms p95"
+        return text + f", {m['cached_mb']:.0f} MB cached"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local panorama cache with prefetching")
+    parser.add_argument('--upstream', default=UPSTREAM, help="Where the viewer's requests really go")
+    parser.add_argument('--port', type=int, default=CACHE_PORT)
+    parser.add_argument('--cache-dir', default=CACHE_FOLDER)
+    parser.add_argument('--max-mb', type=float, default=CACHE_MAX_MB)
+    parser.add_argument('--speed', type=float, default=5.0, help="Assumed riding speed (m/s) without the bridge")
+    args = parser.parse_args()
+
+    proxy = PanoramaProxy(args.upstream, args.port, DiskLRUCache(args.cache_dir, int(args.max_mb * 1048576)))
+    proxy.odometry(0.0, args.speed)
+    proxy.start()
+    print(f"Panorama cache on http://localhost:{proxy.port}/ -> {proxy.upstream} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(30)
+            print(proxy.summary())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(proxy.summary())
+        proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
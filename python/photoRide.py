@@ -0,0 +1,280 @@
+# photoRide.py - Photo Sequence Ride Mode
+# Rides through a folder of sequential photos (e.g. pics/, or a camera's interval shots of
+# a ride): every PHOTO_SPACING_METERS pedalled shows the next photo, or - when the photos are
+# geotagged - the photo taken that far along the photographed route.
+#
+#   python rollerInterface30.py --photos pics/ [--photo-spacing 5]
+#
+# - PhotoIndex: names and distances of the photos, built once per folder and stored in it as
+#   photoIndex.json (GPS positions come from the EXIF headers, which is all that is read), so
+#   a folder of thousands of photos starts at once the next time.
+# - Photos are decoded lazily at display size: JPEG's draft mode lets the decoder produce a
+#   1/2, 1/4 or 1/8 scale image directly, far cheaper than decoding 12 MP and shrinking.
+# - PhotoPlayer: PREFETCH_PHOTOS ahead are decoded on a worker pool, and the decoded photos
+#   live in an LRU bounded by CACHE_MB. The display never waits: until the next photo is
+#   ready, the current one stays up.
+#
+# Needs pillow (pip install pillow) to read the photos and OpenCV for the window (videoRide.py).
+
+import bisect
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# --- CONFIGURATION ---
+PHOTO_SPACING_METERS = 5.0      # Distance per photo when they have no GPS positions
+DISPLAY_SIZE = (1280, 720)      # Photos are decoded to fit this box
+PREFETCH_PHOTOS = 6             # Decoded ahead of the one on screen
+DECODE_WORKERS = 3
+CACHE_MB = 200                  # Decoded photos kept in memory
+INDEX_FILE = 'photoIndex.json'
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+EARTH_RADIUS_METERS = 6371008.8
+GPS_IFD = 0x8825
+
+
+def _gps_degrees(values, ref):
+    degrees, minutes, seconds = (float(v) for v in values)
+    value = degrees + minutes / 60.0 + seconds / 3600.0
+    return -value if ref in ('S', 'W') else value
+
+
+def read_gps(image):
+    """(lat, lon) from a PIL image's EXIF header, or None."""
+    try:
+        gps = image.getexif().get_ifd(GPS_IFD)
+        return _gps_degrees(gps[2], gps[1]), _gps_degrees(gps[4], gps[3])
+    except (KeyError, TypeError, ValueError, ZeroDivisionError, AttributeError):
+        return None
+
+
+def path_distances(points):
+    """Cumulative haversine distance along (lat, lon) points, starting at 0."""
+    p = np.radians(np.asarray(points, dtype=np.float64))
+    lat1, lat2 = p[:-1, 0], p[1:, 0]
+    a = np.sin((lat2 - lat1) * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((p[1:, 1] - p[:-1, 1]) * 0.5) ** 2
+    return np.concatenate(([0.0], np.cumsum(2.0 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0))))))
+
+
+class PhotoIndex:
+    """The photos of a folder in order, with the distance along the ride of each."""
+
+    def __init__(self, folder, names, distances, geotagged, skipped=()):
+        self.folder = folder
+        self.names = names
+        self.distances = distances      # Ascending list, meters
+        self.geotagged = geotagged
+        self.skipped = list(skipped)    # Files that are not readable images, left out of the ride
+
+    @staticmethod
+    def _listing(folder):
+        names = sorted(n for n in os.listdir(folder) if n.lower().endswith(PHOTO_EXTENSIONS))
+        listing = []
+        for name in names:
+            st = os.stat(os.path.join(folder, name))
+            listing.append([name, st.st_size, st.st_mtime_ns])
+        return listing
+
+    @classmethod
+    def load(cls, folder, spacing=PHOTO_SPACING_METERS):
+        """The folder's stored index if the photos did not change, else a new one (stored for next time)."""
+        listing = cls._listing(folder)
+        if not listing:
+            raise ValueError(f"No photos in {folder}")
+        index_path = os.path.join(folder, INDEX_FILE)
+        try:
+            with open(index_path) as f:
+                stored = json.load(f)
+            if stored['photos'] == listing:
+                return cls._from_gps(folder, listing, stored['gps'], stored.get('skipped', []), spacing)
+        except (OSError, ValueError, KeyError):
+            pass
+
+        from PIL import Image
+        gps = []
+        skipped = []
+        for name, _, _ in listing:
+            try:
+                with Image.open(os.path.join(folder, name)) as image:     # Reads the header only
+                    gps.append(read_gps(image))
+            except OSError:             # Not an image after all (PIL.UnidentifiedImageError), or unreadable
+                skipped.append(name)
+        try:
+            with open(index_path, 'w') as f:
+                json.dump({'photos': listing, 'gps': gps, 'skipped': skipped}, f)
+        except OSError:
+            pass                        # Read-only folder: build again next time
+        return cls._from_gps(folder, listing, gps, skipped, spacing)
+
+    @classmethod
+    def _from_gps(cls, folder, listing, gps, skipped, spacing):
+        skip = set(skipped)
+        names = [name for name, _, _ in listing if name not in skip]
+        if not names:
+            raise ValueError(f"No readable photos in {folder}")
+        if len(names) > 1 and all(g is not None for g in gps):
+            distances = path_distances(gps)
+            if distances[-1] > 0:
+                return cls(folder, names, distances.tolist(), True, skipped)
+        # No (or incomplete) GPS: evenly spaced
+        return cls(folder, names, [i * spacing for i in range(len(names))], False, skipped)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def total_length(self):
+        return self.distances[-1]
+
+    def photo_at(self, distance):
+        """Number of the photo to show after 'distance' meters."""
+        return max(0, bisect.bisect_right(self.distances, distance) - 1)
+
+    def path(self, number):
+        return os.path.join(self.folder, self.names[number])
+
+
+def decode_photo(path, size=DISPLAY_SIZE):
+    """Decodes a photo to fit 'size', as a BGR array for OpenCV."""
+    from PIL import Image, ImageOps
+    with Image.open(path) as image:
+        # Phone photos are often stored sideways with an EXIF rotation: ask draft() for
+        # enough pixels either way round
+        side = max(size)
+        image.draft('RGB', (side, side))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        image.thumbnail(size)
+        return np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+
+
+class ImageLRU:
+    """Decoded photos, least recently used dropped first once over max_bytes. Thread-safe."""
+
+    def __init__(self, max_bytes=CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.images = OrderedDict()
+        self.total_bytes = 0
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            image = self.images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self.images.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        with self.lock:
+            old = self.images.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old.nbytes
+            self.images[key] = image
+            self.total_bytes += image.nbytes
+            while self.total_bytes > self.max_bytes and len(self.images) > 1:
+                _, dropped = self.images.popitem(last=False)
+                self.total_bytes -= dropped.nbytes
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.images
+
+
+class PhotoPlayer:
+    """
+    Shows the photo for the distance ridden, decoding ahead of it.
+    Same update(speed, dt) / summary() / close() as videoRide.VideoPlayer.
+    """
+
+    def __init__(self, index, decode=decode_photo, prefetch=PREFETCH_PHOTOS, workers=DECODE_WORKERS,
+                 cache=None, log=None):
+        self.index = index
+        self.log = log                  # Object with write(text, *args) (bridgeLog.BridgeLog), None = print
+        self.decode = decode
+        self.prefetch = prefetch
+        self.cache = cache if cache is not None else ImageLRU()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='photo')
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.failed = set()             # Photos that could not be read: tried once only
+        self.distance = 0.0
+        self.shown = None
+        self.waits = 0                  # Updates that wanted a photo not decoded yet
+        self.decoded = 0
+        self.errors = 0
+
+    def update(self, speed, dt):
+        """
+        Advances by speed (m/s) x dt and returns (photo_number, image) to show, or None while
+        the first photo is still being decoded.
+        """
+        self.distance = min(self.index.total_length, self.distance + speed * dt)
+        wanted = self.index.photo_at(self.distance)
+        self._schedule(wanted)
+        image = self.cache.get(wanted)
+        if image is not None:
+            self.shown = wanted
+            return wanted, image
+        if wanted != self.shown:
+            self.waits += 1
+        if self.shown is not None:
+            image = self.cache.get(self.shown)
+            if image is not None:
+                return self.shown, image
+        return None
+
+    def _schedule(self, wanted):
+        last = min(len(self.index) - 1, wanted + self.prefetch)
+        with self.lock:
+            for number in range(wanted, last + 1):
+                if number in self.pending or number in self.failed or number in self.cache:
+                    continue
+                self.pending.add(number)
+                self.pool.submit(self._decode, number)
+
+    def _decode(self, number):
+        try:
+            if number >= self.index.photo_at(self.distance):     # Still ahead: not ridden past
+                self.cache.put(number, self.decode(self.index.path(number)))
+                self.decoded += 1
+        except (OSError, ValueError) as e:
+            self.errors += 1
+            with self.lock:
+                self.failed.add(number)
+            if self.log is not None:
+                self.log.write("PHOTOS: could not read {}: {}", self.index.names[number], e)
+            else:
+                print(f"PHOTOS: could not read {self.index.names[number]}: {e}")
+        finally:
+            with self.lock:
+                self.pending.discard(number)
+
+    def finished(self):
+        return self.distance >= self.index.total_length
+
+    def summary(self):
+        return (f"PHOTOS: {self.distance / 1000.0:.2f} km, photo {(self.shown or 0) + 1}/{len(self.index)}, "
+                f"{self.decoded} decoded, {self.errors} unreadable, {self.waits} waits, "
+                f"cache {self.cache.total_bytes / 1048576:.0f} MB")
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def open_photos(folder, spacing=PHOTO_SPACING_METERS, log=None):
+    """PhotoPlayer for a folder of photos (raises ValueError / OSError / ImportError)."""
+    if not os.path.isdir(folder):
+        raise ValueError(f"{folder} is not a folder")
+    index = PhotoIndex.load(folder, spacing)
+    kind = "geotagged" if index.geotagged else f"every {spacing:g} m"
+    print(f"Photos: {len(index)} in {folder}, {kind}, {index.total_length / 1000.0:.2f} km")
+    if index.skipped:
+        print(f"Photos: skipped {len(index.skipped)} unreadable files, e.g. {index.skipped[0]}")
+    return PhotoPlayer(index, log=log)
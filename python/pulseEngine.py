@@ -0,0 +1,228 @@
+# pulseEngine.py - PC-Side Pulse Engine
+# Turns raw magnet pulse timestamps into RPM on the PC instead of in the firmware.
+#
+# - N magnets per revolution: every pulse gives a new speed estimate, so a wheel with
+#   4 magnets reports 4x as often and a stop is noticed 4x sooner.
+# - Per-magnet normalization: magnets are never perfectly evenly spaced, so each magnet's
+#   share of a revolution is learned and its interval is scaled by that share.
+# - Two sensors (roller/wheel + crank): the pulse streams are merged by timestamp with
+#   a heap merge and the crank is scaled to roller RPM with a learned gear ratio.
+#   A P,0 and a P,1 line from the same packet overlap in time, so the bridge feeds the
+#   pulse lines that arrive together as one batch and feed() merges them.
+#
+# Pulse line format from the Receiver (timestamps in micros() of the transmitter):
+#   P,<sensor>,<t_us>[,<t_us>...]      e.g.  P,0,1234567,1259012
+
+import heapq
+
+# --- CONFIGURATION ---
+# Magnets per revolution for each sensor id (0 = roller/wheel, the reference; 1 = crank)
+SENSOR_MAGNETS = {0: 1, 1: 1}
+REFERENCE_SENSOR = 0
+
+# No pulse for this long = stopped. 500 ms matches the firmware for the roller;
+# a crank turns far slower, so it gets a longer timeout (1.5 s = 40 RPM with one magnet).
+SENSOR_STOP_TIMEOUT_US = {0: 500000, 1: 1500000}
+DEFAULT_STOP_TIMEOUT_US = 500000
+DEBOUNCE_US = 1000              # Pulses closer than this are switch bounce
+MAGNET_LEARN_RATE = 0.05        # EWMA rate for per-magnet spacing
+RATIO_LEARN_RATE = 0.1          # EWMA rate for the crank-to-roller ratio
+MISSED_PULSE_FACTOR = 1.8       # Missed pulse: longer than the expected gap + (this - 1) x the next gap
+MICROS_WRAP = 0xFFFFFFFF        # micros() is an unsigned long and wraps every ~71 minutes
+MICROS_HALF = 0x80000000        # A wrapped difference below this means 'later'
+
+
+def merge_pulse_streams(*streams, since_us=0):
+    """
+    Merges several time-ordered pulse streams into one, ordered by timestamp.
+
+    :param streams: iterables of (t_us, sensor_id) tuples, each already sorted by time.
+    :param since_us: a time before every pulse, so streams crossing a micros() wrap stay in order.
+    """
+    return heapq.merge(*streams, key=lambda pulse: (pulse[0] - since_us) & MICROS_WRAP)
+
+
+class PulseSensor:
+    """One Hall sensor with one or more magnets."""
+
+    def __init__(self, sensor_id, magnets, stop_timeout_us=DEFAULT_STOP_TIMEOUT_US):
+        self.sensor_id = sensor_id
+        self.magnets = magnets
+        self.stop_timeout_us = stop_timeout_us
+        self.last_pulse_us = None
+        self.magnet_index = 0
+        # Share of a full revolution covered by the gap BEFORE each magnet (learned)
+        self.share = [1.0 / magnets] * magnets
+        self.recent = [0] * magnets   # Last interval ending at each magnet
+        self.filled = 0               # Intervals seen since the last reset (until all magnets known)
+        self.rpm = 0.0
+
+    def reset(self):
+        """Forgets timing after a stop; magnet spacing is kept."""
+        self.last_pulse_us = None
+        self.filled = 0
+        self.rpm = 0.0
+
+    def pulse(self, t_us):
+        """
+        Registers one pulse and returns the new RPM estimate (or None if it was ignored).
+        """
+        last = self.last_pulse_us
+        if last is None:
+            self.last_pulse_us = t_us
+            return None
+
+        interval = (t_us - last) & MICROS_WRAP
+        if interval < DEBOUNCE_US:
+            return None
+        self.last_pulse_us = t_us
+
+        if interval > self.stop_timeout_us:
+            # Restarting from a stop: the old phase is meaningless
+            self.filled = 0
+            self.rpm = 0.0
+            return None
+
+        k = (self.magnet_index + 1) % self.magnets
+        expected = self.recent[k] if self.filled >= self.magnets else 0
+        # Uneven magnets: a short gap followed by a missed one can still be under 2x the short gap
+        following = self.recent[(k + 1) % self.magnets]
+        if expected and interval > expected + following * (MISSED_PULSE_FACTOR - 1.0) and self.magnets > 1:
+            # A magnet was missed: skip ahead in the magnet sequence but do not learn from it
+            self.magnet_index = self._magnet_after(k, interval)
+            self.filled = 0
+            return None
+
+        self.magnet_index = k
+        self.recent[k] = interval
+        self.filled += 1
+
+        if self.filled >= self.magnets:
+            revolution = sum(self.recent)
+            observed = interval / revolution
+            self.share[k] += (observed - self.share[k]) * MAGNET_LEARN_RATE
+            total = sum(self.share)
+            self.share = [s / total for s in self.share]
+
+        # Scale this magnet's interval up to a full revolution
+        self.rpm = 60000000.0 * self.share[k] / interval
+        return self.rpm
+
+    def _magnet_after(self, k, interval):
+        """
+        The magnet that ends a long interval starting after the current one: the number of
+        gaps (from magnet k on) whose recent lengths add up closest to the interval.
+        """
+        best, best_error = k, interval
+        total = 0
+        j = k
+        for _ in range(2 * self.magnets):
+            total += self.recent[j]
+            if abs(total - interval) < best_error:
+                best, best_error = j, abs(total - interval)
+            j = (j + 1) % self.magnets
+        return best
+
+    def rpm_at(self, now_us):
+        """
+        RPM, capped by the time since the last pulse: if no pulse has arrived for a while,
+        the wheel cannot be turning faster than one magnet gap in that time.
+        """
+        if self.last_pulse_us is None:
+            return 0.0
+        waited = (now_us - self.last_pulse_us) & MICROS_WRAP
+        if waited > self.stop_timeout_us:
+            self.reset()
+            return 0.0
+        if waited > 0:
+            next_share = self.share[(self.magnet_index + 1) % self.magnets]
+            bound = 60000000.0 * next_share / waited
+            if bound < self.rpm:
+                return bound
+        return self.rpm
+
+
+class PulseEngine:
+    """Fuses the roller/wheel and crank sensors into one roller-RPM estimate."""
+
+    def __init__(self, sensor_magnets=None):
+        sensor_magnets = sensor_magnets or SENSOR_MAGNETS
+        self.sensors = {
+            sid: PulseSensor(sid, m, SENSOR_STOP_TIMEOUT_US.get(sid, DEFAULT_STOP_TIMEOUT_US))
+            for sid, m in sensor_magnets.items()
+        }
+        self.ratio = {sid: (1.0 if sid == REFERENCE_SENSOR else None) for sid in self.sensors}
+        self.latest_us = None           # Transmitter clock of the newest pulse (wraps like micros())
+
+    def feed(self, pulses):
+        """
+        Processes pulses in timestamp order. Pulses of several sensors (e.g. a P,0 and a P,1
+        line) are merged by timestamp first.
+
+        :param pulses: iterable of (t_us, sensor_id), sorted by time within each sensor.
+        """
+        streams = {}
+        for pulse in pulses:
+            streams.setdefault(pulse[1], []).append(pulse)
+        if len(streams) > 1:
+            # Any pulse of the batch will do as the reference: the batch spans far less than a wrap
+            first = next(iter(streams.values()))[0][0]
+            pulses = merge_pulse_streams(*streams.values(), since_us=first - MICROS_HALF // 2)
+        else:
+            pulses = next(iter(streams.values()), [])
+        sensors = self.sensors
+        reference = sensors.get(REFERENCE_SENSOR)
+        for t_us, sensor_id in pulses:
+            sensor = sensors.get(sensor_id)
+            if sensor is None:
+                continue
+            rpm = sensor.pulse(t_us)
+            if self.latest_us is None or ((t_us - self.latest_us) & MICROS_WRAP) < MICROS_HALF:
+                self.latest_us = t_us
+            # Learn the gear ratio while both sensors are turning
+            if rpm and sensor_id != REFERENCE_SENSOR and reference is not None and reference.rpm > 0:
+                observed = reference.rpm_at(t_us) / rpm
+                ratio = self.ratio[sensor_id]
+                self.ratio[sensor_id] = observed if ratio is None else ratio + (observed - ratio) * RATIO_LEARN_RATE
+
+    def clock_us(self, seconds_since_latest):
+        """The transmitter clock this long after the newest pulse (wrapped like micros())."""
+        if self.latest_us is None:
+            return None
+        return (self.latest_us + int(seconds_since_latest * 1000000)) & MICROS_WRAP
+
+    def rpm_at(self, now_us=None):
+        """
+        Roller RPM. The reference sensor is used while it is turning; if it is stopped but
+        the crank is turning (e.g. the first pedal stroke), the scaled crank RPM is used.
+        """
+        if now_us is None:
+            now_us = self.latest_us
+        if now_us is None:
+            return 0.0
+        best = 0.0
+        for sensor_id, sensor in self.sensors.items():
+            ratio = self.ratio[sensor_id]
+            if ratio is None:
+                continue
+            rpm = sensor.rpm_at(now_us) * ratio
+            if sensor_id == REFERENCE_SENSOR and rpm > 0:
+                return rpm
+            if rpm > best:
+                best = rpm
+        return best
+
+
+def parse_pulse_line(line):
+    """
+    Parses 'P,<sensor>,<t_us>[,<t_us>...]' into a list of (t_us, sensor_id),
+    or returns None if the line is not a pulse line.
+    """
+    if not line.startswith('P,'):
+        return None
+    parts = line.split(',')
+    try:
+        sensor_id = int(parts[1])
+        return [(int(p), sensor_id) for p in parts[2:]]
+    except (ValueError, IndexError):
+        return None
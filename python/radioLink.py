@@ -0,0 +1,201 @@
+# radioLink.py - Radio Link Statistics
+# Measures what the NRF24L01 link between the bike and the PC is doing, so radio lag
+# and dropouts can be seen instead of guessed.
+#
+# Every packet from bicyclePartInterface30.ino carries a sequence number and the
+# transmitter's micros() when it was sent. The Receiver stamps its own micros() when the
+# packet arrives and prints one frame line per packet before the RPM / pulse lines:
+#   F,<seq>,<tx_us>,<rx_us>            e.g.  F,1042,81234567,903112
+#
+# - Loss: gaps in the 16-bit sequence; bursts (several packets in a row) are counted apart,
+#   as a burst is what leaves the PC on a stale state.
+# - Duplicates: the same sequence number again (an NRF auto-retry whose ACK was lost).
+# - Latency: the two clocks are never in sync and drift apart by up to ~100 ppm, so the
+#   offset between them is fitted as a line under the fastest packets (the lower envelope)
+#   and each packet's delay is measured above that line plus the shortest possible delay
+#   (airtime, or the serial line time at BAUD_RATE).
+# - A link with no packets for LINK_TIMEOUT_SECONDS is lost: the bike side always sends a
+#   heartbeat, so silence means the radio, not a quiet bike.
+
+from collections import deque
+
+# --- CONFIGURATION ---
+SEQ_MODULO = 0x10000            # 16-bit sequence number in PulsePayload
+MAX_SEQ_GAP = 1000              # A bigger jump means the transmitter restarted, not lost packets
+RECENT_SEQS = 32                # Sequence numbers remembered for duplicate detection
+CLOCK_WINDOW = 256              # Packets used for the clock offset fit
+CLOCK_CHUNKS = 8                # Lower envelope: the fastest packet of each chunk of the window
+LATENCY_WINDOW = 256            # Packets used for the latency percentiles
+RADIO_MIN_LATENCY_US = 450      # TX settling + a 32-byte packet at 1 Mbps
+LINK_TIMEOUT_SECONDS = 3.0      # 3 x the idle heartbeat of TransmitPolicy
+MICROS_WRAP = 0x100000000       # micros() is an unsigned long and wraps every ~71 minutes
+
+
+class ClockFit:
+    """
+    Fits the offset (and drift) between a remote and a local microsecond clock from
+    (remote_us, local_us) pairs and returns how late each pair arrived above the fastest.
+    """
+
+    def __init__(self, window=CLOCK_WINDOW, chunks=CLOCK_CHUNKS):
+        self.points = deque(maxlen=window)   # (remote_us, local_us - remote_us), unwrapped
+        self.chunks = chunks
+        self.slope = 0.0
+        self.intercept = None
+        self._last_remote = None
+        self._remote_base = 0
+        self._last_local = None
+        self._local_base = 0
+
+    def reset(self):
+        self.__init__(self.points.maxlen, self.chunks)
+
+    @staticmethod
+    def _unwrap(value, last, base):
+        if last is not None and value < last and last - value > MICROS_WRAP // 2:
+            base += MICROS_WRAP
+        return base
+
+    def add(self, remote_us, local_us):
+        """Adds a pair and returns its delay above the fitted line in microseconds (>= 0)."""
+        self._remote_base = self._unwrap(remote_us, self._last_remote, self._remote_base)
+        self._local_base = self._unwrap(local_us, self._last_local, self._local_base)
+        self._last_remote, self._last_local = remote_us, local_us
+        x = remote_us + self._remote_base
+        d = local_us + self._local_base - x
+        self.points.append((x, d))
+        self._fit()
+        return max(0.0, d - (self.slope * x + self.intercept))
+
+    def _fit(self):
+        points = self.points
+        size = max(1, len(points) // self.chunks)
+        lows = []
+        for start in range(0, len(points) - size + 1, size):
+            lows.append(min((points[i] for i in range(start, start + size)), key=lambda p: p[1]))
+        if len(lows) < 2:
+            self.slope = 0.0
+            self.intercept = min(p[1] for p in points)
+            return
+        # Least squares line through the chunk minima, then lowered to sit under every point
+        n = len(lows)
+        mx = sum(p[0] for p in lows) / n
+        md = sum(p[1] for p in lows) / n
+        sxx = sum((p[0] - mx) ** 2 for p in lows)
+        slope = sum((p[0] - mx) * (p[1] - md) for p in lows) / sxx if sxx else 0.0
+        intercept = md - slope * mx
+        intercept += min(p[1] - (slope * p[0] + intercept) for p in points)
+        self.slope, self.intercept = slope, intercept
+
+
+def parse_frame_line(line):
+    """
+    Parses 'F,<seq>,<tx_us>,<rx_us>'.
+    Returns (seq, tx_us, rx_us) or None if the line is not a frame line.
+    """
+    if not line.startswith('F,'):
+        return None
+    parts = line.split(',')
+    if len(parts) != 4:
+        return None
+    try:
+        return int(parts[1]), int(parts[2]), int(parts[3])
+    except ValueError:
+        return None
+
+
+def serial_min_latency_us(line_bytes, baud):
+    """Time the Receiver needs to push a line of line_bytes through the serial port (10 bits/byte)."""
+    return line_bytes * 10 * 1000000.0 / baud
+
+
+def percentile(values, fraction):
+    """Simple nearest-rank percentile of a list (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LinkStats:
+    """Loss, burst loss, duplicates and latency of the radio link, from frame lines."""
+
+    def __init__(self, baud):
+        self.baud = baud
+        self.last_seq = None
+        self.recent = deque(maxlen=RECENT_SEQS)
+        self.received = 0
+        self.lost = 0
+        self.duplicates = 0
+        self.bursts = 0              # Gaps of 2 or more packets
+        self.longest_burst = 0
+        self.restarts = 0
+        self.radio_clock = ClockFit()     # transmitter micros() -> receiver micros()
+        self.serial_clock = ClockFit()    # receiver micros() -> PC clock
+        self.radio_latency = deque(maxlen=LATENCY_WINDOW)   # ms
+        self.total_latency = deque(maxlen=LATENCY_WINDOW)   # ms, bike to bridge
+        self.last_frame_time = None
+        self.link_lost = False
+
+    def frame(self, seq, tx_us, rx_us, now, line_bytes=0):
+        """
+        Records one frame line that arrived at perf_counter() time now.
+        Returns False for a duplicate (the packet's lines should be ignored), True otherwise.
+        """
+        self.last_frame_time = now
+        self.link_lost = False
+        if seq in self.recent:
+            self.duplicates += 1
+            return False
+
+        if self.last_seq is not None:
+            gap = (seq - self.last_seq) % SEQ_MODULO
+            if gap > MAX_SEQ_GAP:
+                # Transmitter restarted: its clock and sequence numbers start over
+                self.restarts += 1
+                self.recent.clear()
+                self.radio_clock.reset()
+            elif gap > 1:
+                missing = gap - 1
+                self.lost += missing
+                if missing >= 2:
+                    self.bursts += 1
+                self.longest_burst = max(self.longest_burst, missing)
+        self.last_seq = seq
+        self.recent.append(seq)
+        self.received += 1
+
+        radio_us = self.radio_clock.add(tx_us, rx_us) + RADIO_MIN_LATENCY_US
+        serial_us = (self.serial_clock.add(rx_us, int(now * 1000000) % MICROS_WRAP)
+                     + serial_min_latency_us(line_bytes, self.baud))
+        self.radio_latency.append(radio_us / 1000.0)
+        self.total_latency.append((radio_us + serial_us) / 1000.0)
+        return True
+
+    def silent(self, now):
+        """True once frames were seen but none arrived for LINK_TIMEOUT_SECONDS (reported once)."""
+        if self.last_frame_time is None or self.link_lost:
+            return False
+        if now - self.last_frame_time > LINK_TIMEOUT_SECONDS:
+            self.link_lost = True
+            return True
+        return False
+
+    @property
+    def loss_rate(self):
+        sent = self.received + self.lost
+        return self.lost / sent if sent else 0.0
+
+    def summary(self):
+        """One line for the console."""
+        if not self.received:
+            return "RADIO: no frames yet"
+        text = (f"RADIO: {self.received} pkts | loss {self.loss_rate * 100.0:.1f}% "
+                f"({self.bursts} bursts, longest {self.longest_burst}) | {self.duplicates} dups")
+        if self.restarts:
+            text += f" | {self.restarts} restarts"
+        radio = list(self.radio_latency)
+        total = list(self.total_latency)
+        text += (f" | radio {percentile(radio, 0.5):.1f}/{percentile(radio, 0.95):.1f} ms"
+                 f" | to bridge {percentile(total, 0.5):.1f}/{percentile(total, 0.95):.1f} ms (p50/p95)")
+        return text
@@ -0,0 +1,232 @@
+# rawSamples.py - PC-Side Edge Detection on Raw ADC Samples
+# Works with ino/bicyclePartInterfaceRaw.ino, which streams raw Hall sensor readings
+# in binary blocks instead of detecting pulses in the firmware.
+#
+# - BlockReader: finds and unpacks the binary blocks in the serial byte stream.
+# - EdgeDetector: Schmitt trigger (separate trigger / re-arm levels) vectorized per block,
+#   with sub-sample timing by linear interpolation between the two samples around the crossing.
+# - spectral_cadence: optional rFFT estimate of the pulse rate over the last few seconds.
+#
+# The pulses come out as (t_us, sensor_id) tuples, ready for pulseEngine.PulseEngine.
+
+import struct
+import numpy as np
+
+# --- CONFIGURATION ---
+# Set these from 'python rollerTools.py calibrate --raw capture.bin'
+RAW_TRIGGER_LEVEL = 600     # A pulse starts when the reading rises above this
+RAW_REARM_LEVEL = 560       # ...and the detector re-arms once it falls below this
+RAW_SENSOR_ID = 0           # Sensor id given to the detected pulses (0 = roller)
+SAMPLE_PERIOD_US = 500.0    # Must match SAMPLE_PERIOD_US in the sketch
+
+BLOCK_SYNC = b'\xa5\x5a'
+BLOCK_HEADER = struct.Struct('<2sBBI')
+MAX_SAMPLES_PER_BLOCK = 255
+
+# Spectral cadence
+SPECTRUM_SECONDS = 4.0      # Analysis window
+SPECTRUM_MIN_HZ = 0.2       # 12 pulses per minute
+SPECTRUM_MAX_HZ = 15.0      # 900 pulses per minute
+SPECTRUM_HARMONICS = 3      # Harmonic product spectrum depth (pulse trains are harmonic-rich)
+
+
+class BlockReader:
+    """Reassembles binary sample blocks from arbitrary serial reads."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.last_seq = None
+        self.lost_blocks = 0
+        self.bad_bytes = 0
+
+    def feed(self, data):
+        """
+        Adds bytes and returns the list of complete blocks as (t0_us, samples) with
+        samples a uint16 NumPy array.
+        """
+        buf = self.buffer
+        buf.extend(data)
+        blocks = []
+        pos = 0
+        while True:
+            start = buf.find(BLOCK_SYNC, pos)
+            if start < 0:
+                # Keep a possible half sync byte at the very end
+                keep = len(buf) - 1 if buf.endswith(BLOCK_SYNC[:1]) else len(buf)
+                self.bad_bytes += keep - pos
+                pos = keep
+                break
+            self.bad_bytes += start - pos
+            if len(buf) - start < BLOCK_HEADER.size:
+                pos = start
+                break
+            _, seq, count, t0 = BLOCK_HEADER.unpack_from(buf, start)
+            end = start + BLOCK_HEADER.size + 2 * count
+            if count == 0:
+                pos = start + 1
+                continue
+            if len(buf) < end:
+                pos = start
+                break
+            samples = np.frombuffer(bytes(buf[start + BLOCK_HEADER.size:end]), dtype='<u2')
+            if self.last_seq is not None:
+                self.lost_blocks += (seq - self.last_seq - 1) & 0xFF
+            self.last_seq = seq
+            blocks.append((t0, samples))
+            pos = end
+        del buf[:pos]
+        return blocks
+
+
+class EdgeDetector:
+    """Schmitt-trigger rising-edge detector that keeps its state between blocks."""
+
+    def __init__(self, trigger=RAW_TRIGGER_LEVEL, rearm=RAW_REARM_LEVEL,
+                 sample_period_us=SAMPLE_PERIOD_US, sensor_id=RAW_SENSOR_ID):
+        if rearm >= trigger:
+            raise ValueError("The re-arm level must be below the trigger level.")
+        self.trigger = float(trigger)
+        self.rearm = float(rearm)
+        self.sample_period_us = sample_period_us
+        self.sensor_id = sensor_id
+        self.armed = True           # True = waiting for the reading to rise above the trigger
+        self.last_sample = None     # Last sample of the previous block (for interpolation)
+        self.last_time_us = None
+
+    def process(self, t0_us, samples):
+        """
+        Finds rising edges in one block.
+
+        :return: list of (t_us, sensor_id) with sub-sample interpolated timestamps.
+        """
+        x = samples.astype(np.float64)
+        n = x.size
+        if n == 0:
+            return []
+
+        # Schmitt state per sample: 1 = above trigger, 0 = below re-arm, otherwise keep the
+        # previous state. Forward-fill the last decided state with a running maximum of indices.
+        decided = np.full(n + 1, -1, dtype=np.int8)
+        decided[0] = 0 if self.armed else 1
+        decided[1:][x > self.trigger] = 1
+        decided[1:][x < self.rearm] = 0
+        idx = np.where(decided >= 0, np.arange(n + 1), 0)
+        np.maximum.accumulate(idx, out=idx)
+        state = decided[idx]
+
+        rising = np.flatnonzero((state[1:] == 1) & (state[:-1] == 0))   # index into x
+        self.armed = state[-1] == 0
+
+        # Previous sample for interpolation (the last sample of the last block for i == 0)
+        prev_x = np.empty(n)
+        prev_x[1:] = x[:-1]
+        prev_x[0] = self.last_sample if self.last_sample is not None else x[0]
+        self.last_sample = x[-1]
+
+        if rising.size == 0:
+            return []
+
+        before = prev_x[rising]
+        after = x[rising]
+        span = after - before
+        frac = np.where(span > 0, (self.trigger - before) / np.where(span > 0, span, 1.0), 1.0)
+        np.clip(frac, 0.0, 1.0, out=frac)
+        times = t0_us + (rising - 1 + frac) * self.sample_period_us
+
+        sensor_id = self.sensor_id
+        return [(int(round(t)) & 0xFFFFFFFF, sensor_id) for t in times]
+
+
+def spectral_cadence(samples, sample_period_us=SAMPLE_PERIOD_US):
+    """
+    Estimates the pulse rate (pulses per minute) from a window of raw samples with an rFFT.
+    Uses a harmonic product spectrum so the fundamental wins over the pulse train's
+    strong harmonics, and a parabolic fit around the peak for sub-bin resolution.
+
+    :return: pulses per minute, or 0.0 when no clear periodic signal is found.
+    """
+    x = np.asarray(samples, dtype=np.float64)
+    if x.size < 64:
+        return 0.0
+    x = (x - x.mean()) * np.hanning(x.size)
+    spectrum = np.abs(np.fft.rfft(x))
+    rate = 1000000.0 / sample_period_us
+    bin_hz = rate / x.size
+
+    lo = max(int(SPECTRUM_MIN_HZ / bin_hz), 1)
+    hi = min(int(SPECTRUM_MAX_HZ / bin_hz) + 1, spectrum.size // SPECTRUM_HARMONICS)
+    if hi <= lo + 2:
+        return 0.0
+
+    hps = spectrum[:hi].copy()
+    for h in range(2, SPECTRUM_HARMONICS + 1):
+        hps *= spectrum[:hi * h:h][:hi]
+    k = lo + int(np.argmax(hps[lo:hi]))
+    if hps[k] <= 0.0:
+        return 0.0
+
+    # Parabolic interpolation on the (log) magnitude of the original spectrum
+    if 0 < k < spectrum.size - 1:
+        a, b, c = np.log(spectrum[k - 1:k + 2] + 1e-12)
+        denom = a - 2.0 * b + c
+        offset = 0.5 * (a - c) / denom if denom != 0 else 0.0
+    else:
+        offset = 0.0
+    return (k + offset) * bin_hz * 60.0
+
+
+class RawSampleSource:
+    """Serial bytes -> blocks -> pulses, plus a rolling window for spectral cadence."""
+
+    def __init__(self, detector=None):
+        self.reader = BlockReader()
+        self.detector = detector or EdgeDetector()
+        window = int(SPECTRUM_SECONDS * 1000000.0 / self.detector.sample_period_us)
+        self.window = np.zeros(window, dtype=np.uint16)
+        self.window_fill = 0
+        self.blocks = 0             # Complete blocks parsed so far
+        self.fed_blocks = 0         # ...of which in the last feed() (0 = only noise or a partial block)
+
+    def feed(self, data):
+        """Returns the pulses found in 'data' as a list of (t_us, sensor_id)."""
+        pulses = []
+        blocks = self.reader.feed(data)
+        for t0, samples in blocks:
+            pulses.extend(self.detector.process(t0, samples))
+            self._remember(samples)
+        self.fed_blocks = len(blocks)
+        self.blocks += len(blocks)
+        return pulses
+
+    def _remember(self, samples):
+        n = min(samples.size, self.window.size)
+        self.window[:-n] = self.window[n:]
+        self.window[-n:] = samples[-n:]
+        self.window_fill = min(self.window_fill + n, self.window.size)
+
+    def spectral_cadence(self):
+        """Pulses per minute over the last SPECTRUM_SECONDS (0.0 until the window is full)."""
+        if self.window_fill < self.window.size:
+            return 0.0
+        return spectral_cadence(self.window, self.detector.sample_period_us)
+
+    def summary(self):
+        """One line for the console: block stream health and the spectral cross-check."""
+        reader = self.reader
+        text = f"RAW: {self.blocks} blocks | {reader.lost_blocks} lost | {reader.bad_bytes} bad bytes"
+        if self.window_fill >= self.window.size:
+            text += f" | spectral {self.spectral_cadence():.0f} pulses/min"
+        return text
+
+
+def read_raw_capture(path):
+    """Reads a saved binary capture and returns all raw samples as one array."""
+    reader = BlockReader()
+    parts = []
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(1024 * 1024)
+            if not data:
+                break
+            parts.extend(samples for _, samples in reader.feed(data))
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint16)
@@ -0,0 +1,114 @@
+# rideLog.py - Recorded Ride Telemetry
+# Records the RPM stream coming from the Receiver Arduino and loads it back
+# as NumPy arrays for analysis (ride-report, ghost rider, route following).
+#
+# File format (plain CSV, one sample per line):
+#   time_s,rpm
+#   0.000,0.0
+#   0.050,62.5
+# A binary '.npz' copy (arrays 't' and 'rpm') loads much faster for long rides
+# ('python rollerTools.py pack rides/' writes one next to each CSV).
+
+import os
+import time
+import numpy as np
+
+# --- CONFIGURATION ---
+# IMPORTANT: Set your roller circumference (same value as rollerCircumferenceMeters in the .ino)
+ROLLER_CIRCUMFERENCE_METERS = 2.0
+
+RIDE_FILE_HEADER = "time_s,rpm"
+RIDE_FILE_EXTENSIONS = ('.csv', '.npz')
+
+
+# --- RECORDING ---
+
+class RideRecorder:
+    """Appends (elapsed time, RPM) samples to a CSV ride file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.start_time = None
+        self.file = open(path, 'w', buffering=1024 * 64)
+        self.file.write(RIDE_FILE_HEADER + "\n")
+
+    def record(self, rpm, now=None):
+        """
+        Writes one sample.
+
+        :param rpm: Current RPM reported by the bike.
+        :param now: Optional timestamp in seconds (defaults to time.perf_counter()).
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now
+        self.file.write(f"{now - self.start_time:.4f},{rpm:.2f}\n")
+
+    def close(self):
+        self.file.close()
+
+
+# --- LOADING ---
+
+def load_ride(path):
+    """
+    Loads a ride file and returns (t, rpm) as float64 NumPy arrays.
+    Samples are sorted by time and duplicate timestamps are dropped.
+    """
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            t = np.asarray(data['t'], dtype=np.float64)
+            rpm = np.asarray(data['rpm'], dtype=np.float64)
+    else:
+        data = np.loadtxt(path, delimiter=',', skiprows=1, dtype=np.float64, ndmin=2)
+        t = data[:, 0]
+        rpm = data[:, 1]
+
+    if t.size > 1 and np.any(np.diff(t) <= 0):
+        order = np.argsort(t, kind='stable')
+        t, rpm = t[order], rpm[order]
+        keep = np.concatenate(([True], np.diff(t) > 0))
+        t, rpm = t[keep], rpm[keep]
+
+    # The firmware reports 0.0 after a timeout; negative or NaN values are sensor glitches
+    rpm = np.nan_to_num(rpm, nan=0.0)
+    np.clip(rpm, 0.0, None, out=rpm)
+    return t, rpm
+
+
+def save_ride_npz(path, t, rpm):
+    """Saves a ride as a compressed binary file (much faster to load than CSV)."""
+    np.savez_compressed(path, t=np.asarray(t, dtype=np.float64), rpm=np.asarray(rpm, dtype=np.float64))
+
+
+def cumulative_distance(t, rpm, circumference=ROLLER_CIRCUMFERENCE_METERS):
+    """
+    Returns the distance covered (meters) at every sample, using the trapezoid rule.
+    Revolutions per second = rpm / 60, each revolution covers one circumference.
+    """
+    if t.size == 0:
+        return np.zeros(0)
+    speed = rpm * (circumference / 60.0)
+    steps = np.diff(t) * (speed[1:] + speed[:-1]) * 0.5
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+def find_ride_files(paths):
+    """
+    Expands a list of files and folders into a sorted list of ride files.
+    In a folder, a ride saved as both CSV and '.npz' is listed once, as the '.npz'.
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.listdir(path))
+            packed = {name[:-4] for name in names if name.endswith('.npz')}
+            for name in names:
+                if name.endswith('.csv') and name[:-4] in packed:
+                    continue
+                if name.endswith(RIDE_FILE_EXTENSIONS):
+                    found.append(os.path.join(path, name))
+        else:
+            found.append(path)
+    return found
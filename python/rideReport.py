@@ -0,0 +1,272 @@
+# rideReport.py - Ride Analytics
+# Computes a summary of a recorded ride (see rideLog.py) using NumPy over the
+# whole array at once: distance, moving time, average and normalized cadence,
+# time in cadence zones, stops/starts and hard intervals.
+# Distance uses the same trapezoid rule as rideLog.cumulative_distance().
+# A season of rides can be processed in parallel across a process pool.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from rideLog import load_ride, ROLLER_CIRCUMFERENCE_METERS
+
+# --- CONFIGURATION ---
+MOVING_RPM_THRESHOLD = 10.0     # Below this the bike counts as stopped
+MIN_STOP_SECONDS = 3.0          # Shorter pauses are not counted as a stop
+
+# Cadence zones (RPM). The 30 / 120 edges match RPM_SLOW_THRESHOLD / RPM_FAST_THRESHOLD in the bridge.
+CADENCE_ZONES = [0.0, 30.0, 60.0, 90.0, 120.0, np.inf]
+
+NORMALIZED_WINDOW_SECONDS = 30.0  # Rolling window used for normalized cadence
+
+# Interval detection: rolling cadence above the threshold for at least the minimum time
+INTERVAL_RPM_THRESHOLD = 90.0
+INTERVAL_WINDOW_SECONDS = 10.0
+INTERVAL_MIN_SECONDS = 30.0
+
+PLOT_POINTS = 2000              # Points kept after LTTB downsampling for plots
+
+
+# --- HELPERS ---
+
+def _durations(t):
+    """Time each sample 'owns' (forward difference, last sample gets 0)."""
+    dt = np.empty_like(t)
+    dt[:-1] = np.diff(t)
+    dt[-1:] = 0.0
+    return dt
+
+
+def cumulative_integral(t, values):
+    """Running trapezoid integral of values over t (same length as t, starts at 0)."""
+    steps = np.diff(t) * (values[1:] + values[:-1]) * 0.5
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+def rolling_mean(t, values, window, integral=None):
+    """
+    Time-weighted rolling mean over the trailing 'window' seconds at every sample.
+    Uses a cumulative integral + interpolation, so there is no Python loop.
+
+    :param integral: Optional precomputed cumulative_integral(t, values).
+    """
+    if integral is None:
+        integral = cumulative_integral(t, values)
+    start = np.maximum(t - window, t[0])
+    span = t - start
+    area = integral - np.interp(start, t, integral)
+    out = values.astype(np.float64, copy=True)
+    valid = span > 0
+    out[valid] = area[valid] / span[valid]
+    return out
+
+
+def _runs(mask):
+    """Returns (starts, ends) sample indices of consecutive True runs, end exclusive."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return edges[0::2], edges[1::2]
+
+
+def fill_short_gaps(t, mask, min_seconds):
+    """Sets False runs shorter than min_seconds (bounded by True on both sides) to True."""
+    starts, ends = _runs(~mask)
+    if starts.size == 0:
+        return mask
+    t_end = np.append(t, t[-1])
+    inner = (starts > 0) & (ends < mask.size)
+    short = inner & ((t_end[ends] - t[starts]) < min_seconds)
+    if not np.any(short):
+        return mask
+    delta = np.zeros(mask.size + 1, dtype=np.int64)
+    np.add.at(delta, starts[short], 1)
+    np.add.at(delta, ends[short], -1)
+    return mask | (np.cumsum(delta[:-1]) > 0)
+
+
+# --- ANALYTICS ---
+
+def analyze_ride(t, rpm, circumference=ROLLER_CIRCUMFERENCE_METERS):
+    """
+    Computes the ride summary.
+
+    :param t: Sample times in seconds (sorted).
+    :param rpm: RPM at each sample.
+    :return: dict of metrics.
+    """
+    if t.size < 2:
+        raise ValueError("Ride needs at least two samples.")
+
+    dt = _durations(t)
+    revolutions = cumulative_integral(t, rpm) / 60.0
+    distance = revolutions * circumference
+
+    raw_moving = rpm > MOVING_RPM_THRESHOLD
+    moving = fill_short_gaps(t, raw_moving, MIN_STOP_SECONDS)
+    moving_time = float(np.dot(dt, moving))
+
+    moving_dt = dt * raw_moving
+    avg_cadence = float(np.dot(rpm, moving_dt) / moving_dt.sum()) if moving_dt.sum() > 0 else 0.0
+
+    # Normalized cadence: 4th-power mean of the 30 s rolling cadence (same idea as normalized power)
+    integral = revolutions * 60.0
+    rolled = rolling_mean(t, rpm, NORMALIZED_WINDOW_SECONDS, integral)
+    total_time = float(t[-1] - t[0])
+    rolled *= rolled
+    normalized = float((np.dot(rolled * rolled, dt) / total_time) ** 0.25)
+
+    # Zone lookup with searchsorted + bincount (much faster than np.histogram with weights)
+    zone_index = np.searchsorted(CADENCE_ZONES[1:-1], rpm, side='right')
+    zone_seconds = np.bincount(zone_index, weights=dt, minlength=len(CADENCE_ZONES) - 1)
+
+    # A stop is a moving run that ends before the ride does
+    starts, ends = _runs(moving)
+    stops = int(np.count_nonzero(ends < moving.size))
+
+    return {
+        'duration_s': total_time,
+        'samples': int(t.size),
+        'sample_rate_hz': (t.size - 1) / total_time if total_time > 0 else 0.0,
+        'distance_m': float(distance[-1]),
+        'moving_time_s': moving_time,
+        'avg_speed_kmh': float(distance[-1] / moving_time * 3.6) if moving_time > 0 else 0.0,
+        'avg_cadence_rpm': avg_cadence,
+        'normalized_cadence_rpm': normalized,
+        'max_cadence_rpm': float(rpm.max()),
+        'zone_seconds': [float(z) for z in zone_seconds],
+        'starts': int(starts.size),
+        'stops': stops,
+        'intervals': detect_intervals(t, rpm, integral),
+    }
+
+
+def detect_intervals(t, rpm, integral=None):
+    """
+    Finds efforts where the rolling cadence stays above INTERVAL_RPM_THRESHOLD
+    for at least INTERVAL_MIN_SECONDS.
+
+    :param integral: Optional precomputed cumulative_integral(t, rpm).
+    :return: list of (start_s, end_s, avg_rpm)
+    """
+    if integral is None:
+        integral = cumulative_integral(t, rpm)
+    rolled = rolling_mean(t, rpm, INTERVAL_WINDOW_SECONDS, integral)
+    starts, ends = _runs(rolled > INTERVAL_RPM_THRESHOLD)
+    if starts.size == 0:
+        return []
+
+    last = ends - 1
+    long_enough = (t[last] - t[starts]) >= INTERVAL_MIN_SECONDS
+    starts, last = starts[long_enough], last[long_enough]
+
+    # Average cadence over each interval straight from the running integral
+    span = t[last] - t[starts]
+    avg = (integral[last] - integral[starts]) / span
+
+    return [(float(t[s]), float(t[e]), float(a)) for s, e, a in zip(starts, last, avg)]
+
+
+# --- DOWNSAMPLING FOR PLOTS ---
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Keeps the visual shape of a long ride with only n_out points.
+    The loop runs once per output bucket; the work inside each bucket is NumPy.
+
+    :return: indices of the kept samples.
+    """
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average point of the next bucket (the last bucket looks ahead to the final sample)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < edges.size else n
+        avg_x = x[nlo:nhi].mean()
+        avg_y = y[nlo:nhi].mean()
+
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+
+    return kept
+
+
+def plot_ride(t, rpm, path, points=PLOT_POINTS):
+    """Saves a cadence plot (downsampled with LTTB) as an image. Needs matplotlib."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("WARNING: matplotlib is not installed, skipping plot.")
+        return
+
+    kept = lttb(t, rpm, points)
+    fig, ax = plt.subplots(figsize=(12, 4))
+    ax.plot(t[kept] / 60.0, rpm[kept], linewidth=0.8)
+    ax.set_xlabel("Time (min)")
+    ax.set_ylabel("RPM")
+    ax.set_title(os.path.basename(path))
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+
+# --- REPORT ---
+
+def report_file(path, plot_dir=None):
+    """Loads one ride file and returns (path, metrics). Safe to run in a worker process."""
+    t, rpm = load_ride(path)
+    metrics = analyze_ride(t, rpm)
+    if plot_dir:
+        name = os.path.splitext(os.path.basename(path))[0] + '.png'
+        plot_ride(t, rpm, os.path.join(plot_dir, name))
+    return path, metrics
+
+
+def report_files(paths, jobs=None, plot_dir=None):
+    """
+    Reports many rides. With more than one file the work is spread across a process pool.
+
+    :param jobs: Number of worker processes (None = one per CPU).
+    """
+    if len(paths) == 1 or jobs == 1:
+        return [report_file(p, plot_dir) for p in paths]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(report_file, paths, [plot_dir] * len(paths), chunksize=1))
+
+
+def format_seconds(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+def print_report(path, m):
+    print(f"--- RIDE REPORT: {path} ---")
+    print(f"Duration:            {format_seconds(m['duration_s'])}  ({m['samples']} samples @ {m['sample_rate_hz']:.0f} Hz)")
+    print(f"Distance:            {m['distance_m'] / 1000.0:.2f} km")
+    print(f"Moving Time:         {format_seconds(m['moving_time_s'])}")
+    print(f"Average Speed:       {m['avg_speed_kmh']:.1f} km/h")
+    print(f"Average Cadence:     {m['avg_cadence_rpm']:.1f} RPM")
+    print(f"Normalized Cadence:  {m['normalized_cadence_rpm']:.1f} RPM")
+    print(f"Max Cadence:         {m['max_cadence_rpm']:.1f} RPM")
+    print(f"Starts / Stops:      {m['starts']} / {m['stops']}")
+    print("Time in Zones:")
+    for lo, hi, seconds in zip(CADENCE_ZONES[:-1], CADENCE_ZONES[1:], m['zone_seconds']):
+        label = f"{lo:.0f}+" if hi == np.inf else f"{lo:.0f}-{hi:.0f}"
+        print(f"  {label:>8} RPM: {format_seconds(seconds)}")
+    print(f"Intervals (> {INTERVAL_RPM_THRESHOLD:.0f} RPM for {INTERVAL_MIN_SECONDS:.0f}s+): {len(m['intervals'])}")
+    for start, end, avg in m['intervals']:
+        print(f"  {format_seconds(start)} -> {format_seconds(end)}  avg {avg:.1f} RPM")
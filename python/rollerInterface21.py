@@ -8,6 +8,8 @@ import threading
 from pynput.keyboard import Key, Controller as KeyboardController
 from pynput.mouse import Listener as MouseListener, Button, Controller as MouseController
 
+from bridgeLog import BridgeLog
+
 # --- CONFIGURATION ---
 # IMPORTANT: Change this to match your Receiver Arduino's serial port
 SERIAL_PORT = 'COM3'
@@ -17,6 +19,7 @@ BAUD_RATE = 9600
 
 # --- GLOBAL CONTROLLER ---
 keyboard = KeyboardController()
+log = BridgeLog()   # Messages from the input path are written by a background thread (bridgeLog.py)
 # We don't need the MouseController instance for input *control*, only for *listening*
 
 # --- STATE VARIABLES ---
@@ -32,13 +35,13 @@ def on_click(x, y, button, pressed):
     # We only care about the moment the middle button is PRESSED down
     if button == Button.middle and pressed:
         is_motion_enabled = not is_motion_enabled
-        print(f"--- TOGGLE: Motion is now {'ENABLED' if is_motion_enabled else 'DISABLED'} ---")
+        log.write("--- TOGGLE: Motion is now {} ---", 'ENABLED' if is_motion_enabled else 'DISABLED')
 
         # If motion is disabled, ensure the 'Up' key is released immediately
         if not is_motion_enabled and is_moving:
             keyboard.release(Key.up)
             is_moving = False
-            print("ACTION: UP ARROW RELEASED (Motion Disabled)")
+            log.write("ACTION: UP ARROW RELEASED (Motion Disabled)")
 
 # --- KEYBOARD SIMULATION ---
 
@@ -58,13 +61,13 @@ def simulate_motion(spin_state):
         # START: Spinning is True and key is not pressed -> Press the key
         keyboard.press(Key.up)
         is_moving = True
-        print("ACTION: UP ARROW PRESSED (START SPINNING)")
+        log.write("ACTION: UP ARROW PRESSED (START SPINNING)")
 
     elif not spin_state and is_moving:
         # STOP: Spinning is False and key is pressed -> Release the key
         keyboard.release(Key.up)
         is_moving = False
-        print("ACTION: UP ARROW RELEASED (STOP SPINNING)")
+        log.write("ACTION: UP ARROW RELEASED (STOP SPINNING)")
         
     # If state is spin=True and is_moving=True, do nothing (maintain press)
     # If state is spin=False and is_moving=False, do nothing (maintain release)
@@ -80,6 +83,7 @@ def main():
     listener = MouseListener(on_click=on_click)
     listener.start()
     print("Mouse listener started.")
+    log.start()
 
     try:
         ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=0.1)
@@ -90,6 +94,7 @@ def main():
         print(f"ERROR: Could not open serial port {SERIAL_PORT}. Please check the port name and connection.")
         print(e)
         listener.stop() # Stop the listener if serial fails
+        log.stop()
         return
 
     while True:
@@ -120,6 +125,8 @@ def main():
                 keyboard.release(Key.up)
             ser.close()
             listener.stop() # Stop the keyboard listener
+            log.stop()
+            print(log.summary())
             break
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
@@ -8,6 +8,8 @@ import threading
 from pynput.keyboard import Key, Controller as KeyboardController
 from pynput.mouse import Listener as MouseListener, Button
 
+from bridgeLog import BridgeLog
+
 # --- CONFIGURATION ---
 SERIAL_PORT = 'COM3'
 BAUD_RATE = 9600
@@ -17,6 +19,7 @@ KEY_HOLD_TIME_SECONDS = 0.5
 
 # --- GLOBAL CONTROLLER ---
 keyboard = KeyboardController()
+log = BridgeLog()   # Messages from the input path are written by a background thread (bridgeLog.py)
 
 # --- STATE VARIABLES & LOCKS ---
 is_moving = False           # Tracks if the 'ArrowUp' key is currently being held down
@@ -32,7 +35,7 @@ def on_click(x, y, button, pressed):
     # We only care about the moment the middle button is PRESSED down
     if button == Button.middle and pressed:
         is_motion_enabled = not is_motion_enabled
-        print(f"--- TOGGLE: Motion is now {'ENABLED' if is_motion_enabled else 'DISABLED'} ---")
+        log.write("--- TOGGLE: Motion is now {} ---", 'ENABLED' if is_motion_enabled else 'DISABLED')
 
         # If motion is disabled, ensure the 'Up' key is released immediately
         if not is_motion_enabled and is_moving:
@@ -41,7 +44,7 @@ def on_click(x, y, button, pressed):
             # Since pynput doesn't offer a way to stop a sleep(), we just force the release.
             keyboard.release(Key.up)
             is_moving = False
-            print("ACTION: UP ARROW RELEASED (Motion Disabled)")
+            log.write("ACTION: UP ARROW RELEASED (Motion Disabled)")
 
 # --- KEYBOARD SIMULATION ---
 
@@ -57,7 +60,7 @@ def key_press_and_release():
             
         is_moving = True
         keyboard.press(Key.up)
-        print(f"ACTION: UP ARROW PRESSED for {KEY_HOLD_TIME_SECONDS}s")
+        log.write("ACTION: UP ARROW PRESSED for {}s", KEY_HOLD_TIME_SECONDS)
     
     # 2. Hold the key
     time.sleep(KEY_HOLD_TIME_SECONDS)
@@ -65,7 +68,7 @@ def key_press_and_release():
     # 3. Release the key and free the state/lock
     keyboard.release(Key.up)
     is_moving = False
-    print("ACTION: UP ARROW RELEASED")
+    log.write("ACTION: UP ARROW RELEASED")
 
 
 def simulate_motion(spin_state):
@@ -101,6 +104,7 @@ def main():
     listener = MouseListener(on_click=on_click)
     listener.start()
     print("Mouse listener started.")
+    log.start()
 
     try:
         ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=0.1)
@@ -111,6 +115,7 @@ def main():
         print(f"ERROR: Could not open serial port {SERIAL_PORT}. Please check the port name and connection.")
         print(e)
         listener.stop() 
+        log.stop()
         return
 
     while True:
@@ -136,6 +141,8 @@ def main():
                 keyboard.release(Key.up)
             ser.close()
             listener.stop()
+            log.stop()
+            print(log.summary())
             break
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
@@ -1,18 +1,28 @@
 # rollerInterface_Continuous.py - State Machine Driven
 # Reads the single boolean 'spin' state from Arduino and translates it into continuous 'ArrowUp' keyboard input.
 # The key is held down AS LONG AS the wheel is spinning (until the Arduino timeout).
+# If the '0' is lost or the port goes quiet, the watchdog (inputWatchdog.py) releases it
+# after WATCHDOG_SECONDS, on its own timer. It is off by default: bicyclePartInterface21.ino
+# sends a single '1' when the wheel starts, so a quiet port is normal while riding and the
+# key would be released for good. Turn it on only with bicyclePartInterface21.1.ino, which
+# repeats its state every 50 ms.
 
 import serial
 import time
 from pynput.keyboard import Key, Controller as KeyboardController
 from pynput.mouse import Listener as MouseListener, Button
 
+from bridgeLog import BridgeLog
+from inputWatchdog import InputWatchdog
+
 # --- CONFIGURATION ---
 SERIAL_PORT = 'COM3'
 BAUD_RATE = 9600
+WATCHDOG_SECONDS = 0    # Release a held key after this long without a line (0 = no watchdog; 1.0 with 21.1.ino)
 
 # --- GLOBAL CONTROLLER ---
 keyboard = KeyboardController()
+log = BridgeLog()   # Messages from the input path are written by a background thread (bridgeLog.py)
 
 # --- STATE VARIABLES ---
 is_moving = False           # Tracks if the 'ArrowUp' key is currently being held down
@@ -27,13 +37,13 @@ def on_click(x, y, button, pressed):
     # We only care about the moment the middle button is PRESSED down
     if button == Button.middle and pressed:
         is_motion_enabled = not is_motion_enabled
-        print(f"--- TOGGLE: Motion is now {'ENABLED' if is_motion_enabled else 'DISABLED'} ---")
+        log.write("--- TOGGLE: Motion is now {} ---", 'ENABLED' if is_motion_enabled else 'DISABLED')
 
         # If motion is disabled, ensure the 'Up' key is released immediately
         if not is_motion_enabled and is_moving:
             keyboard.release(Key.up)
             is_moving = False
-            print("ACTION: UP ARROW RELEASED (Motion Disabled)")
+            log.write("ACTION: UP ARROW RELEASED (Motion Disabled)")
 
 # --- KEYBOARD SIMULATION (STATE MACHINE) ---
 
@@ -53,18 +63,19 @@ def simulate_motion(spin_state):
         # START: Arduino sends True and key is not pressed -> Press the key and HOLD
         keyboard.press(Key.up)
         is_moving = True
-        print("ACTION: UP ARROW PRESSED (START SPINNING)")
+        log.write("ACTION: UP ARROW PRESSED (START SPINNING)")
 
     elif not spin_state and is_moving:
         # STOP: Arduino sends False (due to timeout) and key is pressed -> Release the key
         keyboard.release(Key.up)
         is_moving = False
-        print("ACTION: UP ARROW RELEASED (STOP SPINNING)")
+        log.write("ACTION: UP ARROW RELEASED (STOP SPINNING)")
 
 
 # --- MAIN LOOP ---
 
 def main():
+    global is_moving
     print("Starting bicycle-to-keyboard bridge (Continuous Mode)...")
     print("Motion can be toggled by performing a 'Middle Mouse Click'.")
 
@@ -72,6 +83,12 @@ def main():
     listener = MouseListener(on_click=on_click)
     listener.start()
     print("Mouse listener started.")
+    log.start()
+
+    watchdog = None
+    if WATCHDOG_SECONDS > 0:
+        watchdog = InputWatchdog(WATCHDOG_SECONDS, [lambda: keyboard.release(Key.up)],
+                                 held=lambda: is_moving, log=log).install().start()
 
     try:
         ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=0.001)
@@ -82,10 +99,18 @@ def main():
         print(f"ERROR: Could not open serial port {SERIAL_PORT}. Please check the port name and connection.")
         print(e)
         listener.stop() 
+        if watchdog is not None:
+            watchdog.stop()
+        log.stop()
         return
 
     while True:
         try:
+            # The watchdog released the key on its own: catch up with it
+            if watchdog is not None and watchdog.stalled and is_moving:
+                is_moving = False
+                log.write("ACTION: UP ARROW RELEASED (WATCHDOG)")
+
             # Read line from Arduino (should be just the boolean state '1' or '0')
             line = ser.readline().decode('utf-8').strip()
 
@@ -93,6 +118,8 @@ def main():
                 try:
                     # Convert the string '1' or '0' to a Python boolean
                     spin_state = bool(int(line))
+                    if watchdog is not None:
+                        watchdog.feed()
 
                     # --- INPUT MAPPING ---
                     simulate_motion(spin_state)
@@ -105,6 +132,11 @@ def main():
             print("\nShutting down bridge...")
             if is_moving:
                 keyboard.release(Key.up)
+            log.stop()
+            if watchdog is not None:
+                watchdog.stop()
+                print(watchdog.summary())
+            print(log.summary())
             ser.close()
             listener.stop()
             break
@@ -0,0 +1,760 @@
+# python_simulator_bridge.py
+# Reads RPM from the Receiver Arduino and translates it into 'ArrowUp' keyboard input.
+# The RPM drives a virtual bike (rollerPhysics.py) and the key follows its SPEED,
+# so the view coasts through short pauses instead of stopping and restarting.
+# Accepts either the 1-part format (RPM\n) or the 4-part joystick format (R,X,Y,Z\n)
+# where Z is the zoom dial's click count since the last packet (zoomDial.py),
+# or raw pulse lines (P,<sensor>,<t_us>...) that are turned into RPM by pulseEngine.py.
+# Frame lines (F,<seq>,<tx_us>,<rx_us>) are counted by radioLink.py: packet loss,
+# duplicates and radio latency are printed every LINK_PRINT_SECONDS and at exit.
+# With --raw the port is bicyclePartInterfaceRaw.ino streaming raw ADC blocks, and the
+# pulses are detected on the PC (rawSamples.py).
+# Optional: follows a planned route (GPX / encoded polyline) and turns the view
+# toward the road ahead using the mouse-look path, so you never take a hand off the bars.
+# Optional: records the ride and races a 'ghost' of an earlier ride (or a folder of rides).
+# Optional (--browser): drives streetView.html over a local WebSocket instead of synthesizing
+# keys and mouse moves, so the browser needs no focus (browserOutput.py).
+# Optional (--video): plays a ride video (e.g. from vids/) at the bike's speed instead of
+# driving Street View (videoRide.py; needs PyAV and OpenCV).
+# Optional (--photos): the same with a folder of sequential or geotagged photos, e.g. pics/
+# (photoRide.py; needs pillow and OpenCV).
+# Optional (--head): turns the view with your head through a webcam (headTracker.py; needs
+# OpenCV), instead of running OpenTrack next to rollerInterface15OpenTrack.py. Ctrl+H recentres.
+# Optional (--hotkeys, Linux): reads only the handlebar mini keyboard / ring mouse through evdev
+# instead of hooking the whole desktop with pynput, optionally grabbing it (deviceHotkeys.py).
+# Optional (--pace): watches the middle of the screen and only sends the next step once
+# Street View has loaded the last one (scenePacer.py; needs mss or pillow).
+#
+# Usage: python rollerInterface30.py [--route myRoute.gpx] [--ghost rides/] [--record rides/] [--raw]
+#                                    [--pace [--pace-record frames/]] [--browser]
+#                                    [--video vids/ [--video-speed 20]] [--photos pics/ [--photo-spacing 5]]
+#                                    [--head [camera number or video file]]
+#                                    [--hotkeys "device name" [--hotkeys-grab] [--hotkeys-map KEY_X=motion,...]]
+#                                    [--watchdog-ms 2500] [--dashboard] [--telemetry]
+# Motion can be toggled ON/OFF by pressing the 'Control + M' keys on the PC keyboard.
+# A watchdog (inputWatchdog.py) releases the step key on its own timer when no valid input
+# arrives for --watchdog-ms, and on exit, termination signals and crashes.
+# Messages printed while riding go through a background log thread (bridgeLog.py).
+# Optional (--dashboard): one live screen with cadence, speed, key state, rates and latencies
+# instead of scrolling messages (dashboard.py).
+# Optional (--telemetry): cadence, speed, power, distance, ghost gap and motion state live on a
+# phone or tablet on the same network (telemetryServer.py, telemetry.html).
+# Input threads (keyboard listener, hotkey device) only post events (bridgeEvents.py); the
+# main loop owns all bridge state and applies them in order.
+
+import os
+import time
+import argparse
+import serial
+from pynput.keyboard import Key, Controller as KeyboardController, Listener
+from pynput.mouse import Controller as MouseController
+
+from rideLog import ROLLER_CIRCUMFERENCE_METERS, RideRecorder, find_ride_files
+from routeFollow import load_route, RouteFollower
+from ghostRider import GhostRide, load_ghosts, format_gap
+from rollerPhysics import BikePhysics, rpm_to_speed
+from pulseEngine import PulseEngine, parse_pulse_line
+from rawSamples import RawSampleSource
+from radioLink import LinkStats, parse_frame_line
+from zoomDial import ZoomScroller
+from joystickCal import JoystickCalibrator
+from scenePacer import ScenePacer, SceneWatcher, make_grabber
+from browserOutput import BrowserOutput
+from videoRide import VIDEO_SPEED_KMH, VideoWindow, open_video
+from photoRide import PHOTO_SPACING_METERS, open_photos
+from headTracker import CAMERA, HeadTracker
+from bridgeEvents import EventQueue
+from bridgeLog import BridgeLog
+from dashboard import Dashboard
+from telemetryServer import TelemetryServer, local_address
+from inputWatchdog import WATCHDOG_SECONDS, InputWatchdog
+from deviceHotkeys import HOTKEY_BINDINGS, DeviceHotkeys, parse_bindings
+
+# --- CONFIGURATION ---
+# IMPORTANT: Change this to match your Receiver Arduino's serial port
+SERIAL_PORT = 'COM_PORT_HERE'
+BAUD_RATE = 9600
+RAW_BAUD_RATE = 250000     # bicyclePartInterfaceRaw.ino (--raw)
+
+# Speed thresholds (adjust these based on how fast you want Street View to advance)
+RPM_FAST_THRESHOLD = 120.0 # RPM needed to hold the 'Up' key down
+RPM_SLOW_THRESHOLD = 30.0  # RPM needed to tap the 'Up' key
+
+# The same thresholds as virtual speed (m/s), used by the physics-driven motion engine
+SPEED_FAST_THRESHOLD = rpm_to_speed(RPM_FAST_THRESHOLD, ROLLER_CIRCUMFERENCE_METERS)
+SPEED_SLOW_THRESHOLD = rpm_to_speed(RPM_SLOW_THRESHOLD, ROLLER_CIRCUMFERENCE_METERS)
+SPEED_HYSTERESIS = 0.5     # m/s - the key is only released this far below SPEED_FAST_THRESHOLD
+
+# Steering thresholds (Joystick -100 to 100). The joystick starts with this dead zone and then
+# learns its own centre and dead zone while left alone (NOISE_SIGMAS etc. in joystickCal.py)
+STEER_DEAD_ZONE = 10
+
+# Mouse Look Sensitivity
+MOUSE_SENSITIVITY = 1.0
+
+# Route following: path to a .gpx or encoded polyline file ('' = off, or use --route)
+ROUTE_FILE = ''
+PIXELS_PER_DEGREE = 4.0    # Mouse pixels that turn the Street View camera by one degree
+
+# Ride recording and ghost rider ('' = off, or use --record / --ghost)
+RIDE_LOG_FOLDER = ''       # Each ride is saved here as ride_YYYYMMDD_HHMMSS.csv
+GHOST_RIDE = ''            # A ride file, or a folder of rides to race against all of them
+GHOST_PRINT_SECONDS = 5.0  # How often the gap to the ghost is printed
+
+# Video ride mode (--video)
+VIDEO_LOOP_MS = 10         # Loop period while playing: the window is redrawn this often
+
+# Radio link statistics (only when the Receiver prints frame lines)
+LINK_PRINT_SECONDS = 30.0  # How often packet loss and latency are printed
+RAW_PRINT_SECONDS = 30.0   # How often raw mode prints lost blocks and its spectral cadence (--raw)
+
+# Panorama-load-aware pacing (off unless --pace): steps are taps, each sent once the scene settled
+PACE_SLOW_STEP_SECONDS = 1.0   # Between the slow and fast thresholds, at most one step this often
+
+# --- GLOBAL CONTROLLERS ---
+keyboard = KeyboardController()
+mouse = MouseController()
+bike = BikePhysics()
+zoom_scroller = ZoomScroller()  # Batching and acceleration: ZOOM_* in zoomDial.py
+joystick = JoystickCalibrator(MOUSE_SENSITIVITY, STEER_DEAD_ZONE)
+pulse_engine = PulseEngine()  # Magnets per sensor: SENSOR_MAGNETS in pulseEngine.py
+events = EventQueue()       # Inputs from other threads, applied by the main loop
+log = BridgeLog()           # Messages from the main loop, written by a background thread
+
+# --- STATE VARIABLES ---
+is_moving = False           # Tracks if the 'ArrowUp' key is currently being held down
+is_motion_enabled = True    # Tracks if the script should send 'ArrowUp' signals (PC keyboard toggle)
+is_control_pressed = False  # Tracks if the Control key is currently held down (listener thread only)
+
+route_follower = None       # RouteFollower when a route is loaded
+pacer = None                # ScenePacer when pacing is on
+browser = None              # BrowserOutput when the page is driven directly (--browser)
+ride_player = None          # VideoPlayer / PhotoPlayer in video or photo ride mode
+head_tracker = None         # HeadTracker when the webcam turns the view (--head)
+watchdog = None             # InputWatchdog unless --watchdog-ms 0
+dashboard = None            # Dashboard with --dashboard
+telemetry = None            # TelemetryServer with --telemetry
+last_step_time = 0.0        # perf_counter() of the last paced step
+
+# Ride State
+ride_distance = 0.0         # Meters pedalled since the first pulse
+ride_start_time = None      # perf_counter() of the first pulse (ghost clock starts here)
+
+# --- KEYBOARD LISTENER FUNCTIONS ---
+
+def on_press(key):
+    """Handles PC keyboard input to toggle motion on/off. Uses Control + M (Control + H recentres head tracking)."""
+    global is_control_pressed
+
+    if key == Key.ctrl_l or key == Key.ctrl_r:
+        is_control_pressed = True
+        return
+
+    # Runs on the listener thread: the main loop applies the events
+    try:
+        if is_control_pressed and hasattr(key, 'char') and key.char == 'm':
+            events.post('motion', "Ctrl+M")
+
+        elif is_control_pressed and hasattr(key, 'char') and key.char == 'h':
+            events.post('recentre', "Ctrl+H")
+
+    except AttributeError:
+        pass
+
+def on_release(key):
+    """Handles releasing modifier keys."""
+    global is_control_pressed
+    if key == Key.ctrl_l or key == Key.ctrl_r:
+        is_control_pressed = False
+
+def toggle_motion(source):
+    """Turns the motion on or off. Main loop only: other threads post a 'motion' event."""
+    global is_motion_enabled, is_moving
+    is_motion_enabled = not is_motion_enabled
+    log.write("--- MOTION TOGGLED ({}): {} ---", source, 'ENABLED' if is_motion_enabled else 'DISABLED')
+
+    if not is_motion_enabled:
+        bike.stop()
+        if is_moving:
+            release_step_key()
+            is_moving = False
+
+def recentre_head(source):
+    if head_tracker is not None:
+        head_tracker.recentre()
+        log.write("--- HEAD TRACKING RECENTRED ({}) ---", source)
+
+def apply_hotkey(action):
+    """Applies a handlebar device action (deviceHotkeys.py)."""
+    if action == 'motion':
+        toggle_motion("hotkey")
+    elif action == 'recentre':
+        recentre_head("hotkey")
+    elif action == 'step' and is_motion_enabled and not is_moving:
+        tap_step_key()                     # While the key is held, a tap's release would lift it
+    elif action in ('zoom_in', 'zoom_out') and ride_player is None:
+        simulate_zoom(1 if action == 'zoom_in' else -1, time.perf_counter())
+
+def release_outputs():
+    """Releases the step key. Safe from any thread: it only sends the release (watchdog, exit)."""
+    if browser is not None:
+        browser.hold(False)
+    else:
+        keyboard.release(Key.up)
+
+def handle_event(event):
+    """Applies one input event. Only ever called from the main loop."""
+    global is_moving
+    if event.kind == 'stalled':
+        is_moving = False                  # The watchdog already released the key
+        bike.stop()
+    elif event.kind == 'motion':
+        toggle_motion(event.value)
+    elif event.kind == 'recentre':
+        recentre_head(event.value)
+    elif event.kind == 'hotkey':
+        apply_hotkey(event.value)
+
+def start_keyboard_listener():
+    """Starts the pynput Listener in a non-blocking way."""
+    listener = Listener(on_press=on_press, on_release=on_release)
+    listener.start()
+    return listener
+
+# --- OUTPUT (keyboard and mouse, or the page with --browser) ---
+
+def press_step_key():
+    if browser is not None:
+        browser.hold(True)
+    else:
+        keyboard.press(Key.up)
+
+def release_step_key():
+    if browser is not None:
+        browser.hold(False)
+    else:
+        keyboard.release(Key.up)
+
+def tap_step_key():
+    if browser is not None:
+        browser.step()
+    else:
+        keyboard.press(Key.up)
+        keyboard.release(Key.up)
+
+# --- SPEED MOTION ---
+
+def simulate_motion(speed):
+    """
+    Translates virtual speed (m/s) into 'ArrowUp' key presses ONLY if motion is enabled.
+    Once held, the key stays down until the speed drops SPEED_HYSTERESIS below the
+    fast threshold, so hovering around the threshold does not cause press/release churn.
+    """
+    global is_moving, is_motion_enabled
+
+    if not is_motion_enabled:
+        return 100
+
+    if pacer is not None:
+        return simulate_paced_motion(speed)
+
+    if speed > SPEED_FAST_THRESHOLD or (is_moving and speed > SPEED_FAST_THRESHOLD - SPEED_HYSTERESIS):
+        if not is_moving:
+            press_step_key()
+            is_moving = True
+        return 5
+
+    elif speed > SPEED_SLOW_THRESHOLD:
+        if is_moving:
+            release_step_key()
+            is_moving = False
+        tap_step_key()
+        return 100
+
+    else:
+        if is_moving:
+            release_step_key()
+            is_moving = False
+        return 100
+
+def simulate_paced_motion(speed):
+    """
+    Pacing mode: every step is a tap, sent only once Street View has loaded the last one.
+    Above the fast threshold a step follows as soon as the scene settled, between the
+    thresholds at most every PACE_SLOW_STEP_SECONDS.
+    """
+    global is_moving, last_step_time
+
+    if is_moving:
+        release_step_key()
+        is_moving = False
+    if speed <= SPEED_SLOW_THRESHOLD:
+        return 100
+
+    now = time.perf_counter()
+    if speed <= SPEED_FAST_THRESHOLD and now - last_step_time < PACE_SLOW_STEP_SECONDS:
+        return 20
+    if pacer.ready(now):
+        tap_step_key()
+        pacer.stepped(now)
+        last_step_time = now
+    return 20
+
+# --- MOUSE LOOK ---
+
+def shape_joystick(steer_x, steer_y):
+    """
+    Translates joystick input (-100 to 100) into mouse movement (pixels) through the
+    calibrated lookup tables: (0, 0) while the stick rests, however far its centre drifted.
+    """
+    move_x, move_y, recalibrated = joystick.update(steer_x, steer_y)
+    if recalibrated:
+        log.write("{}", joystick.describe())   # Formatted here: the log thread must not read the calibration
+    return move_x, move_y
+
+def simulate_mouse_look(move_x, move_y):
+    """Sends the mouse movement (pixels), if any. Returns the horizontal movement sent."""
+    if move_x != 0 or move_y != 0:
+        if browser is not None:
+            browser.look(move_x, move_y)
+        else:
+            mouse.move(move_x, move_y)
+    return move_x
+
+def simulate_zoom(zoom_delta, now):
+    """
+    Translates zoom dial clicks into mouse scroll (Street View zoom). A fast spin
+    becomes one accelerated scroll event instead of one event per click.
+    """
+    notches = zoom_scroller.add(zoom_delta, now)
+    if notches:
+        if browser is not None:
+            browser.zoom(notches)
+        else:
+            mouse.scroll(0, notches)
+
+# --- ROUTE FOLLOWING ---
+
+def update_route(meters):
+    """
+    Advances the route odometer by the distance pedalled since the last reading
+    and returns the steer value toward the route ahead (0 if no route is loaded).
+    """
+    if route_follower is None or not is_motion_enabled:
+        return 0
+    route_follower.advance(meters)
+    return route_follower.steer_value()
+
+# --- GHOST RIDER ---
+
+def print_ghost_gap(ghost, ghost_pack, now):
+    """
+    Prints the gap to the ghost (single ride) or to the personal best and leaderboard place.
+    Returns the text printed (without the distance), '' before the first pulse.
+    """
+    if ride_start_time is None:
+        return ''
+    elapsed = now - ride_start_time
+    text = ''
+    if ghost is not None:
+        gap_meters, gap_seconds = ghost.gap(elapsed, ride_distance)
+        text = format_gap(gap_meters, gap_seconds)
+        log.write("GHOST: {} | {:.0f} m", text, ride_distance)
+    elif ghost_pack is not None:
+        place = ghost_pack.position(elapsed, ride_distance)
+        best = ghost_pack.personal_best(ride_distance)
+        text = f"PLACE {place}/{len(ghost_pack.ghosts) + 1}"
+        if best is not None:
+            gap_meters, gap_seconds = best.gap(elapsed, ride_distance)
+            text += f" | PB: {format_gap(gap_meters, gap_seconds)}"
+        log.write("GHOSTS: {} | {:.0f} m", text, ride_distance)
+    return text
+
+def parse_line(line):
+    """
+    Parses 'RPM' or 'RPM,SteerX,SteerY,ZoomChange'.
+    Returns (rpm, steer_x, steer_y, zoom_change) or None if the line is malformed;
+    steer_x and steer_y are None when the line has no joystick.
+    """
+    parts = line.split(',')
+    try:
+        if len(parts) == 1:
+            return float(parts[0]), None, None, 0
+        if len(parts) == 4:
+            return float(parts[0]), int(parts[1]), int(parts[2]), int(parts[3])
+    except ValueError:
+        pass
+    return None
+
+# --- MAIN LOOP ---
+
+def main():
+    global route_follower, ride_distance, ride_start_time, pacer, browser, ride_player, head_tracker, watchdog, dashboard, telemetry
+
+    parser = argparse.ArgumentParser(description="Bike-to-Street View Bridge")
+    parser.add_argument('--route', default=ROUTE_FILE, help="GPX or encoded polyline file to follow")
+    parser.add_argument('--ghost', default=GHOST_RIDE, help="Ride file or folder of rides to race")
+    parser.add_argument('--record', default=RIDE_LOG_FOLDER, help="Folder to record this ride into")
+    parser.add_argument('--raw', action='store_true', help="Port streams raw ADC blocks (bicyclePartInterfaceRaw.ino)")
+    parser.add_argument('--pace', action='store_true', help="Only step once Street View has loaded the last panorama")
+    parser.add_argument('--browser', action='store_true', help="Drive streetView.html over a WebSocket instead of keys and mouse")
+    parser.add_argument('--video', default='', help="Ride video (or folder of videos) to play at the bike's speed")
+    parser.add_argument('--video-speed', type=float, default=VIDEO_SPEED_KMH, help="Speed (km/h) the video was filmed at")
+    parser.add_argument('--photos', default='', help="Folder of sequential or geotagged photos to ride through")
+    parser.add_argument('--photo-spacing', type=float, default=PHOTO_SPACING_METERS,
+                        help="Meters between photos without GPS positions")
+    parser.add_argument('--head', nargs='?', const=str(CAMERA), default='',
+                        help="Turn the view with your head through a webcam (camera number or a video file)")
+    parser.add_argument('--hotkeys', default='', help="Read hotkeys only from this input device (Linux evdev name or path)")
+    parser.add_argument('--hotkeys-grab', action='store_true', help="Grab the hotkey device so its keys only reach the bridge")
+    parser.add_argument('--hotkeys-map', default='', help="Extra bindings, e.g. KEY_X=motion,BTN_SIDE=step")
+    parser.add_argument('--watchdog-ms', type=float, default=WATCHDOG_SECONDS * 1000.0,
+                        help="Release the step key when no valid input arrives for this long (0 = off)")
+    parser.add_argument('--dashboard', action='store_true', help="Show a live dashboard instead of scrolling messages")
+    parser.add_argument('--telemetry', action='store_true', help="Serve live ride numbers to a phone on the local network")
+    parser.add_argument('--pace-record', default='', help="Also save the watched frames here (for rollerTools pace-replay)")
+    args = parser.parse_args()
+
+    print("--- Starting Bike-to-Street View Bridge ---")
+
+    route_file = args.route
+    if route_file:
+        try:
+            route = load_route(route_file)
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Could not load route {route_file}.")
+            print(e)
+            return
+        route_follower = RouteFollower(route, PIXELS_PER_DEGREE)
+        print(f"Route loaded: {route.total_length / 1000.0:.2f} km, {len(route.seg_length)} segments.")
+
+    ghost = ghost_pack = None
+    if args.ghost:
+        try:
+            if os.path.isdir(args.ghost):
+                ghost_pack = load_ghosts(find_ride_files([args.ghost]))
+                print(f"Racing {len(ghost_pack.ghosts)} ghost rides.")
+            else:
+                ghost = GhostRide.from_file(args.ghost)
+                print(f"Racing ghost: {ghost.name} ({ghost.total_distance / 1000.0:.2f} km)")
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Could not load ghost ride {args.ghost}.")
+            print(e)
+            return
+
+    recorder = None
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+        path = os.path.join(args.record, time.strftime("ride_%Y%m%d_%H%M%S.csv"))
+        recorder = RideRecorder(path)
+        print(f"Recording ride to {path}")
+
+    if args.browser:
+        try:
+            browser = BrowserOutput(PIXELS_PER_DEGREE).start()
+        except OSError as e:
+            print(f"ERROR: Could not start the browser connection: {e}")
+            return
+        print(f"Browser output: open http://localhost:{browser.port}/?key=YOUR_MAPS_API_KEY")
+
+    ride_window = None
+    if args.video:
+        try:
+            ride_player = open_video(args.video, args.video_speed)
+            ride_window = VideoWindow()
+        except (OSError, ValueError, ImportError) as e:
+            print(f"ERROR: Could not open the ride video {args.video}.")
+            print(e)
+            return
+    elif args.photos:
+        try:
+            ride_player = open_photos(args.photos, args.photo_spacing, log=log)
+            ride_window = VideoWindow()
+        except (OSError, ValueError, ImportError) as e:
+            print(f"ERROR: Could not open the photos in {args.photos}.")
+            print(e)
+            return
+
+    if args.telemetry:
+        try:
+            telemetry = TelemetryServer().start()
+        except OSError as e:
+            print(f"ERROR: Could not start the telemetry server: {e}")
+            return
+        print(f"Telemetry: open http://{local_address()}:{telemetry.port}/ on the phone")
+
+    if args.head:
+        try:
+            source = int(args.head) if args.head.isdigit() else args.head
+            head_tracker = HeadTracker(source, PIXELS_PER_DEGREE).start()
+        except (OSError, ImportError) as e:
+            print(f"ERROR: Could not start head tracking: {e}")
+            return
+        print("Head tracking: look straight at the screen, Ctrl+H recentres.")
+
+    watcher = None
+    if args.pace:
+        try:
+            open_grabber = make_grabber()
+        except RuntimeError as e:
+            print(f"ERROR: {e}")
+            return
+        pacer = ScenePacer()
+        watcher = SceneWatcher(pacer, open_grabber, record_dir=args.pace_record or None)
+        watcher.start()
+        print("Pacing steps by panorama loading." + (f" Recording frames to {args.pace_record}" if args.pace_record else ""))
+
+    listener = hotkeys = None
+    if args.hotkeys:
+        try:
+            bindings = dict(HOTKEY_BINDINGS, **parse_bindings(args.hotkeys_map))
+            hotkeys = DeviceHotkeys(args.hotkeys, bindings, grab=args.hotkeys_grab, events=events).start()
+        except (OSError, ValueError, ImportError) as e:
+            print(f"ERROR: Could not read hotkeys from {args.hotkeys}: {e}")
+            return
+        print(f"Hotkeys from {hotkeys.device.name}{' (grabbed)' if args.hotkeys_grab else ''}: "
+              f"{', '.join(sorted(set(bindings.values())))}.")
+    else:
+        listener = start_keyboard_listener()
+        print("Toggle Motion: Press 'Control + M' on the PC keyboard.")
+
+    try:
+        ser = serial.Serial(SERIAL_PORT, RAW_BAUD_RATE if args.raw else BAUD_RATE, timeout=0.1)
+        ser.flushInput()
+        print(f"Serial established. Ready for {'RAW SAMPLE' if args.raw else 'RPM'} input.")
+        print(f"Current Motion State: {'ENABLED' if is_motion_enabled else 'DISABLED'}")
+    except serial.SerialException as e:
+        print(f"ERROR: Could not open serial port {SERIAL_PORT}. Please check the port name and connection.")
+        print(e)
+        if listener is not None:
+            listener.stop()
+        if hotkeys is not None:
+            hotkeys.stop()
+        if watcher is not None:
+            watcher.stop()
+        if browser is not None:
+            browser.stop()
+        if ride_player is not None:
+            ride_player.close()
+        if head_tracker is not None:
+            head_tracker.stop()
+        if telemetry is not None:
+            telemetry.stop()
+        return
+
+    if args.watchdog_ms > 0:
+        watchdog = InputWatchdog(args.watchdog_ms / 1000.0, [release_outputs, lambda: events.post('stalled')],
+                                 held=lambda: is_moving, log=log)
+        watchdog.install().start()
+
+    if args.dashboard:
+        dashboard = Dashboard()
+        dashboard.latency = events
+        log.stream = dashboard             # Messages appear in the dashboard
+        dashboard.start()
+    log.start()
+
+    last_time = time.perf_counter()
+    last_rpm = 0.0
+    last_ghost_print = last_time
+    ghost_text = ''
+    last_pulse_line_time = None    # perf_counter() when the last pulse line arrived
+    link = LinkStats(BAUD_RATE)
+    last_link_print = last_time
+    last_raw_print = last_time
+    skip_packet = False            # Lines after a duplicate frame belong to the duplicate
+    raw_source = RawSampleSource() if args.raw else None
+    valid_frames = 0               # Lines / pulses / raw blocks that made sense
+    parse_errors = 0
+    pending_line = None            # A line read ahead while gathering pulse lines
+
+    while True:
+        try:
+            if raw_source is not None:
+                # Raw mode: detect edges on the PC; the pulses take the same path as pulse lines
+                raw_data = ser.read(max(ser.in_waiting, 1))
+                raw_pulses = raw_source.feed(raw_data)
+                line = ''
+            elif ride_player is not None and not ser.in_waiting and pending_line is None:
+                raw_data = raw_pulses = None
+                line = ''                  # Ride modes: never block the window on the port
+            elif pending_line is not None:
+                raw_data = raw_pulses = None
+                line, pending_line = pending_line, None
+            else:
+                raw_data = raw_pulses = None
+                line = ser.readline().decode('utf-8').strip()
+
+            now = time.perf_counter()
+            dt = now - last_time
+            last_time = now
+
+            prev_rpm = last_rpm
+            steer_x = steer_y = None
+            zoom_delta = 0
+            frame = parse_frame_line(line) if line else None
+            if frame is not None:
+                if link.link_lost:
+                    log.write("--- RADIO LINK BACK ---")
+                skip_packet = not link.frame(*frame, now, len(line) + 2)
+                line = ''
+            elif skip_packet:
+                line = ''
+            if link.silent(now):
+                # The bike side always sends a heartbeat: silence is the radio, not a quiet bike
+                log.write("--- RADIO LINK LOST: no packets, stopping ---")
+                last_rpm = 0.0
+                bike.stop()
+            pulses = raw_pulses if raw_pulses else (parse_pulse_line(line) if line else None)
+            if pulses is not None and not raw_pulses:
+                # The P,0 and P,1 lines of one packet overlap in time: feed them as one batch,
+                # which the pulse engine merges by timestamp
+                while ser.in_waiting:
+                    following = ser.readline().decode('utf-8').strip()
+                    more = parse_pulse_line(following)
+                    if more is None:
+                        pending_line = following
+                        break
+                    pulses += more
+            if pulses is not None:
+                pulse_engine.feed(pulses)
+                last_pulse_line_time = now
+                parsed = None
+            else:
+                parsed = parse_line(line) if line else None
+                if line and parsed is None:
+                    parse_errors += 1
+            if parsed:
+                line_rpm, steer_x, steer_y, zoom_delta = parsed
+                if last_pulse_line_time is None:
+                    last_rpm = line_rpm
+            if last_pulse_line_time is not None:
+                # Pulse mode: the pulse times win over the receiver's RPM line (still used for steering).
+                # Estimate the transmitter clock 'now' so a stop is noticed between pulses.
+                last_rpm = pulse_engine.rpm_at(pulse_engine.clock_us(now - last_pulse_line_time))
+            if (parsed or pulses) and recorder is not None:
+                recorder.record(last_rpm, now)
+            # Raw mode: only bytes that completed a block count, not noise on the line
+            valid = bool(parsed or pulses is not None or frame is not None or (raw_data and raw_source.fed_blocks))
+            valid_frames += valid
+            if watchdog is not None:
+                if valid:
+                    if watchdog.feed(now):
+                        log.write("--- WATCHDOG: input back ---")
+                elif watchdog.stalled:
+                    last_rpm = 0.0             # Stale: do not press the key again until input returns
+            events.drain(handle_event)
+
+            # Fixed-timestep physics: the key follows virtual speed, which coasts down on its own
+            if is_motion_enabled:
+                bike.update(rpm_to_speed(last_rpm, ROLLER_CIRCUMFERENCE_METERS), dt)
+            if ride_player is not None:
+                ride_window.show(ride_player.update(bike.speed, dt))
+                delay_ms = VIDEO_LOOP_MS
+            else:
+                delay_ms = simulate_motion(bike.speed)
+
+            # Distance pedalled since the last reading (trapezoid between the two RPM readings)
+            meters = (prev_rpm + last_rpm) * 0.5 / 60.0 * ROLLER_CIRCUMFERENCE_METERS * dt
+            if ride_start_time is None and last_rpm > 0:
+                ride_start_time = now
+            ride_distance += meters
+
+            if link.received and now - last_link_print >= LINK_PRINT_SECONDS:
+                log.write("{}", link.summary())   # Every LINK_PRINT_SECONDS, from state only this loop changes
+                last_link_print = now
+            if raw_source is not None and raw_source.blocks and now - last_raw_print >= RAW_PRINT_SECONDS:
+                log.write("{}", raw_source.summary())
+                last_raw_print = now
+
+            if now - last_ghost_print >= GHOST_PRINT_SECONDS and (ghost or ghost_pack):
+                ghost_text = print_ghost_gap(ghost, ghost_pack, now)
+                last_ghost_print = now
+
+            move_x = move_y = 0
+            if steer_x is not None:
+                move_x, move_y = shape_joystick(steer_x, steer_y)
+            if head_tracker is not None:
+                head_x, head_y = head_tracker.look(dt)
+                if move_x == 0 and move_y == 0:
+                    move_x, move_y = head_x, head_y
+
+            # Route steering only takes over when the rider is not using the joystick or head
+            route_steer = update_route(meters)
+            if move_x == 0 and abs(route_steer) > STEER_DEAD_ZONE:
+                move_x = int(route_steer * MOUSE_SENSITIVITY)
+
+            if ride_player is not None:
+                move_x = move_y = zoom_delta = 0   # Nothing to look around in a video or photo
+            move_x = simulate_mouse_look(move_x, move_y)
+            simulate_zoom(zoom_delta, now)
+            if route_follower is not None and move_x:
+                route_follower.view_moved(move_x)
+
+            if route_follower is not None and route_follower.finished():
+                log.write("--- ROUTE COMPLETE ---")
+                route_follower = None
+
+            if dashboard is not None:
+                dashboard.tick(dt)
+                dashboard.set(rpm=last_rpm, speed=bike.speed, power=bike.power, distance=ride_distance, moving=is_moving,
+                              motion=is_motion_enabled, stalled=watchdog is not None and watchdog.stalled,
+                              frames=valid_frames, parse_errors=parse_errors)
+            if telemetry is not None:
+                telemetry.publish({'rpm': last_rpm, 'speed': bike.speed * 3.6, 'power': bike.power,
+                                   'distance': ride_distance, 'ghost': ghost_text,
+                                   'motion': is_motion_enabled, 'moving': is_moving})
+
+            events.sleep(delay_ms / 1000.0, handle_event)
+
+        except KeyboardInterrupt:
+            if dashboard is not None:
+                dashboard.stop()
+                log.stream = None          # What is still queued goes to the console
+            log.stop()
+            print("\nShutting down bridge...")
+            if is_moving:
+                release_step_key()
+            if recorder is not None:
+                recorder.close()
+            if link.received:
+                print(link.summary())
+            if raw_source is not None:
+                print(raw_source.summary())
+            if watcher is not None:
+                watcher.stop()
+                print(f"{pacer.summary()} | {watcher.hash_cost_us():.0f} us per frame hash")
+            if browser is not None:
+                print(browser.summary())
+                browser.stop()
+            if ride_player is not None:
+                print(ride_player.summary())
+                ride_player.close()
+                ride_window.close()
+            if head_tracker is not None:
+                print(head_tracker.summary())
+                head_tracker.stop()
+            if telemetry is not None:
+                print(telemetry.summary())
+                telemetry.stop()
+            if hotkeys is not None:
+                print(hotkeys.summary())
+                hotkeys.stop()
+            if events.posted:
+                print(events.summary())
+            if watchdog is not None:
+                watchdog.stop()
+                print(watchdog.summary())
+            print(log.summary())
+            if dashboard is not None:
+                print(dashboard.summary())
+            ser.close()
+            if listener is not None:
+                listener.stop()
+            break
+        except Exception as e:
+            log.write("An unexpected error occurred: {}", e)
+            time.sleep(1)
+
+if __name__ == "__main__":
+    main()
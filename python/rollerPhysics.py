@@ -0,0 +1,78 @@
+# rollerPhysics.py - Virtual Bike Physics
+# A fixed-timestep model of rider + bike so the view coasts instead of stopping dead.
+#
+# The roller speed (from RPM) drives the virtual bike through a freewheel: it can only
+# push the bike forward, never hold it back. Rolling resistance and aero drag then slow
+# the bike down when you stop pedalling, just like coasting on the road.
+# A short pause (or the firmware's 500 ms zero-RPM timeout) no longer kills the motion.
+
+# --- CONFIGURATION ---
+RIDER_MASS_KG = 85.0        # Rider + bike
+ROLLING_RESISTANCE = 0.005  # Crr (road tyre on asphalt)
+DRAG_AREA_M2 = 0.40         # CdA (hoods position)
+AIR_DENSITY = 1.225         # kg/m^3
+GRAVITY = 9.81
+
+COAST_BRAKE_NEWTONS = 30.0  # Extra drag while not pedalling, so a stop takes seconds rather than a minute
+
+DRIVE_STIFFNESS = 5.0       # 1/s - how hard the drivetrain pulls the bike up to roller speed
+PHYSICS_STEP_SECONDS = 0.01 # Fixed integration step (100 Hz)
+MAX_CATCH_UP_SECONDS = 0.5  # Never simulate more than this after a long stall
+
+
+class BikePhysics:
+    """Integrates virtual speed from roller speed with a fixed timestep."""
+
+    def __init__(self, mass=RIDER_MASS_KG, crr=ROLLING_RESISTANCE, cda=DRAG_AREA_M2):
+        self.mass = mass
+        self.rolling_force = crr * mass * GRAVITY
+        self.drag_factor = 0.5 * AIR_DENSITY * cda
+        self.speed = 0.0        # m/s
+        self.power = 0.0        # W, rider power estimate (drive force x speed)
+        self.distance = 0.0     # m
+        self._accumulator = 0.0
+
+    def _step(self, drive_speed, dt):
+        v = self.speed
+        drive = 0.0
+        if drive_speed > v:
+            # Freewheel: the drivetrain only pushes when the roller is faster than the bike
+            drive = DRIVE_STIFFNESS * self.mass * (drive_speed - v)
+
+        resist = self.drag_factor * v * v
+        if v > 0.0:
+            resist += self.rolling_force
+            if drive == 0.0:
+                resist += COAST_BRAKE_NEWTONS
+        self.power = drive * v
+
+        v += (drive - resist) / self.mass * dt
+        if v < 0.0:
+            v = 0.0
+        self.speed = v
+        self.distance += v * dt
+
+    def update(self, drive_speed, elapsed):
+        """
+        Advances the model by 'elapsed' seconds in fixed PHYSICS_STEP_SECONDS steps.
+
+        :param drive_speed: Roller surface speed in m/s (from RPM).
+        :param elapsed: Real time since the last update, in seconds.
+        :return: distance (m) covered during this update.
+        """
+        start = self.distance
+        self._accumulator += min(elapsed, MAX_CATCH_UP_SECONDS)
+        while self._accumulator >= PHYSICS_STEP_SECONDS:
+            self._step(drive_speed, PHYSICS_STEP_SECONDS)
+            self._accumulator -= PHYSICS_STEP_SECONDS
+        return self.distance - start
+
+    def stop(self):
+        """Kills all virtual speed (e.g. when motion is toggled off)."""
+        self.speed = 0.0
+        self.power = 0.0
+
+
+def rpm_to_speed(rpm, circumference):
+    """Roller surface speed in m/s for the given RPM and circumference (m)."""
+    return rpm / 60.0 * circumference
@@ -0,0 +1,216 @@
+# rollerTools.py - Command Line Tools for the Bicycle Rollers Interface
+# Offline helpers that work on recorded data rather than driving Street View.
+#
+# Usage:
+#   python rollerTools.py ride-report ride1.csv [more rides or folders] [--jobs 4] [--plot-dir plots]
+#   python rollerTools.py pack rides/                                  (.npz copies that load much faster)
+#   python rollerTools.py calibrate capture.txt
+#   python rollerTools.py calibrate --port COM4 --seconds 30
+#   python rollerTools.py calibrate --raw rawCapture.bin
+#   python rollerTools.py tune --port COM4                              (show the transmitter settings)
+#   python rollerTools.py tune --port COM4 trigger_level=640 rearm_level=570 --save
+#   python rollerTools.py pace-replay frames/                          (frames from the bridge's --pace-record)
+
+import argparse
+import sys
+import time
+
+
+def cmd_ride_report(args):
+    """Prints a summary of each recorded ride."""
+    from rideLog import find_ride_files
+    from rideReport import report_files, print_report
+
+    paths = find_ride_files(args.rides)
+    if not paths:
+        print("ERROR: No ride files found.")
+        return 1
+
+    start = time.perf_counter()
+    results = report_files(paths, jobs=args.jobs, plot_dir=args.plot_dir)
+    elapsed = time.perf_counter() - start
+
+    for path, metrics in results:
+        print_report(path, metrics)
+        print()
+    print(f"Processed {len(results)} ride(s) in {elapsed:.3f}s")
+    return 0
+
+
+def cmd_pack(args):
+    """Writes a binary '.npz' copy next to each CSV ride."""
+    from rideLog import find_ride_files, load_ride, save_ride_npz
+
+    paths = [p for p in find_ride_files(args.rides) if p.endswith('.csv')]
+    if not paths:
+        print("No CSV rides to pack.")
+        return 0
+    for path in paths:
+        t, rpm = load_ride(path)
+        target = path[:-4] + '.npz'
+        save_ride_npz(target, t, rpm)
+        print(f"{path} -> {target} ({len(t)} samples)")
+    return 0
+
+
+def cmd_calibrate(args):
+    """Proposes a Hall sensor threshold from the transmitter's debug output."""
+    from calibrate import read_capture, read_serial, propose_threshold, print_proposal
+
+    start = time.perf_counter()
+    if args.capture and args.raw:
+        from rawSamples import read_raw_capture, SAMPLE_PERIOD_US
+        readings = read_raw_capture(args.capture)
+        seconds_per_sample = SAMPLE_PERIOD_US / 1000000.0
+    elif args.capture:
+        readings, seconds_per_sample = read_capture(args.capture)
+        if args.sample_rate:
+            seconds_per_sample = 1.0 / args.sample_rate
+    elif args.port:
+        print(f"Capturing from {args.port} for {args.seconds:.0f}s. Spin the wheel now...")
+        readings, seconds_per_sample = read_serial(args.port, args.baud, args.seconds)
+    else:
+        print("ERROR: Give a capture file or --port.")
+        return 1
+
+    try:
+        proposal = propose_threshold(readings, seconds_per_sample)
+    except ValueError as e:
+        print(f"ERROR: {e}")
+        return 1
+    print_proposal(proposal)
+    print(f"Calibrated from {readings.size} readings in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def cmd_tune(args):
+    """Reads or changes the transmitter's settings at runtime through the Receiver."""
+    import serial
+    from bikeControl import PARAMS, ControlClient, ControlError
+
+    changes = []
+    for item in args.settings:
+        name, sep, value = item.partition('=')
+        if not sep or name not in PARAMS:
+            print(f"ERROR: Expected NAME=VALUE with NAME one of: {', '.join(PARAMS)}")
+            return 1
+        try:
+            changes.append((name, int(value)))
+        except ValueError:
+            print(f"ERROR: {item}: the value must be a whole number.")
+            return 1
+
+    ser = serial.Serial(args.port, args.baud, timeout=0.1)
+    try:
+        time.sleep(args.settle)       # Opening the port resets most Arduinos
+        ser.reset_input_buffer()
+        client = ControlClient(ser.write)
+        start = time.perf_counter()
+        try:
+            if args.defaults:
+                client.wait([client.defaults()], ser.readline)
+            # All reads are pipelined: they go out together and are matched by id
+            names = list(PARAMS)
+            current = dict(zip(names, client.wait([client.get(name) for name in names], ser.readline)))
+            if changes:
+                # Every single SET must keep rearm_level <= trigger_level: when the trigger
+                # level moves below the current re-arm level, the re-arm level goes first
+                wanted = dict(changes)
+                if wanted.get('trigger_level', current['trigger_level']) < current['rearm_level']:
+                    changes.sort(key=lambda change: change[0] != 'rearm_level')
+                # The Receiver queues commands in order, so the SETs and the read-back are pipelined too
+                futures = [client.set(name, value) for name, value in changes]
+                futures += [client.get(name) for name in names]
+                current = dict(zip(names, client.wait(futures, ser.readline)[len(changes):]))
+            if args.save:
+                client.wait([client.save()], ser.readline)
+        except (ControlError, ValueError) as e:
+            print(f"ERROR: {e}")
+            return 1
+    finally:
+        ser.close()
+
+    for name, value in current.items():
+        print(f"  {name:<20} {value}")
+    note = f", {client.retried} retried" if client.retried else ""
+    print(f"{'Saved to EEPROM. ' if args.save else ''}Done in {time.perf_counter() - start:.2f}s{note}")
+    return 0
+
+
+def cmd_pace_replay(args):
+    """Runs recorded screen frames through the panorama pacing logic."""
+    from scenePacer import ScenePacer, load_recorded_frames, replay, FRAMES_PER_SECOND
+
+    try:
+        frames = load_recorded_frames(args.folder, args.fps or FRAMES_PER_SECOND)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"ERROR: {e}")
+        return 1
+    if not frames:
+        print("ERROR: No frames found (.pgm, or .png / .jpg with pillow).")
+        return 1
+
+    options = {'change_bits': args.change_bits, 'settle_bits': args.settle_bits,
+               'settle_frames': args.settle_frames, 'max_wait': args.max_wait}
+    pacer = ScenePacer(**{k: v for k, v in options.items() if v is not None})
+    pacer, mean_us, max_us = replay(frames, pacer)
+    recorded = frames[0][2] is not None
+    print(f"{len(frames)} frames over {frames[-1][0] - frames[0][0]:.1f}s, "
+          f"{'steps as recorded' if recorded else 'stepping whenever ready'}")
+    print(pacer.summary())
+    print(f"Frame hash: {mean_us:.0f} us mean, {max_us:.0f} us max")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Bicycle Rollers Interface tools")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('ride-report', help="Summarize recorded rides")
+    p.add_argument('rides', nargs='+', help="Ride files (.csv/.npz) or folders of rides")
+    p.add_argument('--jobs', type=int, default=None, help="Worker processes for many rides (default: one per CPU)")
+    p.add_argument('--plot-dir', default=None, help="Save an LTTB-downsampled cadence plot per ride here")
+    p.set_defaults(func=cmd_ride_report)
+
+    p = sub.add_parser('pack', help="Save recorded CSV rides as .npz for faster loading")
+    p.add_argument('rides', nargs='+', help="CSV ride files or folders of rides")
+    p.set_defaults(func=cmd_pack)
+
+    p = sub.add_parser('calibrate', help="Propose MAGNET_THRESHOLD from transmitter debug output")
+    p.add_argument('capture', nargs='?', help="Saved serial capture ('Analog Reading (A0): N | ...' lines)")
+    p.add_argument('--port', help="Read live from this serial port instead of a file")
+    p.add_argument('--baud', type=int, default=9600)
+    p.add_argument('--seconds', type=float, default=30.0, help="How long to capture from --port")
+    p.add_argument('--sample-rate', type=float, default=None, help="Readings per second in the capture file (for false triggers per hour)")
+    p.add_argument('--raw', action='store_true', help="Capture file is binary blocks from bicyclePartInterfaceRaw.ino")
+    p.set_defaults(func=cmd_calibrate)
+
+    p = sub.add_parser('tune', help="Read or change the transmitter settings without reflashing")
+    p.add_argument('settings', nargs='*', help="NAME=VALUE changes, e.g. trigger_level=640 (none: just show)")
+    p.add_argument('--port', required=True, help="The Receiver's serial port")
+    p.add_argument('--baud', type=int, default=9600)
+    p.add_argument('--save', action='store_true', help="Store the settings in the transmitter's EEPROM")
+    p.add_argument('--defaults', action='store_true', help="Go back to the settings compiled into the sketch first")
+    p.add_argument('--settle', type=float, default=2.0, help="Seconds to wait after opening the port")
+    p.set_defaults(func=cmd_tune)
+
+    p = sub.add_parser('pace-replay', help="Try the panorama pacing settings on recorded frames")
+    p.add_argument('folder', help="Folder from the bridge's --pace-record, or any folder of frames")
+    p.add_argument('--fps', type=float, default=None, help="Frame rate of a folder without frames.csv")
+    # Defaults: the CONFIGURATION section of scenePacer.py
+    p.add_argument('--change-bits', type=int, default=None, help="Hash bits a step must change")
+    p.add_argument('--settle-bits', type=int, default=None, help="Hash bits a settled frame may change")
+    p.add_argument('--settle-frames', type=int, default=None, help="Settled frames before the next step")
+    p.add_argument('--max-wait', type=float, default=None, help="Seconds before stepping anyway")
+    p.set_defaults(func=cmd_pace_replay)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
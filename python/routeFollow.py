@@ -0,0 +1,195 @@
+# routeFollow.py - Route Following
+# Loads a planned route (GPX file or Google encoded polyline) and maps the
+# distance pedalled to an exact position and heading along it.
+#
+# The cumulative distance of every route point is computed once when the route
+# is loaded, so each lookup during the ride is a single binary search (O(log n)).
+# A 200 km route with a point every few meters is still only ~17 comparisons per tick.
+
+import bisect
+import xml.etree.ElementTree as ET
+import numpy as np
+
+# --- CONFIGURATION ---
+EARTH_RADIUS_METERS = 6371008.8
+
+LOOKAHEAD_METERS = 15.0     # Start turning the view this far before a corner
+ROUTE_STEER_GAIN = 4.0      # Steer value (-100..100) per degree of heading error
+ROUTE_STEER_DEAD_ZONE = 3.0 # Heading error (degrees) that is ignored
+
+
+# --- LOADING ---
+
+def load_gpx(path):
+    """Returns an (N, 2) array of (lat, lon) from the track/route points of a GPX file."""
+    tree = ET.parse(path)
+    points = []
+    for element in tree.iter():
+        # Tags are namespaced, e.g. '{http://www.topografix.com/GPX/1/1}trkpt'
+        tag = element.tag.rsplit('}', 1)[-1]
+        if tag in ('trkpt', 'rtept'):
+            points.append((float(element.get('lat')), float(element.get('lon'))))
+    return np.array(points, dtype=np.float64).reshape(-1, 2)
+
+
+def decode_polyline(encoded, precision=5):
+    """Decodes a Google encoded polyline string into an (N, 2) array of (lat, lon)."""
+    coords = []
+    index = lat = lon = 0
+    factor = 10 ** precision
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1f) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        coords.append((lat / factor, lon / factor))
+    return np.array(coords, dtype=np.float64).reshape(-1, 2)
+
+
+def load_route(path):
+    """Loads a .gpx file, or a text file holding an encoded polyline."""
+    if path.lower().endswith('.gpx'):
+        points = load_gpx(path)
+    else:
+        with open(path) as f:
+            points = decode_polyline(f.read().strip())
+    return Route(points)
+
+
+# --- ROUTE INDEX ---
+
+class Route:
+    """A route with a precomputed cumulative-distance index."""
+
+    def __init__(self, points):
+        """
+        :param points: (N, 2) array of (lat, lon) in degrees.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        if points.shape[0] < 2:
+            raise ValueError("A route needs at least two points.")
+
+        lat = np.radians(points[:, 0])
+        lon = np.radians(points[:, 1])
+        lat1, lat2 = lat[:-1], lat[1:]
+        dlon = lon[1:] - lon[:-1]
+
+        # Haversine segment lengths
+        a = np.sin((lat2 - lat1) * 0.5) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon * 0.5) ** 2
+        seg_length = 2.0 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+        # Initial bearing of each segment (0 = North, 90 = East)
+        y = np.sin(dlon) * np.cos(lat2)
+        x = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+        bearing = np.degrees(np.arctan2(y, x)) % 360.0
+
+        # Drop zero-length segments (repeated GPX points) so interpolation never divides by 0
+        keep = seg_length > 0
+        starts = np.concatenate((np.flatnonzero(keep), [points.shape[0] - 1]))
+        if starts.size < 2:
+            raise ValueError("Route points are all identical.")
+
+        self.points = points[starts]
+        self.seg_length = seg_length[keep]
+        self.seg_bearing = bearing[keep]
+        cumulative = np.concatenate(([0.0], np.cumsum(self.seg_length)))
+        self.total_length = float(cumulative[-1])
+
+        # Plain Python lists: bisect on a list is faster than np.searchsorted for one scalar
+        self._cumulative = cumulative.tolist()
+        self._lat = self.points[:, 0].tolist()
+        self._lon = self.points[:, 1].tolist()
+        self._bearing = self.seg_bearing.tolist()
+        self._last_segment = len(self._bearing) - 1
+
+    def segment_at(self, distance):
+        """Index of the segment containing 'distance' (clamped to the route)."""
+        i = bisect.bisect_right(self._cumulative, distance) - 1
+        if i < 0:
+            return 0
+        if i > self._last_segment:
+            return self._last_segment
+        return i
+
+    def position_at(self, distance):
+        """
+        Returns (lat, lon, heading_degrees) at 'distance' meters along the route.
+        The position is interpolated linearly inside the segment.
+        """
+        i = self.segment_at(distance)
+        start = self._cumulative[i]
+        length = self._cumulative[i + 1] - start
+        f = min(max((distance - start) / length, 0.0), 1.0)
+        lat = self._lat[i] + (self._lat[i + 1] - self._lat[i]) * f
+        lon = self._lon[i] + (self._lon[i + 1] - self._lon[i]) * f
+        return lat, lon, self._bearing[i]
+
+    def heading_at(self, distance):
+        """Route heading in degrees at 'distance' meters along the route."""
+        return self._bearing[self.segment_at(distance)]
+
+    def positions_at(self, distances):
+        """Vectorized position_at for many distances (e.g. plotting or ghost riders)."""
+        cumulative = np.asarray(self._cumulative)
+        d = np.clip(np.asarray(distances, dtype=np.float64), 0.0, self.total_length)
+        i = np.clip(np.searchsorted(cumulative, d, side='right') - 1, 0, self._last_segment)
+        f = (d - cumulative[i]) / self.seg_length[i]
+        lat = self.points[i, 0] + (self.points[i + 1, 0] - self.points[i, 0]) * f
+        lon = self.points[i, 1] + (self.points[i + 1, 1] - self.points[i, 1]) * f
+        return lat, lon, self.seg_bearing[i]
+
+
+def heading_error(target, current):
+    """Signed difference target - current in degrees, wrapped to -180..180."""
+    return (target - current + 180.0) % 360.0 - 180.0
+
+
+# --- STEERING ---
+
+class RouteFollower:
+    """
+    Tracks where the view is pointing and produces a steer value (-100..100, the same
+    range as the joystick) that turns the view toward the route ahead.
+    """
+
+    def __init__(self, route, pixels_per_degree):
+        """
+        :param route: Route to follow.
+        :param pixels_per_degree: Mouse pixels that rotate the Street View camera by one degree.
+        """
+        self.route = route
+        self.pixels_per_degree = pixels_per_degree
+        self.distance = 0.0
+        # Assume the rider starts the ride already facing along the route
+        self.view_heading = route.heading_at(0.0)
+
+    def advance(self, meters):
+        """Adds pedalled distance to the odometer."""
+        self.distance += meters
+
+    def steer_value(self):
+        """Steer value toward the heading LOOKAHEAD_METERS ahead (0 when already lined up)."""
+        if self.distance >= self.route.total_length:
+            return 0
+        target = self.route.heading_at(self.distance + LOOKAHEAD_METERS)
+        error = heading_error(target, self.view_heading)
+        if abs(error) < ROUTE_STEER_DEAD_ZONE:
+            return 0
+        return int(max(-100.0, min(100.0, error * ROUTE_STEER_GAIN)))
+
+    def view_moved(self, move_x):
+        """Updates the view heading after 'move_x' pixels of horizontal mouse movement."""
+        self.view_heading = (self.view_heading + move_x / self.pixels_per_degree) % 360.0
+
+    def finished(self):
+        return self.distance >= self.route.total_length
@@ -0,0 +1,313 @@
+# scenePacer.py - Panorama-Load-Aware Step Pacing
+# Holding 'ArrowUp' (or tapping it every 100 ms) asks Street View for panoramas faster than
+# it can load them: the extra presses are wasted and the view stutters and jumps. With
+# pacing on, the bridge only sends the next step once the scene has changed and settled.
+#
+# - frame_hash: a 64-bit difference hash (dHash) of a small region of the screen. The region
+#   is subsampled with a stride, averaged into 8 x 9 cells and each cell compared with its
+#   right neighbour - well under 1 ms per frame, and blind to JPEG noise and tiny shifts.
+# - ScenePacer: after a step it waits for the hash to move CHANGE_BITS away from the hash
+#   before the step (the new panorama arrived) and then to stay within SETTLE_BITS for
+#   SETTLE_FRAMES frames (it finished loading). MAX_WAIT_SECONDS stops it from waiting
+#   forever when a step changes nothing (end of the road, the browser lost focus).
+# - SceneWatcher: grabs and hashes the region on its own thread (mss, or PIL's ImageGrab)
+#   and can record the frames for 'python rollerTools.py pace-replay'.
+#
+# Frames are recorded as small 8-bit PGM files plus frames.csv (time, file, steps so far).
+
+import csv
+import os
+import threading
+import time
+
+import numpy as np
+
+# --- CONFIGURATION ---
+SCENE_REGION = None             # (left, top, width, height) to watch; None = middle of the main screen
+SCENE_REGION_FRACTION = 0.4     # Size of the default region relative to the screen
+FRAME_STRIDE = 4                # Use every 4th pixel in both directions before averaging
+FRAMES_PER_SECOND = 20.0        # How often the watcher grabs the region
+CHANGE_BITS = 10                # Hash bits (of 64) that must differ from before the step
+SETTLE_BITS = 3                 # Frames this close to the previous one count as settled
+SETTLE_FRAMES = 3               # Settled frames in a row before the next step
+MAX_WAIT_SECONDS = 1.5          # Step anyway after this long
+HASH_ROWS, HASH_COLS = 8, 8     # 8 x 8 comparisons = 64 bits
+
+
+def frame_hash(frame, stride=FRAME_STRIDE):
+    """
+    Difference hash of a frame: an H x W grey array, or H x W x C colour (the green
+    channel is used as brightness). Returns a 64-bit int.
+    """
+    if frame.ndim == 3:
+        frame = frame[::stride, ::stride, 1]
+    else:
+        frame = frame[::stride, ::stride]
+    rows, cols = HASH_ROWS, HASH_COLS + 1
+    h, w = frame.shape
+    cell_h, cell_w = h // rows, w // cols
+    if cell_h == 0 or cell_w == 0:
+        raise ValueError(f"frame of {h}x{w} samples is too small to hash")
+    cells = frame[:rows * cell_h, :cols * cell_w].reshape(rows, cell_h, cols, cell_w)
+    means = cells.sum(axis=(1, 3), dtype=np.uint32)     # Equal cell sizes: sums compare like means
+    bits = np.packbits(means[:, 1:] > means[:, :-1])
+    return int.from_bytes(bits.tobytes(), 'big')
+
+
+def hash_distance(a, b):
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+class ScenePacer:
+    """Decides when the next step may be sent. observe() may run on another thread."""
+
+    def __init__(self, change_bits=CHANGE_BITS, settle_bits=SETTLE_BITS,
+                 settle_frames=SETTLE_FRAMES, max_wait=MAX_WAIT_SECONDS):
+        self.change_bits = change_bits
+        self.settle_bits = settle_bits
+        self.settle_frames = settle_frames
+        self.max_wait = max_wait
+        self.lock = threading.Lock()
+        self.last_hash = None
+        self.stable = 0             # Frames in a row within settle_bits of the one before
+        self.waiting = False        # A step was sent and the scene has not settled yet
+        self.changed = False
+        self.before_hash = None
+        self.step_time = None
+        self.steps = 0
+        self.timeouts = 0
+        self.settle_times = []      # Seconds from a step until the scene settled
+
+    def observe(self, frame_hash_value, now):
+        """Feeds the hash of a frame grabbed at perf_counter() time now."""
+        with self.lock:
+            if self.last_hash is not None and hash_distance(frame_hash_value, self.last_hash) <= self.settle_bits:
+                self.stable += 1
+            else:
+                self.stable = 0
+            self.last_hash = frame_hash_value
+            if not self.waiting:
+                return
+            if not self.changed:
+                if self.before_hash is None or hash_distance(frame_hash_value, self.before_hash) >= self.change_bits:
+                    self.changed = True
+                    self.stable = 0
+            elif self.stable >= self.settle_frames:
+                self.waiting = False
+                self.settle_times.append(now - self.step_time)
+
+    def ready(self, now):
+        """True when the next step may be sent."""
+        with self.lock:
+            if self.waiting and now - self.step_time >= self.max_wait:
+                self.waiting = False
+                self.timeouts += 1
+            return not self.waiting
+
+    def stepped(self, now):
+        """Call right after sending a step."""
+        with self.lock:
+            self.waiting = True
+            self.changed = False
+            self.before_hash = self.last_hash
+            self.step_time = now
+            self.steps += 1
+
+    def summary(self):
+        """One line for the console."""
+        with self.lock:
+            times = sorted(self.settle_times)
+        text = f"PACING: {self.steps} steps"
+        if times:
+            text += f", settled in {times[len(times) // 2] * 1000:.0f} ms median / {times[-1] * 1000:.0f} ms max"
+        if self.timeouts:
+            text += f", {self.timeouts} without a scene change"
+        return text
+
+
+def default_region(screen_width, screen_height, fraction=SCENE_REGION_FRACTION):
+    """The middle of the screen, away from the browser bars and Street View's overlays."""
+    width, height = int(screen_width * fraction), int(screen_height * fraction)
+    return (screen_width - width) // 2, (screen_height - height) // 2, width, height
+
+
+def make_grabber(region=SCENE_REGION):
+    """
+    Returns a factory that, called on the thread that will grab, returns a function that
+    grabs the region as an H x W x C array. Uses mss when installed (fast), else PIL's
+    ImageGrab; raises RuntimeError when neither is available. mss keeps per-thread handles
+    (Windows device contexts, the X11 display), so it must be created where it is used.
+    """
+    try:
+        import mss
+    except ImportError:
+        mss = None
+    if mss is not None:
+        def open_mss():
+            sct = mss.mss()
+            box_region = region
+            if box_region is None:
+                screen = sct.monitors[1]
+                left, top, width, height = default_region(screen['width'], screen['height'])
+                box_region = (screen['left'] + left, screen['top'] + top, width, height)
+            box = {'left': box_region[0], 'top': box_region[1], 'width': box_region[2], 'height': box_region[3]}
+            return lambda: np.asarray(sct.grab(box))    # BGRA: channel 1 is still green
+        return open_mss
+
+    try:
+        from PIL import ImageGrab
+    except ImportError:
+        raise RuntimeError("Pacing needs a screen grabber: pip install mss (or pillow)")
+
+    def open_image_grab():
+        box_region = region if region is not None else default_region(*ImageGrab.grab().size)
+        bbox = (box_region[0], box_region[1], box_region[0] + box_region[2], box_region[1] + box_region[3])
+        return lambda: np.asarray(ImageGrab.grab(bbox))
+    return open_image_grab
+
+
+def write_pgm(path, grey):
+    """Saves an 8-bit grey array as a binary PGM."""
+    with open(path, 'wb') as f:
+        f.write(f"P5 {grey.shape[1]} {grey.shape[0]} 255\n".encode('ascii'))
+        f.write(np.ascontiguousarray(grey, dtype=np.uint8).tobytes())
+
+
+def read_pgm(path):
+    """Loads a binary 8-bit PGM written by write_pgm (or most other tools)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    fields = []
+    pos = 0
+    while len(fields) < 4:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b'#':
+            pos = data.index(b'\n', pos)
+            continue
+        end = pos
+        while not data[end:end + 1].isspace():
+            end += 1
+        fields.append(data[pos:end])
+        pos = end
+    if fields[0] != b'P5' or int(fields[3]) > 255:
+        raise ValueError(f"{path}: not an 8-bit binary PGM")
+    width, height = int(fields[1]), int(fields[2])
+    return np.frombuffer(data, dtype=np.uint8, count=width * height, offset=pos + 1).reshape(height, width)
+
+
+class SceneWatcher:
+    """Grabs and hashes frames on a daemon thread and feeds them to a ScenePacer."""
+
+    def __init__(self, pacer, open_grabber, fps=FRAMES_PER_SECOND, record_dir=None):
+        self.pacer = pacer
+        self.open_grabber = open_grabber    # From make_grabber(): called on the watcher thread
+        self.interval = 1.0 / fps
+        self.record_dir = record_dir
+        self.frames = 0
+        self.hash_seconds = 0.0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+    def _run(self):
+        grab = self.open_grabber()
+        index = None
+        if self.record_dir:
+            os.makedirs(self.record_dir, exist_ok=True)
+            index_file = open(os.path.join(self.record_dir, 'frames.csv'), 'w', newline='')
+            index = csv.writer(index_file)
+            index.writerow(['time_s', 'file', 'steps'])
+        start = time.perf_counter()
+        next_grab = start
+        try:
+            while self.running:
+                frame = grab()
+                now = time.perf_counter()
+                value = frame_hash(frame)
+                self.hash_seconds += time.perf_counter() - now
+                self.frames += 1
+                self.pacer.observe(value, now)
+                if index is not None:
+                    name = f"frame{self.frames:06d}.pgm"
+                    write_pgm(os.path.join(self.record_dir, name), frame[::FRAME_STRIDE, ::FRAME_STRIDE, 1])
+                    index.writerow([f"{now - start:.4f}", name, self.pacer.steps])
+                next_grab = max(next_grab + self.interval, time.perf_counter())
+                time.sleep(max(0.0, next_grab - time.perf_counter()))
+        finally:
+            if index is not None:
+                index_file.close()
+
+    def hash_cost_us(self):
+        """Mean time to hash one frame, in microseconds."""
+        return self.hash_seconds / self.frames * 1000000 if self.frames else 0.0
+
+
+def load_recorded_frames(folder, fps=FRAMES_PER_SECOND):
+    """
+    Loads a folder of frames for replay. Returns [(time_s, grey_array, steps_or_None)].
+    With a frames.csv (recorded by the bridge), its times and step counts are used; else
+    every .pgm (and, with pillow, .png / .jpg) in name order, fps apart, with no steps.
+    """
+    index_path = os.path.join(folder, 'frames.csv')
+    if os.path.exists(index_path):
+        frames = []
+        with open(index_path, newline='') as f:
+            for row in csv.DictReader(f):
+                grey = read_pgm(os.path.join(folder, row['file']))
+                frames.append((float(row['time_s']), grey, int(row['steps'])))
+        return frames
+
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(('.pgm', '.png', '.jpg', '.jpeg')))
+    frames = []
+    for i, name in enumerate(names):
+        path = os.path.join(folder, name)
+        if name.lower().endswith('.pgm'):
+            grey = read_pgm(path)
+        else:
+            try:
+                from PIL import Image
+            except ImportError:
+                raise RuntimeError(f"{name}: reading .png / .jpg frames needs pillow (or convert them to .pgm)")
+            grey = np.asarray(Image.open(path).convert('L'))[::FRAME_STRIDE, ::FRAME_STRIDE]
+        frames.append((i / fps, grey, None))
+    return frames
+
+
+def replay(frames, pacer=None):
+    """
+    Runs recorded frames through a ScenePacer, stride 1 since they are stored subsampled.
+    Recorded steps are replayed as they happened; frames without step counts are paced by the
+    pacer itself (a step as soon as it is ready). Returns (pacer, mean_hash_us, max_hash_us).
+    """
+    pacer = pacer or ScenePacer()
+    if frames:
+        frame_hash(frames[0][1], stride=1)     # Warm-up, not timed
+    costs = []
+    steps_seen = 0                # The bridge starts recording before its first step
+    for t, grey, steps in frames:
+        if steps is None:
+            if pacer.ready(t):
+                pacer.stepped(t)
+        else:
+            pacer.ready(t)          # Counts the steps that timed out
+            if steps > steps_seen:
+                pacer.stepped(t)
+            steps_seen = steps
+        start = time.perf_counter()
+        value = frame_hash(grey, stride=1)
+        costs.append(time.perf_counter() - start)
+        pacer.observe(value, t)
+    if not costs:
+        return pacer, 0.0, 0.0
+    return pacer, sum(costs) / len(costs) * 1000000, max(costs) * 1000000
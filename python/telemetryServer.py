@@ -0,0 +1,270 @@
+# telemetryServer.py - Live Ride Telemetry for a Phone or Tablet
+# rollerInterface30.py --telemetry serves telemetry.html on the local network: open
+# http://<this PC>:8770/ on the phone on the handlebars and it shows cadence, speed, power,
+# distance, the gap to the ghost and whether motion is on, live.
+#
+# - The server (HTTP for the page, WebSocket for the data) runs on asyncio in its own
+#   thread. The bridge only calls publish() with its latest numbers: a reference swap, it
+#   never waits for the network.
+# - At most TELEMETRY_HZ times a second the values are rounded (ROUNDING) and only the ones
+#   that changed are sent, as one small JSON object: {"rpm": 86, "t": ...}. A new client
+#   gets everything first.
+# - Backpressure is per client: each has its own writer task. While a slow phone is still
+#   taking an earlier message, new changes are merged into its one pending message instead
+#   of queuing up, so it catches up with the latest values and memory stays bounded. A
+#   client that takes nothing for CLIENT_TIMEOUT seconds is dropped. Other clients and the
+#   bridge never wait for it.
+#
+# fakePhones.py connects hundreds of simulated phones to measure it.
+
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+from webSocket import (CONTENT_TYPES, MAX_MESSAGE_BYTES, OP_CLOSE, OP_PING, OP_PONG, OP_TEXT,
+                       accept_key, apply_mask, encode_frame)
+
+# --- CONFIGURATION ---
+TELEMETRY_PORT = 8770
+TELEMETRY_HZ = 5.0              # Updates per second at most
+ROUNDING = {'rpm': 0, 'speed': 1, 'power': 0, 'distance': 0}   # Decimals sent: smaller changes are not sent
+CLIENT_HIGH_WATER = 16 * 1024   # Bytes buffered for a client before its writer waits
+CLIENT_TIMEOUT = 10.0           # Seconds a client may take nothing before it is dropped
+PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'telemetry.html')
+
+
+def rounded(values):
+    """The values as they are sent."""
+    out = {}
+    for key, value in values.items():
+        decimals = ROUNDING.get(key)
+        if decimals is not None and value is not None:
+            value = round(value, decimals) if decimals else int(round(value))
+        out[key] = value
+    return out
+
+
+_MISSING = object()
+
+
+def delta(old, new):
+    """The entries of new that differ from old."""
+    return {key: value for key, value in new.items() if old.get(key, _MISSING) != value}
+
+
+class TelemetryClient:
+    """One connected phone: its pending (merged) update and its statistics."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.pending = {}
+        self.wake = asyncio.Event()
+        self.sent = 0
+        self.merged = 0                 # Updates folded into one still waiting to be sent
+
+
+class TelemetryServer:
+    """Serves telemetry.html and pushes delta updates to its WebSocket clients."""
+
+    def __init__(self, host='0.0.0.0', port=TELEMETRY_PORT, hz=TELEMETRY_HZ, page=PAGE):
+        self.host = host
+        self.port = port
+        self.interval = 1.0 / hz
+        self.page = page
+        self.latest = {}                # From publish(): replaced, never changed in place
+        self.state = {}                 # As last sent
+        self.clients = set()
+        self.loop = None
+        self.server = None
+        self.ready = threading.Event()
+        self.error = None
+        self.updates = 0                # Delta messages built
+        self.bytes_sent = 0
+        self.messages_sent = 0
+        self.merged = 0
+        self.dropped = 0
+        self.max_clients = 0
+
+    # --- Bridge side ---
+
+    def publish(self, values):
+        """The bridge's latest values (a new dict each time). Never blocks."""
+        self.latest = values
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self.ready.wait(5.0)
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def summary(self):
+        per_message = self.bytes_sent / self.messages_sent if self.messages_sent else 0.0
+        return (f"TELEMETRY: {len(self.clients)} clients now (max {self.max_clients}), {self.updates} updates, "
+                f"{self.messages_sent} messages of {per_message:.0f} bytes on average, "
+                f"{self.merged} merged for clients still behind, {self.dropped} clients dropped")
+
+    # --- Server thread ---
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=512))
+        except OSError as e:
+            self.error = e
+            self.ready.set()
+            return
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.loop.create_task(self._broadcast())
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            for client in list(self.clients):
+                client.writer.transport.abort()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    async def _broadcast(self):
+        next_time = self.loop.time()
+        while True:
+            next_time = max(next_time + self.interval, self.loop.time())
+            await asyncio.sleep(next_time - self.loop.time())
+            new = rounded(self.latest)
+            changes = delta(self.state, new)
+            if not changes:
+                continue
+            self.state.update(changes)
+            self.updates += 1
+            for client in self.clients:
+                if client.pending:
+                    client.merged += 1
+                    self.merged += 1
+                client.pending.update(changes)
+                client.wake.set()
+
+    async def _handle(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), CLIENT_TIMEOUT)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+        lines = head.decode('latin-1').split('\r\n')
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('upgrade', '').lower() != 'websocket':
+            await self._serve_page(writer, lines[0])
+            return
+
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept_key(headers.get('sec-websocket-key', ''))}\r\n\r\n"
+        ).encode('ascii'))
+        writer.transport.set_write_buffer_limits(high=CLIENT_HIGH_WATER)
+        client = TelemetryClient(writer)
+        client.pending = dict(self.state)      # Everything first
+        client.wake.set()
+        self.clients.add(client)
+        self.max_clients = max(self.max_clients, len(self.clients))
+        sender = self.loop.create_task(self._send_loop(client))
+        try:
+            await self._receive_loop(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _send_loop(self, client):
+        writer = client.writer
+        try:
+            while True:
+                await client.wake.wait()
+                client.wake.clear()
+                if not client.pending:
+                    continue
+                message, client.pending = client.pending, {}
+                message['t'] = round(time.time(), 3)
+                frame = encode_frame(OP_TEXT, json.dumps(message, separators=(',', ':')).encode('utf-8'))
+                writer.write(frame)
+                self.messages_sent += 1
+                self.bytes_sent += len(frame)
+                client.sent += 1
+                # Only this client's task waits here; updates meanwhile go into client.pending
+                await asyncio.wait_for(writer.drain(), CLIENT_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            writer.transport.abort()
+        except ConnectionError:
+            pass
+
+    async def _receive_loop(self, reader, writer):
+        """Phones send nothing but pings and the close; the rest is ignored."""
+        while True:
+            first, second = await reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('>H', await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('>Q', await reader.readexactly(8))[0]
+            if length > MAX_MESSAGE_BYTES:
+                raise ValueError("frame too large")
+            key = await reader.readexactly(4) if second & 0x80 else None
+            payload = await reader.readexactly(length)
+            if key is not None:
+                payload = apply_mask(payload, key)
+            opcode = first & 0x0F
+            if opcode == OP_CLOSE:
+                writer.write(encode_frame(OP_CLOSE, payload[:2]))
+                return
+            if opcode == OP_PING:
+                writer.write(encode_frame(OP_PONG, payload))
+
+    async def _serve_page(self, writer, request_line):
+        parts = request_line.split()
+        path = parts[1].split('?')[0] if len(parts) > 1 else ''
+        try:
+            if parts[0] != 'GET' or path not in ('/', '/telemetry.html'):
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            else:
+                with open(self.page, 'rb') as f:
+                    body = f.read()
+                writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: {CONTENT_TYPES['.html']}\r\n"
+                              f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\n"
+                              "Connection: close\r\n\r\n").encode('ascii') + body)
+            await writer.drain()
+        except (OSError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+
+def local_address():
+    """This PC's address on the local network (for the phone), or 'localhost'."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(('192.0.2.1', 9))      # No packet is sent: only picks the outgoing interface
+            return s.getsockname()[0]
+    except OSError:
+        return 'localhost'
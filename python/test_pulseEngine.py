@@ -0,0 +1,71 @@
+# test_pulseEngine.py - Checks for pulseEngine.py (python -m pytest test_pulseEngine.py)
+
+from pulseEngine import MICROS_WRAP, PulseEngine, merge_pulse_streams
+
+
+def test_rpm_survives_micros_wrap():
+    """600 rpm on one magnet, with the transmitter's micros() wrapping halfway through."""
+    engine = PulseEngine({0: 1})
+    interval = 100000
+    t = MICROS_WRAP + 1 - 5 * interval
+    for _ in range(10):
+        engine.feed([(t & MICROS_WRAP, 0)])
+        t += interval
+    assert engine.latest_us < 5 * interval              # Wrapped along with the pulses
+    assert abs(engine.rpm_at() - 600.0) < 1.0
+    assert abs(engine.rpm_at(engine.clock_us(0.05)) - 600.0) < 1.0
+    assert engine.rpm_at(engine.clock_us(1.0)) == 0.0   # Stopped: no pulse for a second
+
+
+def test_clock_before_wrap_and_after():
+    engine = PulseEngine({0: 1})
+    assert engine.clock_us(0.1) is None
+    assert engine.rpm_at() == 0.0
+    engine.feed([(MICROS_WRAP - 10, 0)])
+    assert engine.clock_us(0.001) == 989
+    engine.feed([(MICROS_WRAP - 20, 0)])                 # Older (out of order): not the newest
+    assert engine.latest_us == MICROS_WRAP - 10
+
+
+def test_missed_pulse_keeps_magnets_in_step():
+    """4 unevenly spaced magnets at 300 rpm; one pulse is not seen."""
+    gaps = [0.20, 0.30, 0.22, 0.28]             # Share of a revolution before each magnet
+    revolution = 200000                         # 300 rpm
+    engine = PulseEngine({0: 4})
+    sensor = engine.sensors[0]
+    t = 1000000
+    pulses = []
+    for n in range(4 * 400):
+        t += int(gaps[n % 4] * revolution)
+        pulses.append(t)
+    engine.feed([(p, 0) for p in pulses[:1200]])
+    learned = list(sensor.share)
+    assert max(abs(a - b) for a, b in zip(learned, gaps)) < 0.01
+
+    rpms = []
+    for p in pulses[1200:1201] + pulses[1202:]:     # pulses[1201] is missed
+        engine.feed([(p, 0)])
+        if sensor.rpm:
+            rpms.append(engine.rpm_at())
+    assert all(abs(rpm - 300.0) < 6.0 for rpm in rpms)
+    assert max(abs(a - b) for a, b in zip(sensor.share, learned)) < 0.005
+
+
+def test_crank_and_roller_lines_are_merged():
+    """A crank at 60 rpm and a roller at 192 rpm (ratio 3.2), sent as overlapping P,0 / P,1 lines."""
+    engine = PulseEngine({0: 1, 1: 1})
+    roller = [(1000000 + n * 312500, 0) for n in range(1, 80)]
+    crank = [(1000000 + n * 1000000, 1) for n in range(1, 25)]
+    packet = 500000                                 # Each packet carries this much of both sensors
+    for start in range(1000000, 25000000, packet):
+        line0 = [p for p in roller if start <= p[0] < start + packet]
+        line1 = [p for p in crank if start <= p[0] < start + packet]
+        engine.feed(line0 + line1)                  # The roller line first, as the bridge reads them
+    assert abs(engine.ratio[1] - 3.2) < 0.05
+    assert abs(engine.rpm_at() - 192.0) < 1.0
+
+
+def test_merge_across_micros_wrap():
+    merged = list(merge_pulse_streams([(MICROS_WRAP - 100, 0), (50, 0)], [(MICROS_WRAP - 10, 1), (200, 1)],
+                                      since_us=MICROS_WRAP - 1000))
+    assert merged == [(MICROS_WRAP - 100, 0), (MICROS_WRAP - 10, 1), (50, 0), (200, 1)]
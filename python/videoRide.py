@@ -0,0 +1,355 @@
+# videoRide.py - Ride Video Playback Synchronized to the Bike
+# For rides without Street View: a first-person ride video (e.g. from vids/) plays at the
+# rider's speed. Pedal harder and it plays faster, coast and it slows down with the virtual
+# bike (rollerPhysics.py), stop and it holds the frame.
+#
+#   python rollerInterface30.py --video vids/myRide.mp4 [--video-speed 22]
+#
+# - VideoIndex: every frame's timestamp and where the keyframes are, read once from the file
+#   (packets only, no decoding) and saved next to it as <video>.index.npz, so any frame can be
+#   reached by seeking straight to the keyframe before it.
+# - FrameRing: a fixed number of decoded frames at display size. Frames behind the playhead
+#   go first; memory never grows with the playback rate.
+# - VideoPlayer: moves the playhead at speed / filmed speed and keeps DECODE_WORKERS threads
+#   decoding whole GOPs (keyframe to keyframe) ahead of it, AHEAD_SECONDS of playback at the
+#   current rate. Above 1x it only keeps every n-th frame of a GOP, and the display never
+#   waits for a decoder: it shows the newest decoded frame at or before the playhead.
+#   A GOP longer than the ring is decoded anyway: its decoder waits for the playhead to
+#   free room instead of dropping frames and starting over from the keyframe.
+#
+# Needs PyAV (pip install av) to read the video and OpenCV (pip install opencv-python) for the window.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# --- CONFIGURATION ---
+VIDEO_SPEED_KMH = 20.0          # Speed the video was filmed at (1x playback); or --video-speed
+DISPLAY_WIDTH = 1280            # Frames are scaled to this width when decoded
+DECODE_WORKERS = 3              # GOPs decoded in parallel
+RING_FRAMES = 90                # Decoded frames kept (~ 250 MB at 1280 x 720)
+AHEAD_SECONDS = 1.5             # Keep this much playback time decoded ahead...
+MIN_AHEAD_FRAMES = 8            # ...but at least this many frames
+MAX_RATE = 8.0                  # Playback rate limit (x the filmed speed)
+RING_WAIT_SECONDS = 0.005       # A decoder ahead of the ring waits this long for room, then tries again
+WINDOW_NAME = 'Ride Video'
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.avi', '.webm')
+
+
+def find_video(path):
+    """A video file, or the first video (by name) in a folder. Returns None if there is none."""
+    if os.path.isfile(path):
+        return path
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                return os.path.join(path, name)
+    return None
+
+
+class VideoIndex:
+    """Frame timestamps (presentation order) and keyframe positions of a video's first video stream."""
+
+    def __init__(self, pts, keyframes, time_base, fps):
+        self.pts = pts                  # int64 array, one entry per frame, ascending
+        self.keyframes = keyframes      # int64 array of frame numbers that are keyframes, ascending
+        self.time_base = time_base      # Seconds per pts unit
+        self.fps = fps
+        self.frame_count = len(pts)
+
+    @classmethod
+    def build(cls, path):
+        """Reads all packets of the video stream (no decoding)."""
+        import av
+        with av.open(path) as container:
+            stream = container.streams.video[0]
+            pts, key_pts = [], []
+            for packet in container.demux(stream):
+                if packet.pts is None:
+                    continue            # Flush packet
+                pts.append(packet.pts)
+                if packet.is_keyframe:
+                    key_pts.append(packet.pts)
+            time_base = float(stream.time_base)
+            fps = float(stream.average_rate or stream.guessed_rate or 30)
+        if not pts:
+            raise ValueError(f"{path}: no video frames")
+        pts = np.unique(np.asarray(pts, dtype=np.int64))       # Sorted: presentation order
+        keyframes = np.searchsorted(pts, np.asarray(key_pts, dtype=np.int64))
+        keyframes = np.unique(np.concatenate(([0], keyframes)))  # Decoding can always start at 0
+        return cls(pts, keyframes, time_base, fps)
+
+    @classmethod
+    def load(cls, path):
+        """The saved index when it belongs to this exact file, else a fresh one (saved for next time)."""
+        index_path = path + '.index.npz'
+        st = os.stat(path)
+        try:
+            with np.load(index_path) as saved:
+                if int(saved['size']) == st.st_size and int(saved['mtime_ns']) == st.st_mtime_ns:
+                    return cls(saved['pts'], saved['keyframes'], float(saved['time_base']), float(saved['fps']))
+        except (OSError, KeyError, ValueError):
+            pass
+        index = cls.build(path)
+        try:
+            np.savez(index_path, pts=index.pts, keyframes=index.keyframes, time_base=index.time_base,
+                     fps=index.fps, size=st.st_size, mtime_ns=st.st_mtime_ns)
+        except OSError:
+            pass                        # Read-only folder: just rebuild next time
+        return index
+
+    def gop_of(self, frame):
+        """Number of the GOP (keyframe interval) containing a frame."""
+        return int(np.searchsorted(self.keyframes, frame, side='right')) - 1
+
+    def gop_range(self, gop):
+        """(first_frame, end_frame) of a GOP."""
+        start = int(self.keyframes[gop])
+        end = int(self.keyframes[gop + 1]) if gop + 1 < len(self.keyframes) else self.frame_count
+        return start, end
+
+
+class FrameRing:
+    """At most 'capacity' decoded frames by frame number. Thread-safe."""
+
+    def __init__(self, capacity=RING_FRAMES):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.frames = {}
+        self.playhead = 0
+        self.evicted = []               # Frames ahead of the playhead pushed out by nearer ones
+
+    def put(self, number, frame):
+        """Stores a frame. Returns False when it was not kept (played already, or no room)."""
+        with self.lock:
+            if number < self.playhead:
+                return False
+            if len(self.frames) >= self.capacity:
+                # Make room: a frame behind the playhead, else the one farthest ahead if it is
+                # farther than this one
+                victim = min(self.frames)
+                if victim >= self.playhead:
+                    victim = max(self.frames)
+                    if victim <= number:
+                        return False
+                    self.evicted.append(victim)
+                del self.frames[victim]
+            self.frames[number] = frame
+            return True
+
+    def advance(self, playhead, stride=1):
+        """
+        Moves the playhead and frees what is behind it (the frame on screen is kept) and,
+        after a speed-up, the frames ahead that are no longer on the stride.
+        """
+        with self.lock:
+            self.playhead = playhead
+            shown = self._latest_at_or_before(playhead)
+            for number in [n for n in self.frames
+                           if n != shown and (n < playhead or n % stride)]:
+                del self.frames[number]
+
+    def _latest_at_or_before(self, playhead):
+        candidates = [n for n in self.frames if n <= playhead]
+        return max(candidates) if candidates else None
+
+    def latest_at_or_before(self, playhead):
+        """(number, frame) of the newest frame not after the playhead, or None."""
+        with self.lock:
+            number = self._latest_at_or_before(playhead)
+            return (number, self.frames[number]) if number is not None else None
+
+    def __len__(self):
+        with self.lock:
+            return len(self.frames)
+
+
+class AvDecoder:
+    """Decodes one GOP at a time with PyAV; every worker thread has its own container."""
+
+    def __init__(self, path, index, width=DISPLAY_WIDTH):
+        self.path = path
+        self.index = index
+        self.width = width
+        self.local = threading.local()
+
+    def _container(self):
+        container = getattr(self.local, 'container', None)
+        if container is None:
+            import av
+            container = self.local.container = av.open(self.path)
+            container.streams.video[0].thread_type = 'AUTO'
+        return container
+
+    def decode(self, start, end, stride, keep):
+        """
+        Decodes frames start..end-1 (start is a keyframe) and calls keep(number, bgr_array) for
+        every frame whose number is a multiple of stride. Returns early when keep returns False.
+        """
+        container = self._container()
+        stream = container.streams.video[0]
+        pts = self.index.pts
+        container.seek(int(pts[start]), stream=stream, backward=True, any_frame=False)
+        last_pts = int(pts[end - 1])
+        for frame in container.decode(stream):
+            if frame.pts is None or frame.pts < pts[start]:
+                continue
+            if frame.pts > last_pts:
+                break
+            number = int(np.searchsorted(pts, frame.pts))
+            if number % stride:
+                continue
+            height = int(round(frame.height * self.width / frame.width / 2)) * 2
+            image = frame.reformat(width=self.width, height=height, format='bgr24').to_ndarray()
+            if keep(number, image) is False:
+                break
+
+
+class VideoPlayer:
+    """
+    Moves the playhead with the rider's speed and keeps the decoders ahead of it.
+    decoder: an object with decode(start, end, stride, keep) (AvDecoder, or a stand-in for tests).
+    """
+
+    def __init__(self, index, decoder, filmed_speed, workers=DECODE_WORKERS, ring_frames=RING_FRAMES):
+        self.index = index
+        self.decoder = decoder
+        self.filmed_speed = filmed_speed    # m/s
+        self.workers = workers
+        self.ring = FrameRing(ring_frames)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='decode')
+        self.lock = threading.Lock()
+        self.pending = {}               # gop -> stride being decoded
+        self.done = {}                  # gop -> stride it was decoded at
+        self.position = 0.0             # Playhead in frames (float)
+        self.rate = 0.0
+        self.shown = None               # Frame number on screen
+        self.late = 0                   # Updates that showed an older frame than the playhead wanted
+        self.updates = 0
+        self.decoded = 0
+
+    def update(self, speed, dt):
+        """
+        Advances the playhead by dt seconds at bike speed (m/s) and schedules decoding.
+        Returns (frame_number, image) to show, or None while nothing is decoded yet.
+        """
+        self.rate = min(MAX_RATE, speed / self.filmed_speed) if self.filmed_speed > 0 else 0.0
+        last = self.index.frame_count - 1
+        self.position = min(last, self.position + self.rate * self.index.fps * dt)
+        playhead = int(self.position)
+        self.ring.advance(playhead, self._stride())
+        self._schedule(playhead)
+
+        self.updates += 1
+        latest = self.ring.latest_at_or_before(playhead)
+        if latest is None:
+            return None
+        if playhead - latest[0] >= self._stride():
+            self.late += 1              # The decoders fell behind: keep showing what we have
+        self.shown = latest[0]
+        return latest
+
+    def _stride(self):
+        # Above 1x not every frame can be shown anyway: decode all, keep every n-th
+        return max(1, int(self.rate))
+
+    def _schedule(self, playhead):
+        stride = self._stride()
+        ahead = max(MIN_AHEAD_FRAMES, self.rate * self.index.fps * AHEAD_SECONDS)
+        first_gop = self.index.gop_of(playhead)
+        last_gop = self.index.gop_of(min(self.index.frame_count - 1, int(playhead + ahead)))
+        with self.lock:
+            for gop in [g for g in self.pending if g < first_gop]:
+                del self.pending[gop]   # Played past it: its worker stops at the next frame
+            for gop in [g for g in self.done if g < first_gop]:
+                del self.done[gop]
+            while self.ring.evicted:
+                # A decoded GOP lost a frame to nearer ones: decode it again when there is room
+                self.done.pop(self.index.gop_of(self.ring.evicted.pop()), None)
+            for gop in range(first_gop, last_gop + 1):
+                if len(self.pending) >= self.workers:
+                    break
+                if gop > first_gop and (self.index.gop_range(gop)[0] - playhead) / stride >= self.ring.capacity:
+                    break               # No room for any of its frames before the playhead gets there
+                done_stride = self.done.get(gop)
+                if gop in self.pending or (done_stride is not None and stride % done_stride == 0):
+                    continue            # Already decoded with every frame needed now
+                self.pending[gop] = stride
+                self.pool.submit(self._decode_gop, gop, stride)
+
+    def _decode_gop(self, gop, stride):
+        start, end = self.index.gop_range(gop)
+
+        def keep(number, image):
+            if number < int(self.position):
+                return self._still_wanted(gop, stride)     # Played already: decode on to the playhead
+            self.decoded += 1
+            # Frames nearer the playhead win the ring; this one waits until the playhead frees room
+            while not self.ring.put(number, image):
+                if number < int(self.position) or not self._still_wanted(gop, stride):
+                    break
+                time.sleep(RING_WAIT_SECONDS)
+            return self._still_wanted(gop, stride)
+
+        complete = False
+        try:
+            self.decoder.decode(start, end, stride, keep)
+            complete = True
+        finally:
+            with self.lock:
+                if self.pending.get(gop) == stride:
+                    del self.pending[gop]
+                    if complete:
+                        self.done[gop] = stride
+
+    def _still_wanted(self, gop, stride):
+        with self.lock:
+            return self.pending.get(gop) == stride      # Not played past or rescheduled at another stride
+
+    def finished(self):
+        return self.position >= self.index.frame_count - 1
+
+    def summary(self):
+        seconds = self.position / self.index.fps
+        late = f", {self.late * 100 / self.updates:.1f}% late" if self.updates else ""
+        return f"VIDEO: {seconds / 60:.1f} min played, {self.decoded} frames decoded{late}"
+
+    def close(self):
+        with self.lock:
+            self.pending.clear()        # Decoders waiting for room in the ring give up
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class VideoWindow:
+    """The OpenCV window the frames are shown in."""
+
+    def __init__(self, name=WINDOW_NAME):
+        import cv2
+        self.cv2 = cv2
+        self.name = name
+        cv2.namedWindow(name, cv2.WINDOW_NORMAL)
+        self.shown = None
+
+    def show(self, latest):
+        if latest is not None and latest[0] != self.shown:
+            self.cv2.imshow(self.name, latest[1])
+            self.shown = latest[0]
+        self.cv2.waitKey(1)             # Lets the window repaint
+
+    def close(self):
+        self.cv2.destroyWindow(self.name)
+
+
+def open_video(path, filmed_speed_kmh=VIDEO_SPEED_KMH):
+    """VideoPlayer for a video file or the first video in a folder (raises ValueError / ImportError)."""
+    video = find_video(path)
+    if video is None:
+        raise ValueError(f"No video found at {path}")
+    start = time.perf_counter()
+    index = VideoIndex.load(video)
+    print(f"Video: {os.path.basename(video)}, {index.frame_count} frames, {len(index.keyframes)} keyframes "
+          f"(index {time.perf_counter() - start:.2f}s)")
+    return VideoPlayer(index, AvDecoder(video, index), filmed_speed_kmh / 3.6)
@@ -0,0 +1,302 @@
+# webSocket.py - Minimal WebSocket Server and Client (RFC 6455, standard library only)
+# Just enough WebSocket for talking to a page on the same PC: text and binary messages,
+# ping / pong and close, no extensions. The server also answers plain HTTP GETs for the
+# files it is given, so the page can be loaded from the same port it connects back to.
+#
+# - WebSocketServer: accepts clients on a thread each and calls on_message(client, text).
+# - WebSocketClient: a blocking client, for stand-ins and tests.
+
+import base64
+import hashlib
+import os
+import socket
+import struct
+import threading
+
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_MESSAGE_BYTES = 1 << 20
+CONTENT_TYPES = {'.html': 'text/html; charset=utf-8', '.js': 'text/javascript', '.css': 'text/css'}
+
+
+class WebSocketClosed(Exception):
+    """The other side closed the connection (or it broke)."""
+
+
+def accept_key(key):
+    """Sec-WebSocket-Accept for a client's Sec-WebSocket-Key."""
+    return base64.b64encode(hashlib.sha1((key + GUID).encode('ascii')).digest()).decode('ascii')
+
+
+def encode_frame(opcode, payload, mask=False):
+    """One final frame. Clients must mask, servers must not."""
+    header = bytearray([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 0x10000:
+        header.append(mask_bit | 126)
+        header += struct.pack('>H', length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack('>Q', length)
+    if not mask:
+        return bytes(header) + payload
+    key = os.urandom(4)
+    return bytes(header) + key + apply_mask(payload, key)
+
+
+def apply_mask(payload, key):
+    """(Un)masks a payload with a 4-byte key."""
+    # XOR with the 4-byte key, a machine word at a time rather than byte by byte
+    n = len(payload)
+    repeated = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(payload, 'little') ^ int.from_bytes(repeated, 'little')).to_bytes(n, 'little')
+
+
+def _recv_exact(sock, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            raise WebSocketClosed("connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def read_frame(sock):
+    """Reads one frame. Returns (fin, opcode, payload)."""
+    first, second = _recv_exact(sock, 2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('>H', _recv_exact(sock, 2))[0]
+    elif length == 127:
+        length = struct.unpack('>Q', _recv_exact(sock, 8))[0]
+    if length > MAX_MESSAGE_BYTES:
+        raise WebSocketClosed(f"frame of {length} bytes is too large")
+    key = _recv_exact(sock, 4) if second & 0x80 else None
+    payload = _recv_exact(sock, length)
+    if key is not None:
+        payload = apply_mask(payload, key)
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+def _read_http_head(sock):
+    data = bytearray()
+    while b'\r\n\r\n' not in data:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise WebSocketClosed("connection closed during the handshake")
+        data += chunk
+        if len(data) > 16384:
+            raise WebSocketClosed("request head too large")
+    head, _, rest = bytes(data).partition(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return lines[0], headers, rest
+
+
+class Connection:
+    """One open WebSocket (either side). send_* may be called from any thread."""
+
+    def __init__(self, sock, address, is_client):
+        self.sock = sock
+        self.address = address
+        self.is_client = is_client
+        self.send_lock = threading.Lock()
+        self.closed = False
+
+    def _send(self, opcode, payload):
+        frame = encode_frame(opcode, payload, mask=self.is_client)
+        with self.send_lock:
+            if self.closed:
+                raise WebSocketClosed("connection closed")
+            try:
+                self.sock.sendall(frame)
+            except OSError as e:
+                self.closed = True
+                raise WebSocketClosed(str(e))
+
+    def send_text(self, text):
+        self._send(OP_TEXT, text.encode('utf-8'))
+
+    def send_binary(self, data):
+        self._send(OP_BINARY, bytes(data))
+
+    def receive(self):
+        """
+        Next message: str for text, bytes for binary. Answers pings on the way.
+        Raises WebSocketClosed when the connection is closed.
+        """
+        parts = []
+        message_opcode = None
+        while True:
+            fin, opcode, payload = read_frame(self.sock)
+            if opcode == OP_PING:
+                self._send(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                self.close(payload[:2])
+                raise WebSocketClosed("closed by the other side")
+            if opcode != OP_CONTINUATION:
+                message_opcode = opcode
+                parts = []
+            parts.append(payload)
+            if fin:
+                data = b''.join(parts)
+                return data.decode('utf-8') if message_opcode == OP_TEXT else data
+
+    def close(self, code=b'\x03\xe8'):
+        """Sends a close frame (1000 = normal) and closes the socket."""
+        with self.send_lock:
+            if self.closed:
+                return
+            self.closed = True
+            try:
+                self.sock.sendall(encode_frame(OP_CLOSE, code, mask=self.is_client))
+            except OSError:
+                pass
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class WebSocketServer:
+    """
+    Accepts WebSocket clients on host:port, a thread per client.
+
+    :param on_message: called as on_message(connection, message) on the client's thread.
+    :param on_connect / on_disconnect: optional, called with the connection.
+    :param files: {url_path: file_path} answered to plain HTTP GETs (e.g. the page itself).
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, on_message=None, on_connect=None,
+                 on_disconnect=None, files=None):
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.files = files or {}
+        self.clients = set()
+        self.clients_lock = threading.Lock()
+        self.listener = socket.create_server((host, port))
+        self.port = self.listener.getsockname()[1]     # The real port when 0 was asked for
+        self.running = False
+
+    def start(self):
+        self.running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.listener.close()
+        for client in self.connections():
+            client.close()
+
+    def connections(self):
+        with self.clients_lock:
+            return list(self.clients)
+
+    def broadcast_text(self, text):
+        """Sends a text message to every client. Returns how many got it."""
+        sent = 0
+        for client in self.connections():
+            try:
+                client.send_text(text)
+                sent += 1
+            except WebSocketClosed:
+                pass
+        return sent
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                sock, address = self.listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve, args=(sock, address), daemon=True).start()
+
+    def _serve(self, sock, address):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # Small messages, no Nagle delay
+        try:
+            request_line, headers, _ = _read_http_head(sock)
+        except (WebSocketClosed, OSError):
+            sock.close()
+            return
+        if headers.get('upgrade', '').lower() != 'websocket':
+            self._serve_file(sock, request_line)
+            return
+
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept_key(headers.get('sec-websocket-key', ''))}\r\n\r\n"
+        ).encode('ascii'))
+        connection = Connection(sock, address, is_client=False)
+        with self.clients_lock:
+            self.clients.add(connection)
+        if self.on_connect:
+            self.on_connect(connection)
+        try:
+            while True:
+                message = connection.receive()
+                if self.on_message:
+                    self.on_message(connection, message)
+        except (WebSocketClosed, OSError):
+            pass
+        finally:
+            with self.clients_lock:
+                self.clients.discard(connection)
+            connection.close()
+            if self.on_disconnect:
+                self.on_disconnect(connection)
+
+    def _serve_file(self, sock, request_line):
+        parts = request_line.split()
+        path = parts[1].split('?')[0] if len(parts) > 1 else ''
+        file_path = self.files.get(path)
+        try:
+            if parts[0] != 'GET' or file_path is None:
+                sock.sendall(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+            with open(file_path, 'rb') as f:
+                body = f.read()
+            content_type = CONTENT_TYPES.get(os.path.splitext(file_path)[1], 'application/octet-stream')
+            sock.sendall((f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+                          f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\n"
+                          "Connection: close\r\n\r\n").encode('ascii') + body)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+
+class WebSocketClient(Connection):
+    """Blocking client: WebSocketClient('127.0.0.1', 8765).send_text(...) / .receive()."""
+
+    def __init__(self, host, port, path='/', timeout=5.0):
+        sock = socket.create_connection((host, port), timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        key = base64.b64encode(os.urandom(16)).decode('ascii')
+        sock.sendall((
+            f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode('ascii'))
+        status, headers, rest = _read_http_head(sock)
+        if status.split()[1:2] != ['101'] or headers.get('sec-websocket-accept') != accept_key(key):
+            sock.close()
+            raise WebSocketClosed(f"handshake refused: {status}")
+        if rest:
+            sock.close()
+            raise WebSocketClosed("unexpected data after the handshake")
+        sock.settimeout(None)
+        super().__init__(sock, (host, port), is_client=True)
@@ -0,0 +1,76 @@
+# zoomDial.py - Zoom Dial to Mouse Scroll
+# The Arduino (rollerInterface1.ino) sends the zoom dial as a signed detent count per
+# packet (R,X,Y,Z with Z = clicks since the last packet), so a fast spin arrives as one
+# large delta instead of lost clicks.
+#
+# ZoomScroller turns those deltas into as few scroll events as possible:
+# - batching: all clicks that arrive within ZOOM_FLUSH_SECONDS become one mouse.scroll(0, n)
+#   call instead of one call per click;
+# - acceleration: when the dial spins faster than ZOOM_ACCEL_START clicks per second, each
+#   click scrolls further (up to ZOOM_MAX_GAIN), so a flick zooms all the way while a slow
+#   turn still moves one notch per click. Fractions are carried over to the next clicks in
+#   the same direction; turning the dial the other way drops the leftover fraction.
+
+import math
+
+# --- CONFIGURATION ---
+ZOOM_FLUSH_SECONDS = 0.03       # Clicks arriving within this window are sent as one scroll
+ZOOM_ACCEL_START = 8.0          # Clicks per second before acceleration kicks in
+ZOOM_ACCEL_GAIN = 0.1           # Extra scroll per click for each click/s above the start
+ZOOM_MAX_GAIN = 4.0             # Scroll notches per click at most
+ZOOM_RATE_SMOOTHING = 0.3       # Seconds: time constant of the spin speed estimate
+ZOOM_INVERT = False             # True if the dial zooms the wrong way
+
+
+class ZoomScroller:
+    """Accumulates zoom dial deltas and returns batched, accelerated scroll amounts."""
+
+    def __init__(self, flush_seconds=ZOOM_FLUSH_SECONDS, accel_start=ZOOM_ACCEL_START,
+                 accel_gain=ZOOM_ACCEL_GAIN, max_gain=ZOOM_MAX_GAIN, smoothing=ZOOM_RATE_SMOOTHING):
+        self.flush_seconds = flush_seconds
+        self.accel_start = accel_start
+        self.accel_gain = accel_gain
+        self.max_gain = max_gain
+        self.smoothing = smoothing
+        self.rate = 0.0            # Smoothed clicks per second
+        self.pending = 0.0         # Scroll not sent yet (fractions included)
+        self.last_time = None
+        self.last_scroll = None    # When the last scroll event was sent
+        self.events = 0            # Scroll events sent
+        self.clicks = 0            # Dial clicks received
+
+    def gain(self):
+        """Scroll notches per click at the current spin speed."""
+        extra = max(0.0, self.rate - self.accel_start) * self.accel_gain
+        return min(self.max_gain, 1.0 + extra)
+
+    def add(self, delta, now):
+        """
+        Adds a detent delta (0 is fine) received at perf_counter() time now.
+        Returns the whole notches to scroll now, 0 while batching.
+        """
+        if self.last_time is not None:
+            dt = max(now - self.last_time, 1e-3)
+            # Exponential smoothing with a time constant, so uneven packet timing is fine
+            alpha = 1.0 - math.exp(-dt / self.smoothing)
+            self.rate += alpha * (abs(delta) / dt - self.rate)
+        self.last_time = now
+
+        if delta:
+            self.clicks += abs(delta)
+            if self.pending * delta < 0:
+                self.pending = 0.0     # Direction changed: a leftover fraction must not eat the click
+            self.pending += delta * self.gain()
+        return self.flush(now)
+
+    def flush(self, now):
+        """Returns the whole notches due now; the fraction waits for more clicks."""
+        if self.last_scroll is not None and now - self.last_scroll < self.flush_seconds:
+            return 0
+        notches = int(self.pending)          # Toward zero
+        if not notches:
+            return 0
+        self.pending -= notches
+        self.last_scroll = now
+        self.events += 1
+        return -notches if ZOOM_INVERT else notches